@@ -1,40 +1,62 @@
 # app.py - Flask Backend with Google Gemini
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 from flask_cors import CORS
-import google.generativeai as genai
-import pytesseract
-from PIL import Image
-import io
+from werkzeug.exceptions import RequestEntityTooLarge
 import base64
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import os
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
-import re
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 import json
+import logging
+from services.render_service import (
+    compile_templates, get_recipient, render_all, render_batch, to_ndjson,
+    iter_ndjson, iter_sheet_events, MAX_LINE_BYTES
+)
+from services.scraper_service import scrape_email_from_social
+from models.data_model import EventBatch
+from utils.pipeline import Pipeline, Stage, StageFailed, StageTimeout
+from utils.helpers import format_date, format_time
+from utils.image_decode import ImageTooLarge, load_for_ocr
+from utils.log import (
+    REQUEST_ID_HEADER, bind_request_id, get_request_id, reset_request_id, sampled, setup_logging
+)
+from utils.metrics import CONTENT_TYPE, render_metrics, stage_timer, timed
+from utils.middleware import GzipRequestMiddleware, InvalidGzipBody, RequestProfiler, TrafficRecorder
+from utils.profiling import DEBUG_TOKEN_HEADER, ProfilerBusy, debug_authorized, sample_stacks
+from utils.tracing import CLIENT, TRACEPARENT_HEADER, begin_trace, end_span, start_span
+from utils.traffic import TrafficLog
+from utils.uploads import SpooledUpload, UploadTooLarge
+from config import Config
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH
 CORS(app)
+app.wsgi_app = RequestProfiler(GzipRequestMiddleware(app.wsgi_app, max_size=Config.MAX_CONTENT_LENGTH))
+if Config.TRAFFIC_LOG_FILE:
+    app.wsgi_app = TrafficRecorder(app.wsgi_app, TrafficLog(Config.TRAFFIC_LOG_FILE))
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 # Initialize model lazily (only when needed)
 model = None
 
+# Heavy client libraries (Gemini, Tesseract, gspread, PIL) are imported on
+# first use so cold starts stay fast; see benchmarks/bench_startup.py
+
 def get_gemini_model():
     """Get or initialize Gemini model"""
     global model
     if model is None:
         if not GEMINI_API_KEY or len(GEMINI_API_KEY) < 20:
             raise ValueError("GEMINI_API_KEY not configured. Please set your real API key in .env file")
+        import google.generativeai as genai
         genai.configure(api_key=GEMINI_API_KEY)
         model = genai.GenerativeModel("gemini-2.5-flash")
     return model
@@ -126,10 +148,16 @@ Event Management Team'''
     }
 }
 
+# Templates parsed once for bulk rendering
+COMPILED_TEMPLATES = compile_templates(EMAIL_TEMPLATES)
+
 
 def init_google_sheets():
     """Initialize Google Sheets connection"""
     try:
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        
         creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPE)
         client = gspread.authorize(creds)
         
@@ -146,35 +174,38 @@ def init_google_sheets():
         
         return sheet
     except Exception as e:
-        print(f"Error initializing Google Sheets: {e}")
+        logger.error(f"Error initializing Google Sheets: {e}")
         return None
 
 
 def extract_text_from_image(image_data):
-    """Extract text from image using OCR"""
+    """Extract text from image using OCR (a base64 data URL or a spooled file path)"""
     try:
-        # Decode base64 image
-        if 'base64,' in image_data:
-            image_data = image_data.split('base64,')[1]
+        import pytesseract
+        
+        if not isinstance(image_data, os.PathLike):
+            # Decode base64 image
+            if 'base64,' in image_data:
+                image_data = image_data.split('base64,')[1]
+            
+            image_data = base64.b64decode(image_data)
         
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        image = load_for_ocr(image_data, Config.OCR_MAX_PIXELS, Config.OCR_MAX_LONG_EDGE)
         
         # Perform OCR
-        text = pytesseract.image_to_string(image)
-        print(f"OCR extracted text: {text[:200]}...")
+        with stage_timer('ocr'):
+            text = pytesseract.image_to_string(image)
+        logger.info('OCR extracted text', extra=sampled(ocr_chars=len(text), ocr_text=text[:200]))
         return text
+    except ImageTooLarge:
+        # The client's fault, not an OCR failure: the endpoint answers 413
+        raise
     except Exception as e:
-        print(f"Error in OCR: {e}")
+        logger.error(f"Error in OCR: {e}")
         return None
 
 
-def categorize_with_gemini(ocr_text):
-    """Use Google Gemini to categorize extracted text into structured data"""
-    try:
-        model = get_gemini_model()
-            
-        prompt = f"""
+CATEGORIZE_PROMPT = """
 Extract and categorize the following event poster text into JSON format.
 
 TEXT:
@@ -197,28 +228,23 @@ Rules:
 - Extract only factual information from the text
 - Return ONLY the JSON object, no explanation
 """
-        
-        print("Calling Google Gemini API...")
-        response = model.generate_content(prompt)
-        result = response.text.strip()
-        
-        print(f"Gemini response: {result[:200]}...")
-        
-        # Remove markdown code blocks if present
-        if result.startswith('```'):
-            result = result.split('```')[1]
-            if result.startswith('json'):
-                result = result[4:]
-            result = result.strip()
-        
-        # Parse JSON
+
+
+def parse_gemini_response(result):
+    """Parse Gemini's JSON reply, falling back to "Not specified" fields"""
+    logger.info('Gemini response', extra=sampled(gemini_response=result[:200]))
+    
+    # Remove markdown code blocks if present
+    if result.startswith('```'):
+        result = result.split('```')[1]
+        if result.startswith('json'):
+            result = result[4:]
+        result = result.strip()
+    
+    try:
         data = json.loads(result)
-        print(f"Successfully parsed data: {list(data.keys())}")
-        return data
-        
     except json.JSONDecodeError as e:
-        print(f"JSON Parse Error: {e}")
-        print(f"Response was: {result}")
+        logger.warning(f"JSON Parse Error: {e}", extra={'gemini_response': result[:1000]})
         # Return default structure
         return {
             "event_name": "Not specified",
@@ -229,26 +255,44 @@ Rules:
             "time": "Not specified",
             "location": "Not specified"
         }
+    
+    logger.debug(f"Successfully parsed data: {list(data.keys())}")
+    return data
+
+
+@timed('categorize')
+def categorize_with_gemini(ocr_text):
+    """Use Google Gemini to categorize extracted text into structured data"""
+    try:
+        model = get_gemini_model()
+        
+        logger.debug("Calling Google Gemini API...")
+        with start_span('gemini.generate_content', CLIENT):
+            response = model.generate_content(CATEGORIZE_PROMPT.format(ocr_text=ocr_text))
+        return parse_gemini_response(response.text.strip())
+        
     except Exception as e:
-        print(f"Error in Gemini categorization: {e}")
+        logger.error(f"Error in Gemini categorization: {e}")
         raise
 
 
-def scrape_email_from_social(name, platform='instagram'):
-    """
-    Scrape email from Instagram/Facebook
-    Note: This is a simplified version.
-    """
+@timed('categorize')
+async def categorize_with_gemini_async(ocr_text):
+    """categorize_with_gemini without blocking the event loop"""
     try:
-        # Placeholder for actual scraping logic
-        clean_name = name.lower().replace(' ', '').replace('the', '')
-        return f"contact@{clean_name}.com"
+        model = get_gemini_model()
+        
+        logger.debug("Calling Google Gemini API (async)...")
+        with start_span('gemini.generate_content', CLIENT):
+            response = await model.generate_content_async(CATEGORIZE_PROMPT.format(ocr_text=ocr_text))
+        return parse_gemini_response(response.text.strip())
         
     except Exception as e:
-        print(f"Error scraping email: {e}")
-        return "email@example.com"
+        logger.error(f"Error in Gemini categorization: {e}")
+        raise
 
 
+@timed('sheets', ok=bool)
 def save_to_google_sheets(data, sheet):
     """Save extracted data to Google Sheets"""
     try:
@@ -264,13 +308,15 @@ def save_to_google_sheets(data, sheet):
             data.get('artist_email', ''),
             data.get('venue_email', '')
         ]
-        sheet.append_row(row)
+        with start_span('sheets.append_row', CLIENT):
+            sheet.append_row(row)
         return True
     except Exception as e:
-        print(f"Error saving to Google Sheets: {e}")
+        logger.error(f"Error saving to Google Sheets: {e}")
         return False
 
 
+@timed('send', ok=bool)
 def send_email(to_email, subject, body):
     """Send email using SMTP"""
     try:
@@ -281,77 +327,243 @@ def send_email(to_email, subject, body):
         
         msg.attach(MIMEText(body, 'plain'))
         
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)  # Connect to SMTP server
-        server.starttls() #encrypting the connection
-        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD) 
-        server.send_message(msg)
-        server.quit()
+        with start_span('smtp.send_message', CLIENT, {'server.address': SMTP_SERVER}):
+            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)  # Connect to SMTP server
+            server.starttls() #encrypting the connection
+            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD) 
+            server.send_message(msg)
+            server.quit()
         
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error sending email: {e}")
         return False
 
 
+def ocr_stage(image):
+    """Pipeline stage: OCR the uploaded image"""
+    logger.debug("Step 1: Extracting text with OCR...")
+    ocr_text = extract_text_from_image(image)
+    if not ocr_text:
+        raise ValueError('Failed to extract text from image')
+    return ocr_text
+
+
+def categorize_stage(ocr):
+    """Pipeline stage: structure the OCR text with Gemini"""
+    logger.debug("Step 2: Categorizing with Gemini...")
+    return normalize_categorized(categorize_with_gemini(ocr))
+
+
+def normalize_categorized(categorized_data):
+    """Validate Gemini's output and normalize its date and time"""
+    if not categorized_data:
+        raise ValueError('Failed to categorize data')
+    
+    # The model doesn't always follow the requested formats
+    categorized_data['date'] = format_date(categorized_data.get('date', 'Not specified'))
+    categorized_data['time'] = format_time(categorized_data.get('time', 'Not specified'))
+    return categorized_data
+
+
+def artist_email_stage(categorize):
+    """Pipeline stage: look up the artist's contact email"""
+    logger.debug("Step 3a: Scraping artist email...")
+    return scrape_email_from_social(categorize.get('artist_name', ''), platform='instagram')
+
+
+def venue_email_stage(categorize):
+    """Pipeline stage: look up the venue's contact email"""
+    logger.debug("Step 3b: Scraping venue email...")
+    return scrape_email_from_social(categorize.get('venue_name', ''), platform='facebook')
+
+
+def sheets_stage(categorize, artist_email, venue_email):
+    """Pipeline stage: append the extraction to Google Sheets"""
+    logger.debug("Step 4: Saving to Google Sheets...")
+    sheet = init_google_sheets()
+    if sheet:
+        row = dict(categorize, artist_email=artist_email, venue_email=venue_email)
+        save_to_google_sheets(row, sheet)
+
+
+# OCR -> categorize -> {artist lookup || venue lookup} -> {sheets write || response}
+EXTRACT_PIPELINE = Pipeline([
+    Stage('ocr', ocr_stage, deps=('image',),
+          deadline=Config.STAGE_DEADLINES['ocr']),
+    Stage('categorize', categorize_stage, deps=('ocr',),
+          deadline=Config.STAGE_DEADLINES['categorize']),
+    Stage('artist_email', artist_email_stage, deps=('categorize',),
+          deadline=Config.STAGE_DEADLINES['artist_email'], critical=False, default=''),
+    Stage('venue_email', venue_email_stage, deps=('categorize',),
+          deadline=Config.STAGE_DEADLINES['venue_email'], critical=False, default=''),
+    Stage('sheets', sheets_stage, deps=('categorize', 'artist_email', 'venue_email'),
+          background=True),
+])
+
+
+def extract_response(result):
+    """Build the /api/extract response body from a pipeline result"""
+    categorized_data = dict(result.results['categorize'])
+    categorized_data['artist_email'] = result.results['artist_email']
+    categorized_data['venue_email'] = result.results['venue_email']
+    
+    # Users almost always generate an email next, so render every
+    # template now and save the client a round-trip
+    emails = render_all(categorized_data, COMPILED_TEMPLATES)
+    
+    return {
+        'success': True,
+        'data': categorized_data,
+        'emails': emails,
+        'metadata': result.metadata()
+    }
+
+
+def check_template_ids(template_ids):
+    """Returns an error message for a batch request's template ids, or None"""
+    if not template_ids:
+        return 'No template ids provided'
+    invalid = [t for t in template_ids if t not in COMPILED_TEMPLATES]
+    if invalid:
+        return f"Invalid template type: {', '.join(invalid)}"
+    return None
+
+
+def dedupe_events(events):
+    """
+    A batch request's events without repeats, for 'dedupe': true
+
+    Events with the same name, venue and date (ignoring case) render once;
+    event_index then counts the remaining events. Missing and null fields
+    get their defaults, as in EventData.
+    """
+    return EventBatch.from_dicts(events).dedupe().to_dicts()
+
+
+@app.before_request
+def bind_request():
+    """Correlate this request's log records by its X-Request-ID and continue its trace"""
+    g.request_id_token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+    g.span, g.span_token = begin_trace(
+        f"{request.method} {request.path}",
+        request.headers.get(TRACEPARENT_HEADER),
+        {'http.request.method': request.method, 'url.path': request.path}
+    )
+
+
+@app.after_request
+def add_request_id(response):
+    response.headers.setdefault(REQUEST_ID_HEADER, get_request_id())
+    g.span.set_attribute('http.response.status_code', response.status_code)
+    if response.status_code >= 500:
+        g.span.record_error(response.status)
+    return response
+
+
+@app.teardown_request
+def unbind_request(error=None):
+    # Runs after a streamed response has been sent, so the span covers it
+    if 'span_token' in g:
+        end_span(g.pop('span'), g.pop('span_token'), error)
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        reset_request_id(token)
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """JSON 413 for bodies over MAX_CONTENT_LENGTH"""
+    return jsonify({'success': False, 'error': 'Upload exceeds the maximum size'}), 413
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'message': 'Backend is running with Google Gemini'
+        'message': 'Backend is running with Google Gemini',
+        # Clients downscale uploads to this before sending (OCR needs no more)
+        'upload': {
+            'max_long_edge': Config.UPLOAD_MAX_LONG_EDGE,
+            'preferred_format': Config.UPLOAD_PREFERRED_FORMAT,
+            'max_content_length': Config.MAX_CONTENT_LENGTH
+        }
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms, call counters and in-flight gauges for Prometheus"""
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+
+@app.route('/api/debug/profile', methods=['GET'])
+def debug_profile():
+    """
+    Sample every thread's stack for ?seconds=N and return collapsed stacks for a flamegraph
+
+    Needs Config.DEBUG_TOKEN in X-Debug-Token; ?idle=1 also counts threads
+    waiting for work. Profiles only the worker process that serves it, and
+    holds one of its request threads for the whole run, up to
+    Config.PROFILE_MAX_SECONDS.
+    """
+    if not Config.DEBUG_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not debug_authorized(request.headers.get(DEBUG_TOKEN_HEADER)):
+        return jsonify({'error': 'Invalid debug token'}), 403
+
+    seconds = request.args.get('seconds', 10, type=float)
+    if not seconds or not 0 < seconds <= Config.PROFILE_MAX_SECONDS:
+        return jsonify({'error': f"seconds must be between 0 and {Config.PROFILE_MAX_SECONDS}"}), 400
+
+    try:
+        collapsed, samples = sample_stacks(seconds, Config.PROFILE_INTERVAL, idle=request.args.get('idle') == '1')
+    except ProfilerBusy:
+        return jsonify({'error': 'A profile is already running'}), 409
+    logger.info(f"Sampled {samples} stacks over {seconds}s for /api/debug/profile")
+    return Response(collapsed, content_type='text/plain; charset=utf-8', headers={'X-Profile-Samples': str(samples)})
+
+
 @app.route('/api/extract', methods=['POST'])
 def extract_poster_data():
     """Main endpoint to extract data from poster"""
     try:
-        data = request.json
-        print("Received request to /api/extract")
+        logger.debug("Received request to /api/extract")
         
-        image_data = data.get('image')
-        
-        if not image_data:
-            return jsonify({'success': False, 'error': 'No image provided'}), 400
-        
-        print("Step 1: Extracting text with OCR...")
-        ocr_text = extract_text_from_image(image_data)
-        if not ocr_text:
-            return jsonify({'success': False, 'error': 'Failed to extract text from image'}), 500
-        
-        print("Step 2: Categorizing with Gemini...")
-        categorized_data = categorize_with_gemini(ocr_text)
-        if not categorized_data:
-            return jsonify({'success': False, 'error': 'Failed to categorize data'}), 500
-        
-        print("Step 3: Scraping emails...")
-        artist_email = scrape_email_from_social(
-            categorized_data.get('artist_name', ''),
-            platform='instagram'
-        )
-        venue_email = scrape_email_from_social(
-            categorized_data.get('venue_name', ''),
-            platform='facebook'
-        )
-        
-        categorized_data['artist_email'] = artist_email
-        categorized_data['venue_email'] = venue_email
+        # Spool the body to disk and decode the image from it instead of
+        # holding the JSON, its string and the image bytes in memory
+        with SpooledUpload.from_stream(
+            request.stream, Config.UPLOAD_FOLDER, Config.MAX_CONTENT_LENGTH
+        ) as upload:
+            try:
+                image_path = upload.decode_data_url('image')
+            except ValueError as e:
+                return jsonify({'success': False, 'error': f"Invalid image data: {e}"}), 400
+            
+            if not image_path or not image_path.stat().st_size:
+                return jsonify({'success': False, 'error': 'No image provided'}), 400
+            
+            result = EXTRACT_PIPELINE.run(image=image_path)
         
-        print("Step 4: Saving to Google Sheets...")
-        sheet = init_google_sheets()
-        if sheet:
-            save_to_google_sheets(categorized_data, sheet)
-        
-        print("Success! Returning data...")
-        return jsonify({
-            'success': True,
-            'data': categorized_data
-        })
+        logger.info('Extraction finished', extra={'timings_ms': result.timings})
+        return jsonify(extract_response(result))
         
+    except (UploadTooLarge, RequestEntityTooLarge) as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return jsonify({'success': False, 'error': 'Upload exceeds the maximum size'}), 413
+    except InvalidGzipBody as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except StageTimeout as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 504
+    except StageFailed as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        status = 413 if isinstance(e.error, ImageTooLarge) else 500
+        return jsonify({'success': False, 'error': str(e.error)}), status
     except Exception as e:
-        print(f"Error in extract endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error in extract endpoint: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -369,14 +581,12 @@ def generate_email():
         template = EMAIL_TEMPLATES[template_type]
         
         # Format email with event data
-        subject = template['subject'].format(**event_data)
-        body = template['body'].format(**event_data)
+        with stage_timer('render'):
+            subject = template['subject'].format(**event_data)
+            body = template['body'].format(**event_data)
         
         # Determine recipient
-        if 'artist' in template_type:
-            recipient = event_data.get('artist_email')
-        else:
-            recipient = event_data.get('venue_email')
+        recipient = get_recipient(template_type, event_data)
         
         return jsonify({
             'success': True,
@@ -391,6 +601,48 @@ def generate_email():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/generate-email/batch', methods=['POST'])
+def generate_email_batch():
+    """
+    Render many events against one or more templates, streamed as NDJSON
+
+    Accepts either a JSON body with 'template_ids' plus 'events' (a list,
+    with 'dedupe': true to drop repeated events) or 'query' (a filter over
+    events stored in Google Sheets), or an application/x-ndjson body of
+    events with ?template_ids=a,b.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            template_ids = request.args.get('template_ids', '').split(',')
+            events = iter_ndjson(request.stream, MAX_LINE_BYTES)
+        else:
+            data = request.get_json(silent=True) or {}
+            template_ids = data.get('template_ids') or []
+            if 'events' in data:
+                events = data['events']
+                if data.get('dedupe'):
+                    events = dedupe_events(events)
+            else:
+                sheet = init_google_sheets()
+                if not sheet:
+                    return jsonify({'error': 'Google Sheets unavailable'}), 500
+                events = iter_sheet_events(sheet, data.get('query'))
+        
+        template_ids = [t for t in template_ids if t]
+        error = check_template_ids(template_ids)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        results = render_batch(events, template_ids, COMPILED_TEMPLATES)
+        return Response(
+            stream_with_context(to_ndjson(results)),
+            mimetype='application/x-ndjson'
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/send-email', methods=['POST'])
 def send_email_endpoint():
     """Send the generated email"""
@@ -424,9 +676,9 @@ def get_templates():
 
 
 if __name__ == '__main__':
-    print("=" * 60)
-    print("🚀 Starting Event Poster Extractor Backend")
-    print("Using Google Gemini for AI processing")
-    print("Backend will run on: http://localhost:5000")
-    print("=" * 60)
-    app.run(debug=True, host='0.0.0.0', port=6100)
\ No newline at end of file
+    setup_logging(console_level='INFO')
+    logger.info("Starting Event Poster Extractor Backend (development server)")
+    logger.info("Using Google Gemini for AI processing")
+    logger.info(f"Backend will run on: http://localhost:{Config.SERVER_PORT}")
+    logger.info(f"For production use: python server.py (logs in {Config.LOG_FILE})")
+    app.run(debug=True, host=Config.SERVER_HOST, port=Config.SERVER_PORT)
\ No newline at end of file
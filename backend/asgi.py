@@ -0,0 +1,290 @@
+"""
+Async entry point for the backend
+
+The I/O-bound endpoints (/api/extract, /api/send-email and
+/api/generate-email/batch) run natively on an asyncio event loop: Gemini
+is called through its async client and contact discovery awaits the
+aiohttp crawler, so one worker can hold hundreds of extractions waiting
+on the network. OCR runs on a small thread pool sized to the CPU count,
+and blocking libraries without async clients (gspread, smtplib) run on
+the shared stage pool. Every other route is served by the Flask app
+unchanged.
+
+Usage:
+    python server.py --asgi
+    uvicorn asgi:app --port 6100
+"""
+
+import json
+import asyncio
+import logging
+import functools
+import threading
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as flask_backend
+from app import (
+    COMPILED_TEMPLATES, EXTRACT_PIPELINE, categorize_with_gemini_async,
+    check_template_ids, dedupe_events, extract_response, init_google_sheets, normalize_categorized,
+    ocr_stage, send_email, sheets_stage
+)
+from config import Config
+from services.render_service import aiter_ndjson, iter_sheet_events, render_batch, render_event, to_ndjson
+from services.scraper_service import scrape_email_from_social_async
+from utils.image_decode import ImageTooLarge
+from utils.log import setup_logging
+from utils.middleware import (
+    AsyncGzipRequestMiddleware, AsyncRequestIdMiddleware, AsyncRequestProfiler, AsyncTracingMiddleware,
+    AsyncTrafficRecorder, InvalidGzipBody
+)
+from utils.profiling import profiled
+from utils.traffic import TrafficLog
+from utils.pipeline import Pipeline, Stage, StageFailed, StageTimeout, get_stage_executor
+from utils.uploads import SpooledUpload, UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+
+
+def get_ocr_executor():
+    """Get or initialize the OCR thread pool"""
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            _ocr_executor = ThreadPoolExecutor(
+                max_workers=Config.OCR_WORKERS,
+                thread_name_prefix='ocr'
+            )
+    return _ocr_executor
+
+
+def _in_context(func, *args):
+    # Executor threads don't inherit context variables such as the request
+    # id, nor a request's profiler
+    return functools.partial(contextvars.copy_context().run, profiled(func), *args)
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the shared stage pool"""
+    return await asyncio.get_running_loop().run_in_executor(get_stage_executor(), _in_context(func, *args))
+
+
+async def ocr_stage_async(image):
+    """Pipeline stage: OCR off the event loop, at most OCR_WORKERS at a time"""
+    return await asyncio.get_running_loop().run_in_executor(get_ocr_executor(), _in_context(ocr_stage, image))
+
+
+async def categorize_stage_async(ocr):
+    """Pipeline stage: structure the OCR text with Gemini's async client"""
+    logger.debug("Step 2: Categorizing with Gemini...")
+    return normalize_categorized(await categorize_with_gemini_async(ocr))
+
+
+async def artist_email_stage_async(categorize):
+    """Pipeline stage: look up the artist's contact email"""
+    logger.debug("Step 3a: Scraping artist email...")
+    return await scrape_email_from_social_async(categorize.get('artist_name', ''), platform='instagram')
+
+
+async def venue_email_stage_async(categorize):
+    """Pipeline stage: look up the venue's contact email"""
+    logger.debug("Step 3b: Scraping venue email...")
+    return await scrape_email_from_social_async(categorize.get('venue_name', ''), platform='facebook')
+
+
+def _async_stage(stage, func):
+    return Stage(stage.name, func, stage.deps, stage.deadline, stage.critical, stage.default, stage.background)
+
+
+# Same graph, deadlines and fallbacks as app.EXTRACT_PIPELINE. The Sheets
+# write stays a plain function so it runs on the stage pool, which the
+# server drains before a worker exits.
+ASYNC_STAGE_FUNCS = {
+    'ocr': ocr_stage_async,
+    'categorize': categorize_stage_async,
+    'artist_email': artist_email_stage_async,
+    'venue_email': venue_email_stage_async,
+    'sheets': sheets_stage,
+}
+ASYNC_EXTRACT_PIPELINE = Pipeline([
+    _async_stage(stage, ASYNC_STAGE_FUNCS[name])
+    for name, stage in EXTRACT_PIPELINE.stages.items()
+])
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator is still reading the request
+
+    StreamingResponse also waits on receive() for a client disconnect
+    (on servers older than ASGI 2.4), which would steal the request body
+    chunks from a streamed NDJSON upload.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def read_json(request):
+    """Request JSON, or None for an empty or invalid body (like Flask's request.json)"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def extract_poster_data(request):
+    """Main endpoint to extract data from poster"""
+    try:
+        logger.debug("Received request to /api/extract")
+
+        upload = await SpooledUpload.from_async_stream(
+            request.stream(), Config.UPLOAD_FOLDER, Config.MAX_CONTENT_LENGTH
+        )
+        with upload:
+            try:
+                image_path = await run_blocking(upload.decode_data_url, 'image')
+            except ValueError as e:
+                return JSONResponse({'success': False, 'error': f"Invalid image data: {e}"}, status_code=400)
+
+            if not image_path or not image_path.stat().st_size:
+                return JSONResponse({'success': False, 'error': 'No image provided'}, status_code=400)
+
+            result = await ASYNC_EXTRACT_PIPELINE.run_async(image=image_path)
+
+        logger.info('Extraction finished', extra={'timings_ms': result.timings})
+        return JSONResponse(extract_response(result))
+
+    except UploadTooLarge as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return JSONResponse({'success': False, 'error': 'Upload exceeds the maximum size'}, status_code=413)
+    except InvalidGzipBody as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except StageTimeout as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=504)
+    except StageFailed as e:
+        logger.error(f"Error in extract endpoint: {e}")
+        status = 413 if isinstance(e.error, ImageTooLarge) else 500
+        return JSONResponse({'success': False, 'error': str(e.error)}, status_code=status)
+    except Exception as e:
+        logger.exception(f"Error in extract endpoint: {e}")
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def generate_email_batch(request):
+    """Async /api/generate-email/batch, see app.generate_email_batch"""
+    try:
+        if request.headers.get('content-type', '').split(';')[0] == 'application/x-ndjson':
+            template_ids = [t for t in request.query_params.get('template_ids', '').split(',') if t]
+            error = check_template_ids(template_ids)
+            if error:
+                return JSONResponse({'error': error}, status_code=400)
+
+            async def rendered():
+                index = 0
+                async for event_data in aiter_ndjson(request.stream()):
+                    for result in render_event(index, event_data, template_ids, COMPILED_TEMPLATES):
+                        yield json.dumps(result, ensure_ascii=False) + '\n'
+                    index += 1
+
+            return DuplexStreamingResponse(rendered(), media_type='application/x-ndjson')
+
+        data = await read_json(request) or {}
+        template_ids = [t for t in data.get('template_ids') or [] if t]
+        error = check_template_ids(template_ids)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        if 'events' in data:
+            events = data['events']
+            if data.get('dedupe'):
+                events = dedupe_events(events)
+        else:
+            sheet = await run_blocking(init_google_sheets)
+            if not sheet:
+                return JSONResponse({'error': 'Google Sheets unavailable'}, status_code=500)
+            events = iter_sheet_events(sheet, data.get('query'))
+
+        # Sheet paging blocks, and Starlette iterates sync generators on
+        # its thread pool
+        return StreamingResponse(
+            to_ndjson(render_batch(events, template_ids, COMPILED_TEMPLATES)),
+            media_type='application/x-ndjson'
+        )
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def send_email_endpoint(request):
+    """Send the generated email"""
+    try:
+        data = await read_json(request) or {}
+
+        success = await run_blocking(send_email, data.get('to'), data.get('subject'), data.get('body'))
+
+        if success:
+            return JSONResponse({'success': True, 'message': 'Email sent successfully'})
+        else:
+            return JSONResponse({'error': 'Failed to send email'}, status_code=500)
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+def terminated_input(wsgi_app):
+    """
+    Mark a2wsgi's request body as ending by itself
+
+    It ends with the ASGI body, which is what wsgi.input_terminated
+    promises; without it Flask reads a body that has no Content-Length,
+    such as one AsyncGzipRequestMiddleware inflates, as empty.
+    """
+    def wrapper(environ, start_response):
+        environ['wsgi.input_terminated'] = True
+        return wsgi_app(environ, start_response)
+    return wrapper
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Only when served; importing the module (e.g. in tests) stays side-effect free
+    setup_logging()
+    yield
+
+
+middleware = [
+    Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    Middleware(AsyncRequestIdMiddleware),
+    Middleware(AsyncTracingMiddleware),
+    Middleware(AsyncRequestProfiler),
+    Middleware(AsyncGzipRequestMiddleware, max_size=Config.MAX_CONTENT_LENGTH),
+]
+if Config.TRAFFIC_LOG_FILE:
+    # Outermost, so it sees body sizes as sent on the wire
+    middleware.insert(0, Middleware(AsyncTrafficRecorder, traffic_log=TrafficLog(Config.TRAFFIC_LOG_FILE)))
+
+app = Starlette(
+    lifespan=lifespan,
+    routes=[
+        Route('/api/extract', extract_poster_data, methods=['POST']),
+        Route('/api/generate-email/batch', generate_email_batch, methods=['POST']),
+        Route('/api/send-email', send_email_endpoint, methods=['POST']),
+        # Everything else is CPU-light and stays on Flask
+        Mount('/', WSGIMiddleware(terminated_input(flask_backend.app), workers=Config.ASGI_WSGI_THREADS)),
+    ],
+    middleware=middleware
+)
@@ -19,10 +19,66 @@ class Config:
     EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS')
     EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
     
+    # Contact discovery crawler
+    CRAWLER_TIME_BUDGET = float(os.getenv('CRAWLER_TIME_BUDGET', '10'))  # seconds per lookup
+    CRAWLER_REQUEST_TIMEOUT = 5
+    CRAWLER_MAX_PAGES = 8
+    CRAWLER_PER_HOST_LIMIT = 2
+    CRAWLER_POOL_SIZE = 20
+    CRAWLER_USER_AGENT = 'EventPosterExtractor/1.0 (contact discovery)'
+    
+    # Contact lookup cache
+    CONTACT_CACHE_FILE = 'cache/contacts.db'
+    CONTACT_CACHE_TTL = 30 * 24 * 3600  # found emails, seconds
+    CONTACT_CACHE_NEGATIVE_TTL = 24 * 3600  # lookups that found nothing
+    
+    # Extraction pipeline
+    PIPELINE_WORKERS = 16
+    STAGE_DEADLINES = {  # seconds
+        'ocr': 30,
+        'categorize': 45,
+        'artist_email': CRAWLER_TIME_BUDGET + 5,
+        'venue_email': CRAWLER_TIME_BUDGET + 5
+    }
+    
+    # Production server (backend/server.py)
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '6100'))
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(min(2 * (os.cpu_count() or 1) + 1, 9))))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))  # per worker
+    SERVER_TIMEOUT = 120  # seconds before a stuck worker is restarted
+    SERVER_GRACEFUL_TIMEOUT = 90  # seconds to drain in-flight extractions on shutdown
+    SERVER_KEEPALIVE = 5
+    SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')  # 'asgi' runs I/O-bound endpoints on asyncio (asgi.py)
+    OCR_WORKERS = os.cpu_count() or 1  # concurrent OCR runs per worker in asgi mode
+    ASGI_WSGI_THREADS = 16  # threads for the Flask routes mounted in the asgi app
+    
     # Upload
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    UPLOAD_MAX_LONG_EDGE = 2000  # px, advertised to clients via /api/health
+    UPLOAD_PREFERRED_FORMAT = 'png'  # grayscale png, jpeg or webp
+    OCR_MAX_PIXELS = 24_000_000  # largest image decoded for OCR, after JPEG draft scaling
+    OCR_MAX_LONG_EDGE = 4000  # px, JPEGs are decoded at a reduced scale down to this
+    
+    # Logging (utils/log.py)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
+    LOG_CONSOLE_LEVEL = os.getenv('LOG_CONSOLE_LEVEL', 'WARNING')  # also echoed to stderr
+    LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate app.log at this size
+    LOG_BACKUP_COUNT = 5
+    LOG_QUEUE_SIZE = 10000  # records waiting for the writer thread; more are dropped
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.01'))  # requests whose OCR text / model replies are logged
+    
+    # Tracing (utils/tracing.py)
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))  # for requests arriving without a traceparent
+    TRACE_FILE = os.getenv('TRACE_FILE', 'logs/traces.jsonl')  # OTLP/JSON lines
+    
+    # Traffic recording (utils/traffic.py), replayed by benchmarks/replay_traffic.py
+    TRAFFIC_LOG_FILE = os.getenv('TRAFFIC_LOG_FILE')  # unset disables recording
     
-    # Logging
-    LOG_LEVEL = 'INFO'
-    LOG_FILE = 'logs/app.log'
\ No newline at end of file
+    # Debug tools (utils/profiling.py): /api/debug/profile and X-Profile: 1
+    DEBUG_TOKEN = os.getenv('DEBUG_TOKEN')  # sent as X-Debug-Token; unset disables them
+    PROFILE_MAX_SECONDS = 60  # longest stack sampling run
+    PROFILE_INTERVAL = 0.01  # seconds between stack samples
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')  # per-request .pstats files
\ No newline at end of file
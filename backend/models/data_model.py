@@ -2,51 +2,349 @@
 Data models for event poster extraction
 """
 
+import json
+import sys
+import struct
+from array import array
 from dataclasses import dataclass
+from itertools import accumulate
+from operator import attrgetter
 from typing import Optional
 from datetime import datetime
 
-@dataclass
+# Field name and default, in the order of the Google Sheets columns
+EVENT_FIELDS = (
+    ('event_name', "Not specified"),
+    ('artist_name', "Not specified"),
+    ('venue_name', "Not specified"),
+    ('venue_owner', "Not specified"),
+    ('date', "Not specified"),
+    ('time', "Not specified"),
+    ('location', "Not specified"),
+    ('artist_email', ""),
+    ('venue_email', ""),
+)
+FIELDS = tuple(name for name, _ in EVENT_FIELDS)
+_values = attrgetter(*FIELDS)
+
+# Binary codec: values are joined with NUL, which text from posters and
+# forms never contains, so decoding is one UTF-8 decode and one split.
+# Values that do contain NUL are stored with explicit lengths instead.
+_SEPARATOR = '\x00'
+_JOINED, _LENGTH_PREFIXED = 0, 1
+_BATCH_MAGIC = b'EVB1'
+_COUNT = struct.Struct('<I')
+
+
+def _encode_values(values):
+    """
+    Returns:
+        tuple: (layout flag, payload bytes)
+    """
+    values = [str(value) for value in values]
+    joined = _SEPARATOR.join(values)
+    if values and joined.count(_SEPARATOR) == len(values) - 1:
+        return _JOINED, joined.encode()
+    # Character lengths as little-endian uint32, then the values
+    lengths = array('I', map(len, values))
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+    return _LENGTH_PREFIXED, lengths.tobytes() + ''.join(values).encode()
+
+
+def _decode_values(flag, payload, count):
+    """
+    Inverse of _encode_values
+
+    Raises:
+        ValueError: If payload does not hold count values
+    """
+    if flag == _JOINED:
+        values = bytes(payload).decode().split(_SEPARATOR)
+    elif flag == _LENGTH_PREFIXED:
+        lengths = array('I')
+        lengths.frombytes(payload[:4 * count])
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        text = bytes(payload[4 * count:]).decode()
+        ends = list(accumulate(lengths, initial=0))
+        if len(lengths) != count or ends[-1] != len(text):
+            raise ValueError('Value lengths do not match the data')
+        values = [text[start:end] for start, end in zip(ends, ends[1:])]
+    else:
+        raise ValueError(f"Unknown value layout {flag}")
+    if len(values) != count:
+        raise ValueError(f"Expected {count} values, found {len(values)}")
+    return values
+
+
+def _text(value, default):
+    """value as a string for a column: None becomes default, non-strings str()"""
+    if value.__class__ is str:
+        return value
+    return default if value is None else str(value)
+
+
 class EventData:
-    """Model for extracted event data"""
-    event_name: str = "Not specified"
-    artist_name: str = "Not specified"
-    venue_name: str = "Not specified"
-    venue_owner: str = "Not specified"
-    date: str = "Not specified"
-    time: str = "Not specified"
-    location: str = "Not specified"
-    artist_email: str = ""
-    venue_email: str = ""
-    
+    """
+    Model for extracted event data
+
+    Slotted, so an instance is a fixed block of field references with no
+    per-instance __dict__, about 50 bytes less than a dataclass instance;
+    the strings themselves dominate, which EventBatch shares. Written out
+    rather than @dataclass(slots=True), which needs Python 3.10.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, event_name="Not specified", artist_name="Not specified", venue_name="Not specified",
+                 venue_owner="Not specified", date="Not specified", time="Not specified",
+                 location="Not specified", artist_email="", venue_email=""):
+        self.event_name = event_name
+        self.artist_name = artist_name
+        self.venue_name = venue_name
+        self.venue_owner = venue_owner
+        self.date = date
+        self.time = time
+        self.location = location
+        self.artist_email = artist_email
+        self.venue_email = venue_email
+
+    def values(self):
+        """Field values as a tuple, in FIELDS order"""
+        return _values(self)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.values() == other.values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in zip(FIELDS, self.values()))
+        return f"{self.__class__.__name__}({fields})"
+
     def to_dict(self):
         """Convert to dictionary"""
-        return {
-            'event_name': self.event_name,
-            'artist_name': self.artist_name,
-            'venue_name': self.venue_name,
-            'venue_owner': self.venue_owner,
-            'date': self.date,
-            'time': self.time,
-            'location': self.location,
-            'artist_email': self.artist_email,
-            'venue_email': self.venue_email
-        }
-    
+        return dict(zip(FIELDS, self.values()))
+
     @classmethod
     def from_dict(cls, data: dict):
-        """Create from dictionary"""
-        return cls(
-            event_name=data.get('event_name', 'Not specified'),
-            artist_name=data.get('artist_name', 'Not specified'),
-            venue_name=data.get('venue_name', 'Not specified'),
-            venue_owner=data.get('venue_owner', 'Not specified'),
-            date=data.get('date', 'Not specified'),
-            time=data.get('time', 'Not specified'),
-            location=data.get('location', 'Not specified'),
-            artist_email=data.get('artist_email', ''),
-            venue_email=data.get('venue_email', '')
-        )
+        """Create from dictionary; missing fields get their defaults"""
+        get = data.get
+        return cls(*[get(name, default) for name, default in EVENT_FIELDS])
+
+    def to_json(self):
+        """Serialize as a JSON object"""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_bytes(self):
+        """
+        Serialize as a compact binary record
+
+        Returns:
+            bytes: A layout flag followed by the UTF-8 field values
+        """
+        flag, payload = _encode_values(self.values())
+        return bytes((flag,)) + payload
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Read a record written by to_bytes
+
+        Raises:
+            ValueError: If data does not hold one value per field
+        """
+        if not data:
+            raise ValueError('Empty event record')
+        return cls(*_decode_values(data[0], memoryview(data)[1:], len(FIELDS)))
+
+
+class EventBatch:
+    """
+    Columnar container of many events: one list per field
+
+    Bulk operations (dedupe, export, Sheets append_rows, rendering) work on
+    whole columns, and a batch of N events costs N pointers per field
+    instead of N objects. Batches built with from_events/from_dicts/
+    from_rows store each distinct value of a column once, so repeated
+    venues, dates and defaults share a single string.
+    """
+
+    __slots__ = ('columns',)
+
+    def __init__(self, columns=None):
+        """
+        Args:
+            columns (dict): Field name -> list of values, all the same length;
+                missing fields are filled with their defaults
+        """
+        columns = columns or {}
+        size = max((len(values) for values in columns.values()), default=0)
+        self.columns = {}
+        for name, default in EVENT_FIELDS:
+            values = list(columns.get(name, ()))
+            if len(values) not in (0, size):
+                raise ValueError(f"Column {name} has {len(values)} values, expected {size}")
+            self.columns[name] = values or [default] * size
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build from value lists in FIELDS order, e.g. Sheets rows without the timestamp
+
+        Short rows are padded with the defaults of the missing fields.
+        """
+        columns = [[] for _ in FIELDS]
+        memos = [{} for _ in FIELDS]
+        appends = [column.append for column in columns]
+        defaults = [default for _, default in EVENT_FIELDS]
+        width = len(FIELDS)
+        for row in rows:
+            if len(row) < width:
+                row = list(row) + defaults[len(row):]
+            for append, memo, value in zip(appends, memos, row):
+                append(memo.setdefault(value, value) if value.__class__ is str else value)
+        return cls(dict(zip(FIELDS, columns)))
+
+    @classmethod
+    def from_events(cls, events):
+        """Build from EventData objects"""
+        return cls.from_rows(event.values() for event in events)
+
+    @classmethod
+    def from_dicts(cls, dicts):
+        """
+        Build from event data dicts
+
+        Missing and null fields get their defaults and other non-string
+        values are converted with str(), so the JSON and binary codecs
+        round-trip the same batch.
+        """
+        return cls.from_rows([_text(data.get(name), default) for name, default in EVENT_FIELDS] for data in dicts)
+
+    def __len__(self):
+        return len(self.columns['event_name'])
+
+    def __getitem__(self, index):
+        return EventData(*[self.columns[name][index] for name in FIELDS])
+
+    def __iter__(self):
+        return (EventData(*values) for values in self.rows())
+
+    def __eq__(self, other):
+        if not isinstance(other, EventBatch):
+            return NotImplemented
+        return self.columns == other.columns
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"EventBatch({len(self)} events)"
+
+    def append(self, event):
+        """Add an EventData or an event data dict"""
+        if isinstance(event, dict):
+            event = EventData.from_dict(event)
+        for name, value in zip(FIELDS, event.values()):
+            self.columns[name].append(value)
+
+    def rows(self):
+        """Events as tuples in FIELDS order"""
+        return zip(*[self.columns[name] for name in FIELDS])
+
+    def to_dicts(self):
+        """Events as dicts, e.g. for render_service.render_batch"""
+        return (dict(zip(FIELDS, values)) for values in self.rows())
+
+    def sheet_rows(self, timestamp=None):
+        """
+        Rows for Worksheet.append_rows, in the column order of the events sheet
+
+        Args:
+            timestamp (str): First column of every row; default now
+        """
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return [[timestamp, *values] for values in self.rows()]
+
+    def dedupe(self, keys=('event_name', 'venue_name', 'date')):
+        """
+        Drop repeated events, comparing keys case-insensitively
+
+        Returns:
+            EventBatch: The first event of each key, in the original order
+        """
+        seen = set()
+        keep = []
+        for index, key in enumerate(zip(*[self.columns[name] for name in keys])):
+            key = tuple(str(value).strip().lower() for value in key)
+            if key not in seen:
+                seen.add(key)
+                keep.append(index)
+        if len(keep) == len(self):
+            return EventBatch(self.columns)
+        return EventBatch({
+            name: [values[index] for index in keep] for name, values in self.columns.items()
+        })
+
+    def to_json(self):
+        """Serialize as a JSON object of columns"""
+        return json.dumps(self.columns, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text))
+
+    def to_bytes(self):
+        """
+        Serialize as a compact binary batch
+
+        Layout: b'EVB1' and the event count, then per field a layout flag,
+        the payload size and the payload (see _encode_values), all sizes
+        little-endian uint32. Each column decodes with one UTF-8 decode.
+        """
+        parts = [_BATCH_MAGIC, _COUNT.pack(len(self))]
+        for name in FIELDS:
+            flag, payload = _encode_values(self.columns[name])
+            parts += [bytes((flag,)), _COUNT.pack(len(payload)), payload]
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Read a batch written by to_bytes
+
+        Raises:
+            ValueError: If data is not a complete batch
+        """
+        data = memoryview(data)
+        if bytes(data[:4]) != _BATCH_MAGIC:
+            raise ValueError('Not an event batch')
+        columns = {}
+        try:
+            (count,) = _COUNT.unpack_from(data, 4)
+            offset = 4 + _COUNT.size
+            for name in FIELDS:
+                flag = data[offset]
+                (size,) = _COUNT.unpack_from(data, offset + 1)
+                offset += 1 + _COUNT.size
+                payload = data[offset:offset + size]
+                offset += size
+                if len(payload) != size:
+                    raise ValueError(f"Truncated {name} column")
+                columns[name] = _decode_values(flag, payload, count)
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"Truncated event batch: {e}")
+        if offset != len(data):
+            raise ValueError('Trailing data after event batch')
+        return cls(columns)
+
 
 @dataclass
 class EmailTemplate:
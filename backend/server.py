@@ -0,0 +1,155 @@
+"""
+Production server for the backend
+
+Runs the backend under gunicorn with pre-forked worker processes. Each
+worker serves app.py on a pool of threads, or with --asgi serves asgi.py
+on one event loop. The app is imported once in the master before
+forking, so workers start instantly and share its memory pages.
+On SIGTERM workers stop accepting connections, finish in-flight
+extractions (up to SERVER_GRACEFUL_TIMEOUT) and wait for background
+stages such as the Google Sheets write before exiting.
+
+Usage:
+    python server.py [--port 6100] [--workers 4] [--threads 8] [--asgi]
+
+Use `python app.py` for the single-process development server.
+"""
+
+import argparse
+import logging
+
+from config import Config
+from utils.log import setup_logging, shutdown_logging
+from utils.tracing import flush_spans
+
+logger = logging.getLogger(__name__)
+
+# gthread serves the Flask app on a thread pool per worker; in asgi mode
+# each worker runs asgi.app on one event loop and ignores 'threads'
+WORKER_CLASSES = {
+    'wsgi': 'gthread',
+    'asgi': 'uvicorn_worker.UvicornWorker',
+}
+
+
+def server_options(mode='wsgi', **overrides):
+    """
+    gunicorn settings from Config
+
+    Args:
+        mode (str): 'wsgi' or 'asgi'
+        **overrides: Settings replacing the Config values (None is ignored)
+
+    Returns:
+        dict: Options for ProductionServer
+    """
+    options = {
+        'bind': f"{Config.SERVER_HOST}:{Config.SERVER_PORT}",
+        'workers': Config.SERVER_WORKERS,
+        'threads': Config.SERVER_THREADS,
+        'worker_class': WORKER_CLASSES[mode],
+        'timeout': Config.SERVER_TIMEOUT,
+        'graceful_timeout': Config.SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': Config.SERVER_KEEPALIVE,
+        'preload_app': True,
+        'accesslog': '-',
+        'worker_exit': worker_exit
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return options
+
+
+def preload(mode='wsgi'):
+    """
+    Import and warm the app in the master process
+
+    Only fork-safe work belongs here. Thread pools, the contact cache's
+    SQLite connection and the Gemini client are created lazily, so each
+    worker builds its own after the fork.
+
+    Args:
+        mode (str): 'wsgi' for the Flask app, 'asgi' for asgi.app
+    """
+    from PIL import Image
+
+    # Register every image plugin once instead of on each worker's first upload
+    Image.init()
+
+    if mode == 'asgi':
+        from asgi import app
+    else:
+        from app import app
+    return app
+
+
+def worker_exit(server, worker):
+    """gunicorn hook: let background pipeline stages finish before exiting"""
+    from utils.pipeline import shutdown_stage_executor
+
+    shutdown_stage_executor(wait=True)
+    # After the stages, so their last spans and records are written too
+    flush_spans()
+    shutdown_logging()
+
+
+def run_production(mode=None, **overrides):
+    """
+    Start the pre-forking server and block until it shuts down
+
+    Args:
+        mode (str): 'wsgi' or 'asgi', defaults to Config.SERVER_MODE
+        **overrides: gunicorn settings replacing the Config values
+    """
+    mode = mode or Config.SERVER_MODE
+    # Before the fork; each worker restarts the log writer thread
+    setup_logging()
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError(
+            "gunicorn is not installed (it does not run on Windows). "
+            "Install backend/requirements.txt or use `python app.py`."
+        )
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload(mode)
+
+    options = server_options(mode, **overrides)
+    if mode == 'asgi':
+        logger.info(f"Starting {options['workers']} async workers on {options['bind']}")
+    else:
+        logger.info(
+            f"Starting {options['workers']} workers x {options['threads']} threads on {options['bind']}"
+        )
+    ProductionServer(options).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the backend with multiple worker processes')
+    parser.add_argument('--host', default=Config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT)
+    parser.add_argument('--workers', type=int, help=f"Default: {Config.SERVER_WORKERS}")
+    parser.add_argument('--threads', type=int, help=f"Default: {Config.SERVER_THREADS}")
+    parser.add_argument('--asgi', action='store_const', const='asgi', dest='mode',
+                        help='Serve I/O-bound endpoints on asyncio (SERVER_MODE=asgi)')
+    args = parser.parse_args()
+
+    run_production(
+        bind=f"{args.host}:{args.port}",
+        workers=args.workers,
+        threads=args.threads,
+        mode=args.mode
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,35 @@
 """
 Services package
+
+Exports are resolved on first access (PEP 562), so importing one service
+does not import every other service's client library.
 """
 
-from .ocr_service import extract_text_from_image
-from .gpt_service import categorize_with_gpt
-from .sheets_service import init_google_sheets, save_to_google_sheets
-from .scraper_service import scrape_email_from_social
-from .email_service import send_email, send_bulk_emails
-
-__all__ = [
-    'extract_text_from_image',
-    'categorize_with_gpt',
-    'init_google_sheets',
-    'save_to_google_sheets',
-    'scrape_email_from_social',
-    'send_email',
-    'send_bulk_emails'
-]
\ No newline at end of file
+import importlib
+
+_EXPORTS = {
+    'extract_text_from_image': 'ocr_service',
+    'categorize_with_gpt': 'gpt_service',
+    'init_google_sheets': 'sheets_service',
+    'save_to_google_sheets': 'sheets_service',
+    'scrape_email_from_social': 'scraper_service',
+    'send_email': 'email_service',
+    'send_bulk_emails': 'email_service',
+    'compile_templates': 'render_service',
+    'render_batch': 'render_service'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,188 @@
+"""
+Persistent contact lookup cache
+
+Artists and venues recur across many posters, so discovered emails are
+kept in a small SQLite file keyed by normalized name and platform. Misses
+are cached too (with a shorter TTL) unless the crawl ran out of time, and
+concurrent lookups for the same key share a single crawl, from threads or
+from the event loop.
+"""
+
+import os
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class Inconclusive(str):
+    """
+    A lookup result that is returned but not cached
+
+    A crawl cut short by its time budget returns Inconclusive(""): a slow
+    site is no evidence that the name has no address.
+    """
+
+
+class ContactCache:
+    """SQLite-backed TTL cache with negative caching and stampede protection"""
+
+    def __init__(self, path=None, positive_ttl=None, negative_ttl=None):
+        self.path = path or Config.CONTACT_CACHE_FILE
+        self.positive_ttl = positive_ttl if positive_ttl is not None else Config.CONTACT_CACHE_TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else Config.CONTACT_CACHE_NEGATIVE_TTL
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._in_flight_async = {}
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS contacts ('
+                'key TEXT PRIMARY KEY, email TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    @staticmethod
+    def make_key(name, platform):
+        """Cache key from an already-normalized name and platform"""
+        return f"{platform}:{name}"
+
+    def get(self, key):
+        """
+        Look up a cached result
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            tuple: (hit, email). A cached miss is (True, "").
+        """
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        """get() for callers holding the lock"""
+        row = self._db.execute(
+            'SELECT email, expires_at FROM contacts WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return False, None
+        return True, row[0]
+
+    def set(self, key, email):
+        """Store a result; empty emails use the negative TTL, Inconclusive ones aren't stored"""
+        if isinstance(email, Inconclusive):
+            return
+        ttl = self.positive_ttl if email else self.negative_ttl
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO contacts (key, email, expires_at) VALUES (?, ?, ?)',
+                (key, email, time.time() + ttl)
+            )
+
+    def get_or_lookup(self, key, lookup):
+        """
+        Return the cached email or run lookup() once for the key
+
+        Concurrent callers asking for the same key while a lookup is in
+        progress wait for that lookup instead of starting their own.
+
+        Args:
+            key (str): Cache key
+            lookup (callable): Returns the email, or "" if none was found;
+                an Inconclusive result is passed on without being cached
+
+        Returns:
+            str: Email address or ""
+        """
+        hit, email = self.get(key)
+        if hit:
+            return email
+
+        with self._lock:
+            # A lookup may have finished since the check above
+            hit, email = self._get(key)
+            if hit:
+                return email
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = lookup()
+            self.set(key, result)
+            email = str(result)
+            future.set_result(email)
+            return email
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def get_or_lookup_async(self, key, lookup):
+        """
+        Coroutine version of get_or_lookup for the async app
+
+        Args:
+            key (str): Cache key
+            lookup (callable): Coroutine function returning the email or ""
+
+        Returns:
+            str: Email address or ""
+        """
+        hit, email = self.get(key)
+        if hit:
+            return email
+
+        # Only touched from the event loop thread, so no lock is needed, and
+        # nothing awaits between the cache check and registering the task
+        task = self._in_flight_async.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup_async(key, lookup))
+            self._in_flight_async[key] = task
+            task.add_done_callback(lambda _: self._in_flight_async.pop(key, None))
+        # One caller disconnecting must not cancel the crawl for the others
+        return await asyncio.shield(task)
+
+    async def _lookup_async(self, key, lookup):
+        result = await lookup()
+        self.set(key, result)
+        return str(result)
+
+    def purge_expired(self):
+        """Delete expired rows, returns how many were removed"""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'DELETE FROM contacts WHERE expires_at < ?', (time.time(),)
+            )
+        return cursor.rowcount
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_contact_cache():
+    """Get or initialize the shared contact cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContactCache()
+    return _cache
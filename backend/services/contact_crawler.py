@@ -0,0 +1,221 @@
+"""
+Asynchronous contact-discovery crawler
+
+Fetches artist/venue websites and link pages over a pooled aiohttp
+session, honoring robots.txt, capping concurrency per host and stopping
+once the total time budget for a lookup is spent.
+"""
+
+import asyncio
+import codecs
+import logging
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from config import Config
+from utils.tracing import CLIENT, start_span
+from .html_scanner import ContactScanner, is_contact_email
+
+logger = logging.getLogger(__name__)
+
+# Pages worth following from a site's landing page
+CONTACT_KEYWORDS = ('contact', 'about', 'booking', 'impressum', 'info', 'links')
+
+# Link-in-bio services whose outbound links lead to the real website
+LINK_PAGE_HOSTS = ('linktr.ee', 'beacons.ai', 'lnk.bio', 'bio.link')
+
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+
+class ContactCrawler:
+    """Crawl candidate pages for a name and collect contact emails"""
+
+    def __init__(self, time_budget=None, max_pages=None, per_host_limit=None,
+                 pool_size=None, request_timeout=None, user_agent=None):
+        self.time_budget = time_budget or Config.CRAWLER_TIME_BUDGET
+        self.max_pages = max_pages or Config.CRAWLER_MAX_PAGES
+        self.per_host_limit = per_host_limit or Config.CRAWLER_PER_HOST_LIMIT
+        self.pool_size = pool_size or Config.CRAWLER_POOL_SIZE
+        self.request_timeout = request_timeout or Config.CRAWLER_REQUEST_TIMEOUT
+        self.user_agent = user_agent or Config.CRAWLER_USER_AGENT
+        # Whether the last crawl stopped because the time budget ran out
+        self.budget_spent = False
+
+    def find_emails(self, start_urls):
+        """Blocking wrapper around crawl() for synchronous callers"""
+        return asyncio.run(self.crawl(start_urls))
+
+    async def crawl(self, start_urls):
+        """
+        Crawl start URLs and the contact pages they link to
+
+        Args:
+            start_urls (list): Websites, profiles or link pages to try
+
+        Returns:
+            list: Contact emails, most likely first. Whatever was found
+            before the time budget ran out is returned.
+        """
+        # aiohttp is slow to import and only needed once a crawl starts
+        import aiohttp
+
+        self._robots = {}
+        self._seen = set()
+        self._found = []
+        self.budget_spent = False
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        headers = {'User-Agent': self.user_agent}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=headers) as session:
+            try:
+                await asyncio.wait_for(
+                    self._crawl_levels(session, start_urls),
+                    timeout=self.time_budget
+                )
+            except asyncio.TimeoutError:
+                self.budget_spent = True
+                logger.info(f"Crawl budget of {self.time_budget}s spent, "
+                            f"returning {len(self._found)} partial results")
+
+        return self._rank(self._found)
+
+    async def _crawl_levels(self, session, start_urls):
+        """Breadth-first crawl: landing pages first, then what they link to"""
+        level = [url for url in start_urls if url]
+        depth = 0
+
+        while level and depth < 2:
+            level = level[:self.max_pages - len(self._seen)]
+            self._seen.update(level)
+            pages = await asyncio.gather(
+                *(self._fetch(session, url) for url in level)
+            )
+
+            next_level = []
+            for url, page in zip(level, pages):
+                if page is None:
+                    continue
+                emails, links = page
+                self._found.extend(emails)
+                next_level.extend(self._follow_links(url, links))
+
+            # A landing page listing an address is good enough
+            if any(is_contact_email(email) for email in self._found):
+                return
+
+            level = list(dict.fromkeys(
+                link for link in next_level if link not in self._seen
+            ))
+            depth += 1
+
+    def _follow_links(self, page_url, links):
+        """Pick links worth a second request"""
+        page_host = urlparse(page_url).netloc
+        is_link_page = page_host.endswith(LINK_PAGE_HOSTS)
+
+        for link in links:
+            parsed = urlparse(link)
+            if parsed.scheme not in ('http', 'https'):
+                continue
+            if parsed.netloc == page_host:
+                if any(word in parsed.path.lower() for word in CONTACT_KEYWORDS):
+                    yield link
+            elif is_link_page:
+                yield link
+
+    async def _fetch(self, session, url):
+        """
+        Fetch a page if robots.txt allows it and scan it as it streams in
+
+        Returns:
+            tuple: (emails, links), or None on any failure
+        """
+        import aiohttp
+
+        try:
+            if not await self._allowed(session, url):
+                logger.info(f"robots.txt disallows {url}")
+                return None
+
+            with start_span('crawler.fetch', CLIENT, {'url.full': url}) as span:
+                return await self._scan(session, url, span)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Error fetching {url}: {e}")
+            return None
+
+    async def _scan(self, session, url, span):
+        """Stream one page through a ContactScanner"""
+        async with session.get(url) as response:
+            span.set_attribute('http.response.status_code', response.status)
+            content_type = response.headers.get('Content-Type', '')
+            if response.status != 200 or not content_type.startswith('text/'):
+                return None
+
+            encoding = response.charset or 'utf-8'
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = 'utf-8'
+
+            scanner = ContactScanner(str(response.url), encoding=encoding)
+            received = 0
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                scanner.feed(chunk)
+                received += len(chunk)
+                # No need to download the rest once we have an address
+                if scanner.done or received >= MAX_PAGE_BYTES:
+                    break
+            return scanner.close()
+
+    async def _allowed(self, session, url):
+        """Check robots.txt, fetched once per host per crawl"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self._robots:
+            self._robots[origin] = asyncio.ensure_future(
+                self._load_robots(session, origin)
+            )
+        parser = await self._robots[origin]
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, session, origin):
+        """Download and parse robots.txt; a missing file allows everything"""
+        import aiohttp
+
+        try:
+            async with session.get(f"{origin}/robots.txt") as response:
+                if response.status in (401, 403):
+                    parser = RobotFileParser()
+                    parser.disallow_all = True
+                    return parser
+                if response.status != 200:
+                    return None
+                text = await response.text(errors='replace')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Could not load robots.txt for {origin}: {e}")
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        return parser
+
+    def _rank(self, emails):
+        """Deduplicate, drop false positives, prefer the crawled sites' domains"""
+        hosts = {urlparse(url).netloc.lower().split(':')[0] for url in self._seen}
+        unique = list(dict.fromkeys(
+            email.strip().lower() for email in emails if is_contact_email(email.strip())
+        ))
+
+        def on_crawled_domain(email):
+            domain = email.split('@')[1]
+            return any(host == domain or host.endswith('.' + domain) for host in hosts)
+
+        return sorted(unique, key=lambda email: not on_crawled_domain(email))
@@ -1,10 +1,19 @@
-import openai
 import json
 import logging
 from config import Config
 
 logger = logging.getLogger(__name__)
-openai.api_key = Config.OPENAI_API_KEY
+
+_openai = None
+
+def get_openai():
+    """Import and configure the openai module on first use (it is slow to import)"""
+    global _openai
+    if _openai is None:
+        import openai
+        openai.api_key = Config.OPENAI_API_KEY
+        _openai = openai
+    return _openai
 
 def categorize_with_gpt(ocr_text):
     """
@@ -41,7 +50,7 @@ Rules:
 - Do not add information that isn't in the text
 """
         
-        response = openai.ChatCompletion.create(
+        response = get_openai().ChatCompletion.create(
             model="gpt-4",
             messages=[
                 {
@@ -0,0 +1,184 @@
+"""
+Streaming contact extraction from HTML
+
+Scans page bytes incrementally as they arrive instead of building a
+BeautifulSoup tree, using precompiled patterns for mailto: links, plain
+addresses, obfuscated addresses and follow-up links.
+"""
+
+import codecs
+import html
+import re
+import string
+from urllib.parse import unquote, urljoin
+
+from utils.helpers import EMAIL_PATTERN, validate_email
+
+# Matches like "logo@2x.png" are asset names, not addresses
+ASSET_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+PLACEHOLDER_DOMAINS = ('example.com', 'domain.com', 'email.com')
+
+# Every pattern below starts with a literal so the regex engine can skip
+# ahead quickly; they run on an ASCII-lowercased copy of the page
+MAILTO_PATTERN = re.compile(r'mailto:([^"\'?\s>]+)')
+HREF_PATTERN = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\']+)["\']')
+AT_SIGN = re.compile(r'@')
+LOCAL_PART_TAIL = re.compile(r'[a-z0-9._%+-]{1,64}$')
+
+# "name [at] domain [dot] com", "name(at)domain(dot)com", "name&#64;domain.com"
+OBFUSCATED_MARKER = re.compile(r'at\s*[\]\)\}]|&#(?:0*64|x0*40);')
+_AT = r'\s*(?:[\[\(\{]\s*at\s*[\]\)\}]|&#0*64;|&#x0*40;)\s*'
+_DOT = r'\s*(?:\.|[\[\(\{]\s*dot\s*[\]\)\}]|&#0*46;)\s*'
+OBFUSCATED_PATTERN = re.compile(
+    rf'([a-z0-9._%+-]+){_AT}([a-z0-9-]+(?:{_DOT}[a-z0-9-]+)*{_DOT}[a-z]{{2,}})\b'
+)
+_DOT_SEPARATOR = re.compile(_DOT)
+OBFUSCATED_REACH = 80
+
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Longest match we expect to straddle two chunks
+OVERLAP = 512
+
+
+def is_contact_email(email):
+    """Filter out false positives from the email regex"""
+    email = email.lower()
+    if email.endswith(ASSET_SUFFIXES):
+        return False
+    if '@' not in email or email.split('@')[1] in PLACEHOLDER_DOMAINS:
+        return False
+    return validate_email(email)
+
+
+class ContactScanner:
+    """
+    Incremental scanner for one HTML page
+
+    Feed raw bytes with feed() as they arrive and call close() at the end.
+    Once a usable address is found, done becomes True and the caller can
+    stop reading the response.
+    """
+
+    def __init__(self, base_url, encoding='utf-8', collect_links=True):
+        self.base_url = base_url
+        self.collect_links = collect_links
+        self.emails = []
+        self.links = []
+        self.done = False
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._buffer = ''
+        self._seen = set()
+        self._seen_links = set()
+        self._hrefs = []
+
+    def feed(self, chunk):
+        """Scan the next chunk of page bytes"""
+        if not self.done:
+            self._buffer += self._decoder.decode(chunk)
+            self._scan(final=False)
+
+    def close(self):
+        """Scan whatever is left in the buffer"""
+        if not self.done:
+            self._buffer += self._decoder.decode(b'', final=True)
+            self._scan(final=True)
+        # Resolving is comparatively slow, and links are only followed
+        # when the page itself had no usable address
+        if not self.done:
+            self.links = [urljoin(self.base_url, href) for href in self._hrefs]
+        return self.emails, self.links
+
+    def _scan(self, final):
+        text = self._buffer
+        cut = len(text) if final else len(text) - OVERLAP
+        if cut <= 0:
+            return
+
+        # Matches past the cut may still be growing; they are kept in the
+        # buffer and rescanned once more bytes arrive
+        lowered = text.translate(ASCII_LOWER)
+        resume = min(
+            self._scan_mailto(lowered, cut),
+            self._scan_plain(lowered, cut),
+            self._scan_obfuscated(lowered, cut),
+            self._scan_links(text, lowered, cut) if self.collect_links else cut
+        )
+
+        self._buffer = text[resume:]
+
+    def _scan_mailto(self, lowered, cut):
+        for match in MAILTO_PATTERN.finditer(lowered):
+            if match.end() > cut:
+                return match.start()
+            self._add_email(unquote(html.unescape(match.group(1))))
+        return cut
+
+    def _scan_plain(self, lowered, cut):
+        resume = cut
+        for at in AT_SIGN.finditer(lowered):
+            position = at.start()
+            local = LOCAL_PART_TAIL.search(lowered, max(0, position - 64), position)
+            if not local:
+                continue
+            match = EMAIL_PATTERN.match(lowered, local.start())
+            if position >= cut or (match and match.end() > cut):
+                return min(resume, local.start())
+            if match:
+                self._add_email(match.group(0))
+        return resume
+
+    def _scan_obfuscated(self, lowered, cut):
+        for marker in OBFUSCATED_MARKER.finditer(lowered):
+            start = max(0, marker.start() - OBFUSCATED_REACH)
+            if marker.start() >= cut:
+                return start
+            for match in OBFUSCATED_PATTERN.finditer(lowered, start, marker.end() + OBFUSCATED_REACH):
+                if match.end() > cut:
+                    return start
+                domain = _DOT_SEPARATOR.sub('.', match.group(2))
+                self._add_email(f"{match.group(1)}@{domain}")
+        return cut
+
+    def _scan_links(self, text, lowered, cut):
+        for match in HREF_PATTERN.finditer(lowered):
+            if match.end() > cut:
+                return match.start()
+            # URLs are case-sensitive, so take the href from the original text
+            self._on_href(text[match.start(1):match.end(1)])
+        return cut
+
+    def _add_email(self, email):
+        email = email.strip().lower()
+        if email not in self._seen:
+            self._seen.add(email)
+            self.emails.append(email)
+            if is_contact_email(email):
+                self.done = True
+
+    def _on_href(self, href):
+        href = html.unescape(href).strip()
+        if href.lower().startswith(('#', 'javascript:', 'tel:', 'mailto:')):
+            return
+        if href not in self._seen_links:
+            self._seen_links.add(href)
+            self._hrefs.append(href)
+
+
+def scan_html(page, base_url, collect_links=True):
+    """
+    Extract contacts from a complete page in one call
+
+    Args:
+        page (bytes or str): Page source
+        base_url (str): URL the page was fetched from
+        collect_links (bool): Also return <a href> links
+
+    Returns:
+        tuple: (list of emails, list of absolute link URLs)
+    """
+    if isinstance(page, str):
+        page = page.encode('utf-8')
+    scanner = ContactScanner(base_url, collect_links=collect_links)
+    scanner.feed(page)
+    return scanner.close()
@@ -1,9 +1,9 @@
-import pytesseract
-from PIL import Image
-import io
 import base64
 import logging
 
+from config import Config
+from utils.image_decode import load_for_ocr
+
 logger = logging.getLogger(__name__)
 
 def extract_text_from_image(image_data):
@@ -17,17 +17,16 @@ def extract_text_from_image(image_data):
         str: Extracted text or None if failed
     """
     try:
+        # Imported on first use to keep cold starts fast
+        import pytesseract
+        
         # Remove data URL prefix if present
         if 'base64,' in image_data:
             image_data = image_data.split('base64,')[1]
         
-        # Decode base64 image
+        # Decode base64 image, at reduced scale for large JPEGs
         image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        image = load_for_ocr(image_bytes, Config.OCR_MAX_PIXELS, Config.OCR_MAX_LONG_EDGE)
         
         # Perform OCR with custom config for better accuracy
         custom_config = r'--oem 3 --psm 6'
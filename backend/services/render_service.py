@@ -0,0 +1,303 @@
+"""
+Bulk mail-merge rendering
+
+Renders every (event, template) combination in a single pass and yields
+one result at a time, so callers can stream the output without holding
+the whole campaign in memory.
+"""
+
+import json
+import logging
+from string import Formatter
+
+from utils.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Longest NDJSON line of a streamed batch; an event is a few hundred bytes
+MAX_LINE_BYTES = 1024 * 1024
+
+# Columns of the "Event Poster Data" sheet, in order (see sheets_service)
+SHEET_FIELDS = [
+    'timestamp',
+    'event_name',
+    'artist_name',
+    'venue_name',
+    'venue_owner',
+    'date',
+    'time',
+    'location',
+    'artist_email',
+    'venue_email'
+]
+
+
+class CompiledTemplate:
+    """A str.format template parsed once into literal and field parts"""
+
+    def __init__(self, text):
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if literal:
+                self.parts.append((True, literal))
+            if field is not None:
+                if spec or conversion or not field.isidentifier():
+                    # Anything beyond a plain {name} falls back to str.format
+                    self.parts = None
+                    break
+                self.parts.append((False, field))
+        self.text = text
+
+    def render(self, data):
+        """
+        Render the template with event data
+
+        Args:
+            data (dict): Event data
+
+        Returns:
+            str: Rendered text
+
+        Raises:
+            KeyError: If a placeholder is missing from data
+        """
+        if self.parts is None:
+            return self.text.format(**data)
+        return ''.join(
+            value if is_literal else str(data[value])
+            for is_literal, value in self.parts
+        )
+
+
+def compile_templates(templates):
+    """
+    Pre-parse subject and body of every template
+
+    Args:
+        templates (dict): Template id -> {'subject': str, 'body': str}
+
+    Returns:
+        dict: Template id -> (CompiledTemplate, CompiledTemplate)
+    """
+    return {
+        template_id: (
+            CompiledTemplate(template['subject']),
+            CompiledTemplate(template['body'])
+        )
+        for template_id, template in templates.items()
+    }
+
+
+class InvalidEvent:
+    """Stands in for an NDJSON line that could not be parsed, so the batch goes on"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def get_recipient(template_id, event_data):
+    """Pick the artist or venue address depending on the template"""
+    if 'artist' in template_id:
+        return event_data.get('artist_email')
+    return event_data.get('venue_email')
+
+
+def render_batch(events, template_ids, compiled):
+    """
+    Render every event against every template id
+
+    Args:
+        events (iterable): Event data dicts, consumed lazily
+        template_ids (list): Template ids to render for each event
+        compiled (dict): Output of compile_templates
+
+    Yields:
+        dict: One rendered email, or an error entry for that combination;
+        an event that isn't a JSON object gets one error entry without a
+        template_id
+    """
+    for index, event_data in enumerate(events):
+        yield from render_event(index, event_data, template_ids, compiled)
+
+
+def render_event(index, event_data, template_ids, compiled):
+    """
+    Render one event of a batch against every template id
+
+    Args:
+        index (int): Position of the event in the batch
+        event_data (dict): Event data
+        template_ids (list): Template ids to render
+        compiled (dict): Output of compile_templates
+
+    Yields:
+        dict: Same entries as render_batch
+    """
+    if not isinstance(event_data, dict):
+        # The response is already streaming, so report it in line
+        if isinstance(event_data, InvalidEvent):
+            error = event_data.error
+        else:
+            error = f"Event must be a JSON object, not {type(event_data).__name__}"
+        yield {'event_index': index, 'error': error}
+        return
+
+    # Rendered before yielding, so the timing excludes the consumer
+    with stage_timer('render') as timer:
+        results = []
+        for template_id in template_ids:
+            subject_tpl, body_tpl = compiled[template_id]
+            try:
+                results.append({
+                    'event_index': index,
+                    'template_id': template_id,
+                    'email': {
+                        'to': get_recipient(template_id, event_data),
+                        'subject': subject_tpl.render(event_data),
+                        'body': body_tpl.render(event_data)
+                    }
+                })
+            except KeyError as e:
+                timer.failed = True
+                results.append({
+                    'event_index': index,
+                    'template_id': template_id,
+                    'error': f"Missing field: {e.args[0]}"
+                })
+    yield from results
+
+
+def render_all(event_data, compiled):
+    """
+    Render one event against every template
+
+    Templates whose placeholders are missing from event_data are skipped.
+
+    Args:
+        event_data (dict): Event data
+        compiled (dict): Output of compile_templates
+
+    Returns:
+        dict: Template id -> {'to', 'subject', 'body'}
+    """
+    emails = {}
+    for result in render_batch([event_data], list(compiled), compiled):
+        if 'email' in result:
+            emails[result['template_id']] = result['email']
+    return emails
+
+
+def to_ndjson(results):
+    """Serialize rendered results as newline-delimited JSON"""
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + '\n'
+
+
+def iter_ndjson(lines, max_line=None):
+    """
+    Parse newline-delimited JSON events from a byte or text stream
+
+    Args:
+        lines (iterable): Lines of a request body
+        max_line (int): Longer lines are reported instead of parsed
+
+    Yields:
+        One parsed value per non-empty line, normally an event dict, or an
+        InvalidEvent for a line that isn't valid UTF-8 JSON or is too long
+    """
+    for line in lines:
+        if max_line and len(line) > max_line:
+            yield InvalidEvent(f"Line longer than {max_line} bytes")
+            continue
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        except ValueError as e:
+            yield InvalidEvent(f"Invalid JSON: {e}")
+
+
+async def aiter_ndjson(chunks, max_line=MAX_LINE_BYTES):
+    """
+    Async iter_ndjson over the raw byte chunks of a streamed request body
+
+    Only each new chunk is split; pieces of an unfinished line are joined
+    once its newline arrives, so a line spread over many chunks costs
+    linear time. A line growing past max_line is reported as soon as it
+    does and the rest of it skipped, so its pieces are never all held.
+
+    Args:
+        chunks (async iterable): Body chunks, split anywhere
+        max_line (int): Longest line in bytes
+
+    Yields:
+        Same values as iter_ndjson
+    """
+    pending, size = [], 0
+    skipping = False  # inside a line already reported as too long
+    async for chunk in chunks:
+        *lines, tail = chunk.split(b'\n')
+        if lines:
+            if skipping:
+                lines, skipping = lines[1:], False
+            elif pending:
+                pending.append(lines[0])
+                lines[0] = b''.join(pending)
+                pending, size = [], 0
+            for event in iter_ndjson(lines, max_line):
+                yield event
+        if tail and not skipping:
+            pending.append(tail)
+            size += len(tail)
+            if size > max_line:
+                pending, size, skipping = [], 0, True
+                yield InvalidEvent(f"Line longer than {max_line} bytes")
+    for event in iter_ndjson([b''.join(pending)], max_line):
+        yield event
+
+
+def matches_query(event_data, query):
+    """Case-insensitive equality match of every query field"""
+    for field, expected in query.items():
+        actual = str(event_data.get(field, ''))
+        if actual.lower() != str(expected).lower():
+            return False
+    return True
+
+
+def iter_sheet_events(sheet, query=None, chunk_size=500):
+    """
+    Page through stored events in Google Sheets
+
+    Rows are fetched chunk_size at a time so memory stays flat no matter
+    how many events the sheet holds.
+
+    Args:
+        sheet (gspread.Worksheet): The worksheet object
+        query (dict): Optional field -> value filter
+        chunk_size (int): Rows fetched per request
+
+    Yields:
+        dict: Stored event data
+    """
+    query = query or {}
+    last_column = chr(ord('A') + len(SHEET_FIELDS) - 1)
+    start = 2  # Row 1 holds the headers
+
+    while True:
+        end = start + chunk_size - 1
+        rows = sheet.get_values(f"A{start}:{last_column}{end}")
+        if not rows:
+            return
+
+        for row in rows:
+            row = row + [''] * (len(SHEET_FIELDS) - len(row))
+            event_data = dict(zip(SHEET_FIELDS, row))
+            if matches_query(event_data, query):
+                yield event_data
+
+        if len(rows) < chunk_size:
+            return
+        start = end + 1
@@ -1,65 +1,178 @@
-import requests
-from bs4 import BeautifulSoup
 import re
 import logging
+import unicodedata
+from .contact_crawler import ContactCrawler
+from .contact_cache import ContactCache, Inconclusive, get_contact_cache
+from utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+NOT_SPECIFIED = 'not specified'
+
+def clean_name(name):
+    """
+    Normalize an artist/venue name into a handle-like slug
+
+    Args:
+        name (str): Name as extracted from the poster
+
+    Returns:
+        str: Lowercase ASCII alphanumeric slug without a leading "the";
+        accents are dropped ("Café" -> "cafe"), other scripts removed
+    """
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    name = name.strip().lower()
+    name = re.sub(r'^the\s+', '', name)
+    return re.sub(r'[^a-z0-9]', '', name)
+
+def candidate_urls(name, platform):
+    """
+    Build the pages most likely to list a contact address
+
+    Args:
+        name (str): Artist or venue name, or a website URL
+        platform (str): 'instagram' or 'facebook'
+
+    Returns:
+        list: URLs to crawl, in priority order
+    """
+    name = name.strip()
+    if re.match(r'^(https?://)?[\w-]+(\.[\w-]+)+(/\S*)?$', name):
+        # The poster already gave us a website
+        return [name if name.startswith('http') else f"https://{name}"]
+
+    slug = clean_name(name)
+    if not slug:
+        return []
+
+    if platform == 'instagram':
+        return [
+            f"https://www.instagram.com/{slug}/",
+            f"https://linktr.ee/{slug}",
+            f"https://www.{slug}.com/"
+        ]
+    elif platform == 'facebook':
+        return [
+            f"https://www.facebook.com/{slug}/",
+            f"https://www.{slug}.com/"
+        ]
+    return [f"https://www.{slug}.com/"]
+
+@timed('scrape')
 def scrape_email_from_social(name, platform='instagram'):
     """
-    Scrape email from social media profiles
-    
+    Discover a contact email for an artist or venue
+
+    Results (including misses) are cached per normalized name and
+    platform, so recurring artists and venues are only crawled once.
+
     Args:
         name (str): Name to search for
         platform (str): 'instagram' or 'facebook'
-        
+
     Returns:
-        str: Found email or generated placeholder
-        
-    Note: This is a simplified implementation.
-    For production, use official APIs:
-    - Instagram Graph API
-    - Facebook Graph API
+        str: Found email, or an empty string if none was found
     """
     try:
-        # Clean the name for searching
-        clean_name = name.lower().replace(' ', '').replace('the', '')
-        
-        # TODO: Implement actual scraping logic here
-        # For now, return a placeholder
-        
-        if platform == 'instagram':
-            # Placeholder logic
-            return f"contact@{clean_name}.com"
-        elif platform == 'facebook':
-            return f"info@{clean_name}.com"
-        else:
-            return "email@example.com"
-            
+        if not name or name.strip().lower() == NOT_SPECIFIED:
+            return ""
+
+        slug = clean_name(name)
+        if not slug:
+            # Nothing to search for, and every such name would share one key
+            return ""
+
+        key = ContactCache.make_key(slug, platform)
+        return get_contact_cache().get_or_lookup(
+            key,
+            lambda: discover_email(name, platform)
+        )
+
     except Exception as e:
         logger.error(f"Error scraping email from {platform}: {e}")
-        return "email@example.com"
+        return ""
+
+@timed('scrape')
+async def scrape_email_from_social_async(name, platform='instagram'):
+    """
+    Coroutine version of scrape_email_from_social for the async app
+
+    Args:
+        name (str): Name to search for
+        platform (str): 'instagram' or 'facebook'
+
+    Returns:
+        str: Found email, or an empty string if none was found
+    """
+    try:
+        if not name or name.strip().lower() == NOT_SPECIFIED:
+            return ""
+
+        slug = clean_name(name)
+        if not slug:
+            # Nothing to search for, and every such name would share one key
+            return ""
+
+        key = ContactCache.make_key(slug, platform)
+        return await get_contact_cache().get_or_lookup_async(
+            key,
+            lambda: discover_email_async(name, platform)
+        )
+
+    except Exception as e:
+        logger.error(f"Error scraping email from {platform}: {e}")
+        return ""
+
+def discover_email(name, platform):
+    """
+    Crawl the social profile, link-in-bio page and website for a name
+
+    Args:
+        name (str): Artist or venue name
+        platform (str): 'instagram' or 'facebook'
+
+    Returns:
+        str: Best email found, or an empty string (Inconclusive if the
+        crawl ran out of time)
+    """
+    crawler = ContactCrawler()
+    emails = crawler.find_emails(candidate_urls(name, platform))
+    return _best_email(crawler, emails, name, platform)
+
+async def discover_email_async(name, platform):
+    """Coroutine version of discover_email"""
+    crawler = ContactCrawler()
+    emails = await crawler.crawl(candidate_urls(name, platform))
+    return _best_email(crawler, emails, name, platform)
+
+def _best_email(crawler, emails, name, platform):
+    """First ranked email, or "" (Inconclusive if the crawl ran out of time)"""
+    if emails:
+        logger.info(f"Found {len(emails)} email(s) for {name} via {platform}")
+        return emails[0]
+
+    if crawler.budget_spent:
+        logger.info(f"No email found for {name} via {platform} before the crawl budget ran out")
+        return Inconclusive("")
+    logger.info(f"No email found for {name} via {platform}")
+    return ""
 
 def search_instagram_email(username):
     """
     Search for email on Instagram profile
-    
+
     Args:
         username (str): Instagram username
-        
+
     Returns:
         str: Email if found, None otherwise
     """
     try:
-        # This requires Instagram API access or web scraping
-        # Placeholder implementation
+        # Profiles render mostly client-side; the bio link is what we can see
         url = f"https://www.instagram.com/{username}/"
-        
-        # Note: Instagram requires authentication for scraping
-        # Use instaloader or instagram-private-api libraries
-        
-        return None
-        
+        emails = ContactCrawler().find_emails([url])
+        return emails[0] if emails else None
+
     except Exception as e:
         logger.error(f"Error searching Instagram: {e}")
         return None
@@ -67,23 +180,18 @@ def search_instagram_email(username):
 def search_facebook_email(page_name):
     """
     Search for email on Facebook page
-    
+
     Args:
         page_name (str): Facebook page name
-        
+
     Returns:
         str: Email if found, None otherwise
     """
     try:
-        # This requires Facebook Graph API access
-        # Placeholder implementation
-        
-        # Use facebook-sdk library with access token
-        # graph = facebook.GraphAPI(access_token)
-        # page = graph.get_object(page_id, fields='emails')
-        
-        return None
-        
+        url = f"https://www.facebook.com/{page_name}/about/"
+        emails = ContactCrawler().find_emails([url])
+        return emails[0] if emails else None
+
     except Exception as e:
         logger.error(f"Error searching Facebook: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -1,5 +1,3 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 import logging
 from config import Config
@@ -14,6 +12,10 @@ def init_google_sheets():
         gspread.Worksheet: The worksheet object or None if failed
     """
     try:
+        # Imported on first use to keep cold starts fast
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        
         scope = [
             'https://spreadsheets.google.com/feeds',
             'https://www.googleapis.com/auth/drive'
@@ -0,0 +1,287 @@
+"""
+Date and time normalization engine
+
+Parses the many ways posters and the LLM write dates ("2024-07-15",
+"15/07/2024", "July 15, 2024", "Sat 12th Oct") and times ("7pm", "19:00",
+"7.30 p.m.") with precompiled patterns instead of trying strptime formats
+one exception at a time. The format that wins for a source is remembered,
+so a batch from one source is usually matched on the first try.
+"""
+
+import re
+import calendar
+import threading
+from datetime import date
+
+DATE_FORMAT = '{:04d}-{:02d}-{:02d}'
+
+MONTHS = {}
+for _number in range(1, 13):
+    MONTHS[calendar.month_name[_number].lower()] = _number
+    MONTHS[calendar.month_abbr[_number].lower()] = _number
+MONTHS['sept'] = 9
+
+WEEKDAYS = {}
+for _number in range(7):
+    WEEKDAYS[calendar.day_name[_number].lower()] = _number
+    WEEKDAYS[calendar.day_abbr[_number].lower()] = _number
+WEEKDAYS.update({'tues': 1, 'wednes': 2, 'thur': 3, 'thurs': 3})
+
+_WEEKDAY = r'(?:(?P<weekday>[a-z]{3,9})\.?,?\s+)?'
+_MONTH = r'(?P<month>[a-z]{3,9})\.?'
+_DAY = r'(?P<day>\d{1,2})(?:st|nd|rd|th)?'
+_SEP = r'(?P<sep>[-/.])'
+
+# Order matters when several formats match: day-first before month-first,
+# as in the original helpers.format_date
+DATE_PATTERNS = [
+    ('ymd', re.compile(rf'(?P<year>\d{{4}}){_SEP}(?P<month>\d{{1,2}})(?P=sep)(?P<day>\d{{1,2}})')),
+    ('dmy', re.compile(rf'(?P<day>\d{{1,2}}){_SEP}(?P<month>\d{{1,2}})(?P=sep)(?P<year>\d{{4}})')),
+    ('mdy', re.compile(rf'(?P<month>\d{{1,2}}){_SEP}(?P<day>\d{{1,2}})(?P=sep)(?P<year>\d{{4}})')),
+    ('month_day_year', re.compile(rf'{_WEEKDAY}{_MONTH}\s+{_DAY}(?:,\s*|\s+)(?P<year>\d{{4}})')),
+    ('day_month_year', re.compile(rf'{_WEEKDAY}{_DAY}\s+(?:of\s+)?{_MONTH}(?:,\s*|\s+)(?P<year>\d{{4}})')),
+    ('day_month', re.compile(rf'{_WEEKDAY}{_DAY}\s+(?:of\s+)?{_MONTH}')),
+    ('month_day', re.compile(rf'{_WEEKDAY}{_MONTH}\s+{_DAY}')),
+]
+
+TIME_PATTERNS = [
+    ('12h', re.compile(r'(?P<hour>\d{1,2})(?:[:.](?P<minute>\d{2}))?\s*(?P<meridiem>[ap])\.?\s*m\.?')),
+    ('24h', re.compile(r'(?P<hour>\d{1,2})(?:[:.h](?P<minute>\d{2}))\s*(?:hrs?|h)?')),
+    ('hours', re.compile(r'(?P<hour>\d{1,2})\s*(?:hrs|h)')),
+    ('named', re.compile(r'(?P<name>noon|midday|midnight)')),
+]
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Distinct strings remembered per engine; event histories repeat a lot
+MEMO_SIZE = 100000
+
+
+def _days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def _build_date(match, reference):
+    """Turn a date match into YYYY-MM-DD, or None if it isn't a real date"""
+    groups = match.groupdict()
+    month = groups['month']
+    if not month.isdigit():
+        month = MONTHS.get(month)
+        if month is None:
+            return None
+    else:
+        month = int(month)
+    day = int(groups['day'])
+
+    if not 1 <= month <= 12 or day < 1:
+        return None
+
+    weekday = groups.get('weekday')
+    if weekday is not None:
+        weekday = WEEKDAYS.get(weekday)
+        if weekday is None:
+            return None
+
+    if groups.get('year'):
+        year = int(groups['year'])
+        if day > _days_in_month(year, month):
+            return None
+        return DATE_FORMAT.format(year, month, day)
+
+    year = _infer_year(month, day, weekday, reference)
+    if year is None:
+        return None
+    return DATE_FORMAT.format(year, month, day)
+
+
+def _infer_year(month, day, weekday, reference):
+    """
+    Pick a year for dates like "Sat 12th Oct"
+
+    Prefers a year whose calendar matches the weekday, otherwise the next
+    upcoming occurrence (posters advertise future events; dates up to six
+    months back are kept in the current year).
+    """
+    candidates = [reference.year, reference.year + 1, reference.year - 1]
+    valid = [year for year in candidates if day <= _days_in_month(year, month)]
+    if not valid:
+        return None
+
+    if weekday is not None:
+        for year in valid:
+            if calendar.weekday(year, month, day) == weekday:
+                return year
+
+    if reference.year in valid:
+        days_ago = (reference - date(reference.year, month, day)).days
+        if days_ago <= 183:
+            return reference.year
+    return reference.year + 1 if reference.year + 1 in valid else valid[0]
+
+
+def _build_time(match, reference=None):
+    """Turn a time match into "7:00 PM" style, or None if out of range"""
+    groups = match.groupdict()
+    name = groups.get('name')
+    if name:
+        return '12:00 AM' if name == 'midnight' else '12:00 PM'
+
+    hour = int(groups['hour'])
+    minute = int(groups.get('minute') or 0)
+    if minute > 59:
+        return None
+
+    meridiem = groups.get('meridiem')
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        suffix = 'AM' if meridiem == 'a' else 'PM'
+    else:
+        if hour > 24 or (hour == 24 and minute):
+            return None
+        hour %= 24
+        suffix = 'AM' if hour < 12 else 'PM'
+        hour = hour % 12 or 12
+
+    return f"{hour}:{minute:02d} {suffix}"
+
+
+class Normalizer:
+    """
+    Matches values against an ordered list of named patterns
+
+    The pattern that won for a source is tried first next time, and
+    results for already-seen strings are memoized.
+    """
+
+    def __init__(self, patterns, build):
+        self.patterns = patterns
+        self.build = build
+        self._winning = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, value, source=None, reference=None):
+        """
+        Normalize one value
+
+        Args:
+            value (str): Raw date/time text
+            source (str): Optional origin (sheet, poster batch, ...) whose
+                winning format should be reused
+            reference (date): "Today" for year inference
+
+        Returns:
+            str: Normalized value, or the original string if unrecognized
+        """
+        result, winner = self._normalize(
+            value, self._winning.get(source), reference or date.today()
+        )
+        if source is not None and winner is not None:
+            self._winning[source] = winner
+        return result
+
+    def normalize_many(self, values, source=None, reference=None):
+        """
+        Normalize a batch of values from one source
+
+        The format is inferred once from a sample of the batch (or taken
+        from the source's previous winner) and tried first for every item;
+        items in another format still fall back to a full search.
+
+        Args:
+            values (list): Raw strings
+            source (str): Optional origin shared by all values
+            reference (date): "Today" for year inference
+
+        Returns:
+            list: Normalized values, same length and order
+        """
+        reference = reference or date.today()
+        preferred = self._winning.get(source)
+        if preferred is None:
+            preferred = self.infer_format(values[:50], reference)
+
+        normalize = self._normalize
+        results = [normalize(value, preferred, reference)[0] for value in values]
+
+        if source is not None and preferred is not None:
+            self._winning[source] = preferred
+        return results
+
+    def infer_format(self, sample, reference=None):
+        """
+        Find the pattern that parses most of a sample
+
+        Returns:
+            int: Index into patterns, or None if nothing matched
+        """
+        reference = reference or date.today()
+        scores = [0] * len(self.patterns)
+        for value in sample:
+            if not isinstance(value, str):
+                continue
+            text = _WHITESPACE.sub(' ', value.strip().lower())
+            for index, (_, pattern) in enumerate(self.patterns):
+                match = pattern.fullmatch(text)
+                if match is not None and self.build(match, reference) is not None:
+                    scores[index] += 1
+
+        best = max(range(len(scores)), key=lambda index: (scores[index], -index))
+        return best if scores[best] else None
+
+    def _normalize(self, value, preferred, reference):
+        """Returns (result, index of the winning pattern or None)"""
+        if not isinstance(value, str):
+            return value, None
+
+        key = (value, preferred, reference)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        text = _WHITESPACE.sub(' ', value.strip().lower())
+        outcome = (value, None)
+
+        order = range(len(self.patterns))
+        if preferred is not None:
+            order = [preferred, *order]
+
+        for index in order:
+            match = self.patterns[index][1].fullmatch(text)
+            if match is None:
+                continue
+            result = self.build(match, reference)
+            if result is not None:
+                outcome = (result, index)
+                break
+
+        with self._lock:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = outcome
+        return outcome
+
+
+_dates = Normalizer(DATE_PATTERNS, _build_date)
+_times = Normalizer(TIME_PATTERNS, _build_time)
+
+
+def normalize_date(value, source=None, reference=None):
+    """Normalize one date to YYYY-MM-DD, returning unrecognized input as is"""
+    return _dates.normalize(value, source, reference)
+
+
+def normalize_time(value, source=None):
+    """Normalize one time to "7:00 PM" style, returning unrecognized input as is"""
+    return _times.normalize(value, source)
+
+
+def normalize_dates(values, source=None, reference=None):
+    """Vectorized normalize_date for a list of strings"""
+    return _dates.normalize_many(values, source, reference)
+
+
+def normalize_times(values, source=None):
+    """Vectorized normalize_time for a list of strings"""
+    return _times.normalize_many(values, source)
@@ -5,9 +5,12 @@ Helper utility functions
 import re
 from datetime import datetime
 import logging
+from .datetime_normalizer import normalize_date, normalize_time
 
 logger = logging.getLogger(__name__)
 
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
 def clean_text(text):
     """
     Clean and normalize text
@@ -52,26 +55,19 @@ def format_date(date_string):
     Returns:
         str: Date in YYYY-MM-DD format or original string
     """
-    date_formats = [
-        '%Y-%m-%d',
-        '%d-%m-%Y',
-        '%m-%d-%Y',
-        '%d/%m/%Y',
-        '%m/%d/%Y',
-        '%B %d, %Y',
-        '%b %d, %Y',
-        '%d %B %Y',
-        '%d %b %Y'
-    ]
-    
-    for fmt in date_formats:
-        try:
-            date_obj = datetime.strptime(date_string.strip(), fmt)
-            return date_obj.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
+    return normalize_date(date_string)
+
+def format_time(time_string):
+    """
+    Convert various time formats ("7pm", "19:00") to "7:00 PM"
     
-    return date_string
+    Args:
+        time_string (str): Time in any format
+        
+    Returns:
+        str: Time in "H:MM AM/PM" format or original string
+    """
+    return normalize_time(time_string)
 
 def extract_emails_from_text(text):
     """
@@ -83,30 +79,44 @@ def extract_emails_from_text(text):
     Returns:
         list: List of email addresses
     """
-    pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    return re.findall(pattern, text)
+    return EMAIL_PATTERN.findall(text)
 
-def save_uploaded_file(file, upload_folder):
+def upload_path(filename, upload_folder):
     """
-    Save uploaded file to upload folder
+    Build a unique path in the upload folder, creating the folder if needed
     
     Args:
-        file: File object
+        filename (str): Original file name
         upload_folder (str): Path to upload folder
         
     Returns:
-        str: Path to saved file
+        str: Path that no other upload uses
     """
     import os
+    import uuid
     from werkzeug.utils import secure_filename
     
     if not os.path.exists(upload_folder):
-        os.makedirs(upload_folder)
+        os.makedirs(upload_folder, exist_ok=True)
     
-    filename = secure_filename(file.filename)
+    filename = secure_filename(filename or '') or 'upload'
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"{timestamp}_{filename}"
-    filepath = os.path.join(upload_folder, filename)
+    # Concurrent uploads in the same second must not overwrite each other
+    filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
+    return os.path.join(upload_folder, filename)
+
+def save_uploaded_file(file, upload_folder):
+    """
+    Save uploaded file to upload folder
+    
+    Args:
+        file: File object
+        upload_folder (str): Path to upload folder
+        
+    Returns:
+        str: Path to saved file
+    """
+    filepath = upload_path(file.filename, upload_folder)
     
     file.save(filepath)
     logger.info(f"File saved: {filepath}")
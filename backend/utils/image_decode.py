@@ -0,0 +1,78 @@
+"""
+Memory-bounded image decoding for OCR
+
+Image.open() only reads the header, so the size can be checked before any
+pixels are decoded. JPEGs are then decoded in draft mode: libjpeg scales
+by 1/2, 1/4 or 1/8 while decoding and can emit grayscale directly, so a
+50MP photo never exists in memory at full resolution. Other formats are
+decoded as-is, and images that would still exceed the pixel budget are
+rejected instead of being decoded.
+"""
+
+import io
+import logging
+
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Modes tesseract reads without help (pytesseract flattens alpha to white)
+TESSERACT_MODES = {'1', 'L', 'P', 'RGB', 'LA', 'RGBA'}
+
+
+class ImageTooLarge(ValueError):
+    """The image would decode to more pixels than allowed"""
+
+
+@timed('decode')
+def load_for_ocr(source, max_pixels, max_long_edge):
+    """
+    Decode an image for OCR within a pixel budget
+
+    Args:
+        source: Image bytes, a path or a binary file object
+        max_pixels (int): Largest width * height that may be decoded
+        max_long_edge (int): JPEGs are decoded at the smallest draft scale
+            that keeps at least this many pixels on the long edge
+
+    Returns:
+        PIL.Image.Image: Decoded image in a mode tesseract accepts
+
+    Raises:
+        ImageTooLarge: If the decoded image would exceed max_pixels
+    """
+    from PIL import Image
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    try:
+        image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        # Pillow's own guard trips at open() for headers past twice
+        # Image.MAX_IMAGE_PIXELS, before the budget below is checked
+        raise ImageTooLarge(str(e)) from e
+    original_size = image.size
+
+    if image.format == 'JPEG':
+        width, height = image.size
+        scale = min(1.0, max_long_edge / max(width, height))
+        # Asking for 'L' lets libjpeg skip the colour planes of YCbCr files
+        mode = 'L' if image.mode in ('L', 'RGB') else image.mode
+        image.draft(mode, (int(width * scale), int(height * scale)))
+
+    width, height = image.size
+    if width * height > max_pixels:
+        image.close()
+        raise ImageTooLarge(
+            f"Image is {width}x{height} pixels, more than the {max_pixels} pixel limit"
+        )
+
+    image.load()
+    if image.size != original_size:
+        logger.info(f"Decoded {original_size[0]}x{original_size[1]} image at {width}x{height}")
+
+    if image.mode not in TESSERACT_MODES:
+        # CMYK, 16-bit and float images; grayscale is all OCR needs
+        image = image.convert('L')
+    return image
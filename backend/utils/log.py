@@ -0,0 +1,256 @@
+"""
+Non-blocking structured logging
+
+Request threads only put records on a bounded queue; a listener thread
+formats them as one JSON object per line and writes them to
+Config.LOG_FILE (rotated by size) and, at a higher level, to the
+console. When the queue is full records are dropped and counted rather
+than blocking a request.
+
+Every record carries the id of the request that produced it. Verbose
+payloads (OCR text, raw model replies) are logged with extra=sampled(...)
+and kept for a fixed fraction of requests, chosen by request id so a
+sampled request keeps all of its payloads.
+"""
+
+import os
+import re
+import sys
+import json
+import uuid
+import zlib
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config import Config
+from .tracing import get_trace_id
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Ids taken from clients end up in log lines and response headers
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {
+    'message', 'asctime', 'request_id', 'trace_id', 'sampled'
+}
+
+_listener = None
+_handler = None
+_outputs = ()
+_lock = threading.Lock()
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def bind_request_id(request_id=None):
+    """
+    Set the current request id
+
+    Args:
+        request_id (str): Id sent by the client; a new one is generated if
+            it is missing or malformed
+
+    Returns:
+        contextvars.Token: Pass to reset_request_id when the request ends
+    """
+    if not request_id or not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = new_request_id()
+    return request_id_var.set(request_id)
+
+
+def reset_request_id(token):
+    request_id_var.reset(token)
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+def sampled(**fields):
+    """extra= for a verbose record that is only kept for sampled requests"""
+    fields['sampled'] = True
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with extra="""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'trace_id': getattr(record, 'trace_id', None),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamp the request and trace ids on records and sample verbose ones
+
+    Runs in the logging thread, before the record is queued, because the
+    listener thread cannot see the request's context.
+    """
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        record.trace_id = get_trace_id()
+        if getattr(record, 'sampled', False):
+            return self.keep(request_id)
+        return True
+
+    def keep(self, request_id):
+        if self.sample_rate >= 1:
+            return True
+        if request_id is None:
+            return random.random() < self.sample_rate
+        return zlib.crc32(request_id.encode()) < self.sample_rate * 2 ** 32
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: past max_size queued records, new
+    ones are dropped
+
+    Uses the C SimpleQueue, which takes no Python-level lock; the size
+    check is not atomic, so the bound can be overshot by a few records.
+    """
+
+    def __init__(self, max_size):
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args now, they may change before the listener formats the
+        # record; formatting itself (and any traceback) is left to it
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Bypasses the handler's size limit, so the sentinel is never dropped
+        self.queue.put(self._sentinel)
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler for a file several worker processes append to
+
+    Reopens the file when another process has rotated it, so that
+    process's rollover does not leave this one writing to the backup.
+    """
+
+    def shouldRollover(self, record):
+        if self.stream is not None:
+            try:
+                current = os.stat(self.baseFilename)
+                opened = os.fstat(self.stream.fileno())
+                rotated = (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+            except FileNotFoundError:
+                rotated = True
+            if rotated:
+                self.stream.close()
+                self.stream = self._open()
+        return super().shouldRollover(record)
+
+
+def setup_logging(level=None, console_level=None, log_file=None):
+    """
+    Route the root logger through the queue; safe to call more than once
+
+    Args:
+        level (str): Minimum level logged, defaults to Config.LOG_LEVEL
+        console_level (str): Minimum level also echoed to stderr,
+            defaults to Config.LOG_CONSOLE_LEVEL
+        log_file (str): Defaults to Config.LOG_FILE
+
+    Returns:
+        DroppingQueueHandler: The handler installed on the root logger
+    """
+    global _listener, _handler, _outputs
+    with _lock:
+        if _handler is not None:
+            return _handler
+
+        log_file = log_file or Config.LOG_FILE
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+
+        file_handler = SharedRotatingFileHandler(
+            log_file, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(console_level or Config.LOG_CONSOLE_LEVEL)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+
+        _handler = DroppingQueueHandler(Config.LOG_QUEUE_SIZE)
+        _handler.addFilter(RequestContextFilter(Config.LOG_PAYLOAD_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        root.setLevel(level or Config.LOG_LEVEL)
+        root.addHandler(_handler)
+
+        _outputs = (file_handler, console_handler)
+        _listener = _Listener(_handler.queue, *_outputs, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        # gunicorn forks workers after the app is imported; the listener
+        # thread does not survive the fork
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        return _handler
+
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def _restart_after_fork():
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _handler is None or _listener is None:
+        return
+    _handler.queue = queue.SimpleQueue()
+    _handler.dropped = 0
+    _listener = _Listener(_handler.queue, *_outputs, respect_handler_level=True)
+    _listener.start()
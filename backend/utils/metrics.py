@@ -0,0 +1,212 @@
+"""
+In-process stage metrics in the Prometheus text format
+
+Every stage of a request (decode, OCR, categorize, scrape, sheets, render,
+send) records its latency, outcome and in-flight count here, and
+/api/metrics renders the totals. Each thread updates its own shard, one
+flat list of counters per stage, so recording takes no lock and touches a
+single thread-local; shards are only summed when metrics are scraped.
+Metrics are per process: with several server workers, each worker
+reports its own.
+"""
+
+import time
+import asyncio
+import bisect
+import functools
+import threading
+import weakref
+
+from .tracing import begin_span, end_span
+
+# Seconds; render takes microseconds, contact discovery up to
+# Config.CRAWLER_TIME_BUDGET (10s by default) per lookup
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Layout of a stage's cells: in flight, ok, error, one count per bucket
+# plus +Inf, then the sum of durations
+IN_FLIGHT, OK, ERROR, FIRST_BUCKET = 0, 1, 2, 3
+
+
+class StageMetrics:
+    """
+    Latency histogram, call counter and in-flight gauge per stage
+
+    Args:
+        prefix (str): Metric name prefix
+        buckets (tuple): Histogram bucket upper bounds in seconds
+    """
+
+    def __init__(self, prefix='poster_stage', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._size = FIRST_BUCKET + len(self.buckets) + 2
+        self._local = threading.local()
+        self._shards = []
+        # Counters of threads that have exited, folded together so
+        # thread-per-request servers don't grow the shard list forever
+        self._retired = {}
+        # Reentrant: a finalizer may run on a thread that holds it
+        self._lock = threading.RLock()
+
+    def cells(self, stage):
+        """This thread's counters for stage"""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # Thread-locals are dropped when their thread exits
+            self._local.sentinel = _Sentinel()
+            weakref.finalize(self._local.sentinel, self._retire, shard)
+            with self._lock:
+                self._shards.append(shard)
+        cells = shard.get(stage)
+        if cells is None:
+            cells = shard[stage] = [0] * self._size
+        return cells
+
+    def record(self, cells, started, failed):
+        """
+        Finish a call begun with cells[IN_FLIGHT] += 1
+
+        Must run on the thread that owns cells; a coroutine always resumes
+        on its event loop's thread.
+        """
+        elapsed = time.perf_counter() - started
+        cells[FIRST_BUCKET + bisect.bisect_left(self.buckets, elapsed)] += 1
+        cells[-1] += elapsed
+        cells[ERROR if failed else OK] += 1
+        cells[IN_FLIGHT] -= 1
+
+    def _retire(self, shard):
+        """Fold the shard of an exited thread into the retired totals"""
+        with self._lock:
+            self._shards = [other for other in self._shards if other is not shard]
+            for stage, cells in shard.items():
+                total = self._retired.setdefault(stage, [0] * self._size)
+                for i, cell in enumerate(cells):
+                    total[i] += cell
+
+    def totals(self):
+        """Summed counters per stage across every thread, live or exited"""
+        with self._lock:
+            shards = list(self._shards)
+            totals = {stage: list(cells) for stage, cells in self._retired.items()}
+        # dict.copy() is atomic, the owning thread may be adding stages
+        for shard in shards:
+            for stage, cells in shard.copy().items():
+                total = totals.setdefault(stage, [0] * self._size)
+                for i, cell in enumerate(list(cells)):
+                    total[i] += cell
+        return totals
+
+    def value(self, stage, cell):
+        """One summed counter, e.g. value('ocr', ERROR)"""
+        return self.totals().get(stage, [0] * self._size)[cell]
+
+    def render(self):
+        """Prometheus text exposition of every stage"""
+        totals = sorted(self.totals().items())
+        duration, calls, in_flight = (
+            f"{self.prefix}_duration_seconds", f"{self.prefix}_calls_total", f"{self.prefix}_in_flight"
+        )
+
+        lines = [
+            f"# HELP {duration} Time spent in each request stage",
+            f"# TYPE {duration} histogram"
+        ]
+        for stage, cells in totals:
+            label = f'stage="{_escape(stage)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), cells[FIRST_BUCKET:-1]):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{duration}_sum{{{label}}} {cells[-1]!r}")
+            lines.append(f"{duration}_count{{{label}}} {cumulative}")
+
+        lines += [f"# HELP {calls} Request stage calls by outcome", f"# TYPE {calls} counter"]
+        for stage, cells in totals:
+            label = f'stage="{_escape(stage)}"'
+            lines.append(f'{calls}{{{label},outcome="ok"}} {cells[OK]}')
+            lines.append(f'{calls}{{{label},outcome="error"}} {cells[ERROR]}')
+
+        lines += [f"# HELP {in_flight} Request stage calls currently running", f"# TYPE {in_flight} gauge"]
+        for stage, cells in totals:
+            lines.append(f'{in_flight}{{stage="{_escape(stage)}"}} {cells[IN_FLIGHT]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class _Sentinel:
+    """Weak-referenceable marker whose collection signals a thread's exit"""
+
+
+STAGES = StageMetrics()
+
+
+class stage_timer:
+    """
+    Context manager recording one call of a stage, with its trace span
+
+    The call counts as an error if it raises or if failed is set to True
+    before it exits.
+    """
+
+    __slots__ = ('stage', 'failed', 'cells', 'started', 'span', 'token')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.failed = False
+
+    def __enter__(self):
+        self.cells = STAGES.cells(self.stage)
+        self.cells[IN_FLIGHT] += 1
+        self.span, self.token = begin_span(self.stage)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGES.record(self.cells, self.started, self.failed or exc_type is not None)
+        if exc is None and self.failed:
+            exc = 'returned a failure fallback'
+        end_span(self.span, self.token, exc)
+        return False
+
+
+def timed(stage, ok=None):
+    """
+    Decorator recording every call of a function (or coroutine function) as a stage
+
+    Args:
+        stage (str): Stage label
+        ok (callable): Optional check of the return value, for functions
+            that report failure with a fallback instead of raising
+    """
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with stage_timer(stage) as timer:
+                    result = await func(*args, **kwargs)
+                    timer.failed = ok is not None and not ok(result)
+                    return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with stage_timer(stage) as timer:
+                    result = func(*args, **kwargs)
+                    timer.failed = ok is not None and not ok(result)
+                    return result
+        return wrapper
+    return decorate
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    return STAGES.render()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
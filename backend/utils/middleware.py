@@ -0,0 +1,470 @@
+"""
+WSGI and ASGI middleware for the backend apps
+"""
+
+import io
+import hmac
+import time
+import zlib
+import logging
+
+from .log import REQUEST_ID_HEADER, bind_request_id, get_request_id, new_request_id, reset_request_id
+from .profiling import (
+    DEBUG_TOKEN_HEADER, PER_THREAD_PROFILES, PROFILE_FILE_HEADER, PROFILE_HEADER, RequestProfile, current_profile,
+    profile_requested
+)
+from .tracing import TRACEPARENT_HEADER, begin_trace, end_span, unsampled_traceparent
+from .traffic import RECORDED_HEADER, RECORDED_TOKEN
+from .uploads import UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 64 * 1024
+
+
+class InvalidGzipBody(Exception):
+    """
+    A request body sent with Content-Encoding: gzip could not be inflated
+
+    Not a ValueError: werkzeug reports those from wsgi.input as a client
+    disconnect.
+    """
+
+
+class GzipInflater:
+    """
+    Incremental gzip decoder with a cap on the inflated size
+
+    Output comes in pieces of at most READ_CHUNK bytes however well the
+    input compresses. Raises UploadTooLarge once the output would exceed
+    max_size (a guard against decompression bombs) and InvalidGzipBody on
+    corrupt input.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # wbits=31 selects the gzip container format
+        self._decompressor = zlib.decompressobj(31)
+        self.size = 0
+
+    def feed(self, chunk):
+        """Yield the inflated pieces of chunk"""
+        while chunk:
+            try:
+                piece = self._decompressor.decompress(chunk, READ_CHUNK)
+            except zlib.error as e:
+                raise InvalidGzipBody(f"Invalid gzip body: {e}")
+            chunk = self._decompressor.unconsumed_tail
+            self._count(piece)
+            if piece:
+                yield piece
+
+    def finish(self):
+        """Flush and return the rest of the inflated body"""
+        try:
+            piece = self._decompressor.flush()
+        except zlib.error as e:
+            raise InvalidGzipBody(f"Invalid gzip body: {e}")
+        self._count(piece)
+        return piece
+
+    def _count(self, piece):
+        self.size += len(piece)
+        if self.size > self.max_size:
+            raise UploadTooLarge(f"Decompressed body exceeds {self.max_size} bytes")
+
+
+class _InflatingStream(io.RawIOBase):
+    """Readable file over a gzip WSGI input, inflated as it is read"""
+
+    def __init__(self, stream, content_length, max_size):
+        self._stream = stream
+        self._remaining = int(content_length) if content_length else None
+        self._inflater = GzipInflater(max_size)
+        self._pieces = iter(())
+        self._piece = memoryview(b'')
+        self._finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        from werkzeug.exceptions import RequestEntityTooLarge
+
+        try:
+            return self._readinto(buffer)
+        except UploadTooLarge as e:
+            # What werkzeug raises for a plain body over MAX_CONTENT_LENGTH
+            raise RequestEntityTooLarge(str(e))
+
+    def _readinto(self, buffer):
+        while not self._piece:
+            piece = next(self._pieces, None)
+            if piece is not None:
+                self._piece = memoryview(piece)
+            elif self._finished:
+                return 0
+            else:
+                self._pieces = self._next_pieces()
+        size = min(len(buffer), len(self._piece))
+        buffer[:size] = self._piece[:size]
+        self._piece = self._piece[size:]
+        return size
+
+    def _next_pieces(self):
+        if self._remaining == 0:
+            chunk = b''
+        else:
+            chunk = self._stream.read(READ_CHUNK if self._remaining is None else min(READ_CHUNK, self._remaining))
+        if not chunk:
+            self._finished = True
+            return iter((self._inflater.finish(),))
+        if self._remaining is not None:
+            self._remaining -= len(chunk)
+        return self._inflater.feed(chunk)
+
+
+class GzipRequestMiddleware:
+    """
+    Transparently inflate request bodies sent with Content-Encoding: gzip
+
+    Flask only decodes response encodings, so compressed JSON from
+    APIClient is inflated here, as the app reads it: an upload is inflated
+    straight into its spool file and is never whole in memory. Inflated
+    bodies are capped at max_size to guard against decompression bombs;
+    reading past it raises werkzeug's RequestEntityTooLarge, and corrupt
+    input InvalidGzipBody.
+    """
+
+    def __init__(self, app, max_size):
+        self.app = app
+        self.max_size = max_size
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').lower()
+        if encoding != 'gzip':
+            return self.app(environ, start_response)
+
+        environ['wsgi.input'] = _InflatingStream(
+            environ['wsgi.input'], environ.get('CONTENT_LENGTH'), self.max_size
+        )
+        # The inflated length isn't known up front; the stream ends itself
+        environ.pop('CONTENT_LENGTH', None)
+        environ['wsgi.input_terminated'] = True
+        del environ['HTTP_CONTENT_ENCODING']
+        return self.app(environ, start_response)
+
+
+class AsyncGzipRequestMiddleware:
+    """ASGI counterpart of GzipRequestMiddleware for the async app"""
+
+    def __init__(self, app, max_size):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = scope['headers']
+        encoding = next((value for name, value in headers if name == b'content-encoding'), b'')
+        if encoding.lower() != b'gzip':
+            return await self.app(scope, receive, send)
+
+        headers = [
+            (name, value) for name, value in headers
+            if name not in (b'content-encoding', b'content-length')
+        ]
+        scope = dict(scope, headers=headers)
+
+        inflater = GzipInflater(self.max_size)
+        pieces = iter(())
+        received = ended = False
+
+        async def inflating_receive():
+            nonlocal pieces, received, ended
+            while True:
+                piece = next(pieces, None)
+                if piece is not None:
+                    return {'type': 'http.request', 'body': piece, 'more_body': True}
+                if ended:
+                    # Anything after the body (e.g. a disconnect) comes from the server
+                    return await receive()
+                if received:
+                    ended = True
+                    return {'type': 'http.request', 'body': inflater.finish(), 'more_body': False}
+                message = await receive()
+                if message['type'] != 'http.request':
+                    return message
+                pieces = inflater.feed(message.get('body', b''))
+                received = not message.get('more_body')
+
+        return await self.app(scope, inflating_receive, send)
+
+
+class AsyncRequestIdMiddleware:
+    """
+    Bind a request id for log correlation in the async app
+
+    Reuses the client's X-Request-ID when it is well formed and echoes the
+    id in the response. The id is also written into the request headers,
+    so the mounted Flask app binds the same one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        sent = next((value for name, value in scope['headers'] if name == header), b'')
+        token = bind_request_id(sent.decode('latin-1'))
+        request_id = get_request_id().encode()
+        headers = [(name, value) for name, value in scope['headers'] if name != header]
+        headers.append((header, request_id))
+        scope = dict(scope, headers=headers)
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                response_headers = list(message.get('headers', []))
+                if not any(name.lower() == header for name, _ in response_headers):
+                    response_headers.append((header, request_id))
+                message = dict(message, headers=response_headers)
+            await send(message)
+
+        try:
+            return await self.app(scope, receive, send_with_id)
+        finally:
+            reset_request_id(token)
+
+
+class AsyncTracingMiddleware:
+    """
+    Server span per request in the async app
+
+    Continues the caller's traceparent. The request headers are rewritten
+    to point at this span, so the mounted Flask app's spans become its
+    children and an unsampled decision is passed on too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        header = TRACEPARENT_HEADER.encode()
+        incoming = next((value for name, value in scope['headers'] if name == header), b'').decode('latin-1')
+        span, token = begin_trace(
+            f"{scope['method']} {scope['path']}",
+            incoming,
+            {'http.request.method': scope['method'], 'url.path': scope['path']}
+        )
+        downstream = span.traceparent or incoming or unsampled_traceparent()
+        headers = [(name, value) for name, value in scope['headers'] if name != header]
+        headers.append((header, downstream.encode()))
+        scope = dict(scope, headers=headers)
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                span.set_attribute('http.response.status_code', message['status'])
+                if message['status'] >= 500:
+                    span.record_error(f"HTTP {message['status']}")
+            await send(message)
+
+        error = None
+        try:
+            return await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            end_span(span, token, error)
+
+
+class _RecordedBody:
+    """WSGI response iterable that counts the bytes sent and reports them on close"""
+
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+        self.sent = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.finish(self.sent)
+
+
+class TrafficRecorder:
+    """
+    Record the size, status and duration of every request to a TrafficLog
+
+    Wrap it around everything else, so sizes are the ones on the wire and
+    the duration covers a streamed response until its last chunk.
+    """
+
+    def __init__(self, app, traffic_log):
+        self.app = app
+        self.traffic_log = traffic_log
+
+    def __call__(self, environ, start_response):
+        recorded = environ.get(_environ_key(RECORDED_HEADER), '')
+        if hmac.compare_digest(recorded.encode('latin-1'), RECORDED_TOKEN.encode()):
+            return self.app(environ, start_response)
+
+        started_at, started = time.time(), time.perf_counter()
+        status = [500]
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status[0] = int(status_line.split(' ', 1)[0])
+            return start_response(status_line, headers, exc_info)
+
+        def finish(sent):
+            self.traffic_log.write(
+                environ['REQUEST_METHOD'], environ.get('PATH_INFO', ''),
+                int(environ.get('CONTENT_LENGTH') or 0), status[0], sent,
+                started_at, time.perf_counter() - started
+            )
+
+        try:
+            body = self.app(environ, recording_start_response)
+        except Exception:
+            finish(0)
+            raise
+        return _RecordedBody(body, finish)
+
+
+class AsyncTrafficRecorder:
+    """ASGI counterpart of TrafficRecorder for the async app"""
+
+    def __init__(self, app, traffic_log):
+        self.app = app
+        self.traffic_log = traffic_log
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started_at, started = time.time(), time.perf_counter()
+        length = next((value for name, value in scope['headers'] if name == b'content-length'), b'0')
+        # Replace any marker the client sent with this process's own
+        marker = RECORDED_HEADER.lower().encode()
+        headers = [(name, value) for name, value in scope['headers'] if name != marker]
+        scope = dict(scope, headers=headers + [(marker, RECORDED_TOKEN.encode())])
+        status, sent = 500, 0
+
+        async def recording_send(message):
+            nonlocal status, sent
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                sent += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            return await self.app(scope, receive, recording_send)
+        finally:
+            self.traffic_log.write(
+                scope['method'], scope['path'], int(length or 0), status, sent,
+                started_at, time.perf_counter() - started
+            )
+
+
+def _environ_key(header):
+    return 'HTTP_' + header.upper().replace('-', '_')
+
+
+class RequestProfiler:
+    """
+    cProfile requests sent with X-Profile: 1 and a valid X-Debug-Token
+
+    The path of the saved stats is returned in X-Profile-File. When the
+    async app has already started a profile for the request, this only
+    adds the Flask thread's share to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        profile, token = current_profile(), None
+        if profile is None:
+            if not profile_requested(
+                environ.get(_environ_key(PROFILE_HEADER)), environ.get(_environ_key(DEBUG_TOKEN_HEADER))
+            ):
+                return self.app(environ, start_response)
+            profile = RequestProfile()
+            token = profile.activate()
+
+        section = [profile.enter()]
+
+        def leave():
+            # cProfile must be stopped on the thread that started it
+            if section:
+                profile.leave(section.pop())
+
+        def profiling_start_response(status_line, headers, exc_info=None):
+            leave()
+            if token is not None:
+                path = profile.finish(get_request_id() or new_request_id())
+                if path:
+                    headers = headers + [(PROFILE_FILE_HEADER, path)]
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            return self.app(environ, profiling_start_response)
+        finally:
+            leave()
+            if token is not None:
+                profile.deactivate(token)
+
+
+class AsyncRequestProfiler:
+    """
+    ASGI counterpart of RequestProfiler
+
+    The event loop thread is shared by every request, so only the work
+    this request hands to executor threads is profiled. That needs a
+    cProfile per thread, which Python 3.12+ doesn't allow: there only the
+    Flask routes, profiled by RequestProfiler on their own thread, are.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = {name: value.decode('latin-1') for name, value in scope['headers']}
+        if not PER_THREAD_PROFILES or not profile_requested(
+            headers.get(PROFILE_HEADER.lower().encode()), headers.get(DEBUG_TOKEN_HEADER.lower().encode())
+        ):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = profile.activate()
+
+        async def profiling_send(message):
+            if message['type'] == 'http.response.start':
+                path = profile.finish(get_request_id() or new_request_id())
+                if path:
+                    header = (PROFILE_FILE_HEADER.lower().encode(), path.encode())
+                    message = dict(message, headers=list(message.get('headers', [])) + [header])
+            await send(message)
+
+        try:
+            return await self.app(scope, receive, profiling_send)
+        finally:
+            profile.deactivate(token)
@@ -0,0 +1,314 @@
+"""
+Small dependency-graph executor for request pipelines
+
+Stages declare which earlier results they need; independent stages run
+concurrently on a shared thread pool, each with its own deadline, counted
+from when the stage starts running rather than from when it was queued.
+Non-critical stages that fail or time out fall back to a default so the
+caller still gets a partial result. The same stages can also be run on an
+asyncio event loop, where coroutine stages are awaited directly.
+"""
+
+import time
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import Config
+from .profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+
+class StageFailed(Exception):
+    """A critical stage raised an exception"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class StageTimeout(Exception):
+    """A critical stage missed its deadline"""
+
+    def __init__(self, stage, deadline):
+        super().__init__(f"Stage '{stage}' exceeded its {deadline}s deadline")
+        self.stage = stage
+        self.deadline = deadline
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline
+
+    func is called with the results of deps as keyword arguments (pipeline
+    inputs count as results); under run_async it may be a coroutine
+    function. Background stages are started once their deps are ready but
+    never waited for.
+    """
+    name: str
+    func: callable
+    deps: tuple = ()
+    deadline: float = None
+    critical: bool = True
+    default: object = None
+    background: bool = False
+
+
+@dataclass
+class PipelineResult:
+    """Stage outputs plus per-stage timings in milliseconds"""
+    results: dict
+    timings: dict = field(default_factory=dict)
+    timed_out: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+
+    def metadata(self):
+        """Summary suitable for a JSON response"""
+        return {
+            'timings_ms': self.timings,
+            'timed_out': self.timed_out,
+            'failed': self.failed
+        }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+    """Get or initialize the shared stage thread pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.PIPELINE_WORKERS,
+                thread_name_prefix='stage'
+            )
+    return _executor
+
+
+def shutdown_stage_executor(wait=True):
+    """
+    Stop the shared stage pool, by default after running stages finish
+
+    Background stages (like the Google Sheets write) outlive the request
+    that started them, so servers call this before a worker exits.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _clocked(func, clock):
+    """
+    Profiled func that appends its start time to clock when a thread runs it
+
+    A timed-out stage keeps its pool thread until it returns, so stages
+    queued behind it must not lose their deadline waiting for a thread.
+    """
+    func = profiled(func)
+
+    @functools.wraps(func)
+    def wrapper(**kwargs):
+        clock.append(time.perf_counter())
+        return func(**kwargs)
+    return wrapper
+
+
+class Pipeline:
+    """Runs a set of stages in dependency order, concurrently where possible"""
+
+    def __init__(self, stages, executor=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self._executor = executor
+        self._background = set()
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep in self.stages and self.stages[dep].background:
+                    raise ValueError(f"Stage '{stage.name}' cannot depend on background stage '{dep}'")
+
+    @property
+    def executor(self):
+        return self._executor or get_stage_executor()
+
+    def run(self, **inputs):
+        """
+        Execute every stage
+
+        Args:
+            **inputs: Initial values stages can depend on by name
+
+        Returns:
+            PipelineResult: Outputs of all foreground stages
+
+        Raises:
+            StageFailed: If a critical stage raised
+            StageTimeout: If a critical stage missed its deadline
+        """
+        outcome = PipelineResult(dict(inputs))
+        pending = dict(self.stages)
+        running = {}
+
+        while pending or running:
+            for stage in self._ready(pending, outcome.results):
+                self._start(stage, outcome.results, running)
+
+            if not running:
+                self._check_resolved(pending)
+                break
+
+            done, _ = wait(running, timeout=self._next_timeout(running), return_when=FIRST_COMPLETED)
+            self._settle(done, running, outcome)
+
+        return outcome
+
+    async def run_async(self, **inputs):
+        """
+        Execute every stage on the running event loop
+
+        Coroutine functions are awaited directly; plain functions run on
+        the stage thread pool. Same arguments, result and exceptions as
+        run().
+        """
+        loop = asyncio.get_running_loop()
+        outcome = PipelineResult(dict(inputs))
+        pending = dict(self.stages)
+        running = {}
+
+        while pending or running:
+            for stage in self._ready(pending, outcome.results):
+                self._start_async(loop, stage, outcome.results, running)
+
+            if not running:
+                self._check_resolved(pending)
+                break
+
+            done, _ = await asyncio.wait(
+                running, timeout=self._next_timeout(running), return_when=asyncio.FIRST_COMPLETED
+            )
+            self._settle(done, running, outcome)
+
+        return outcome
+
+    @staticmethod
+    def _ready(pending, results):
+        """Remove and return the pending stages whose deps are available"""
+        ready = [stage for stage in pending.values() if all(dep in results for dep in stage.deps)]
+        for stage in ready:
+            del pending[stage.name]
+        return ready
+
+    @staticmethod
+    def _check_resolved(pending):
+        if pending:
+            raise ValueError(f"Unresolvable dependencies for: {', '.join(pending)}")
+
+    @staticmethod
+    def _deadline(stage, clock):
+        """When stage expires, or None if it has none or hasn't started yet"""
+        if not stage.deadline or not clock:
+            return None
+        return clock[0] + stage.deadline
+
+    def _next_timeout(self, running):
+        now = time.perf_counter()
+        timeouts = []
+        for stage, _, clock in running.values():
+            if stage.deadline:
+                # A queued stage expires no sooner than a full deadline from now
+                deadline = self._deadline(stage, clock)
+                timeouts.append(deadline - now if deadline else stage.deadline)
+        return max(0, min(timeouts)) if timeouts else None
+
+    def _settle(self, done, running, outcome):
+        """Record finished stages and expire the ones past their deadline"""
+        results = outcome.results
+        now = time.perf_counter()
+
+        for future in done:
+            stage, started, _ = running.pop(future)
+            outcome.timings[stage.name] = round((now - started) * 1000, 1)
+            try:
+                results[stage.name] = future.result()
+            except Exception as e:
+                if stage.critical:
+                    self._abandon(running)
+                    raise StageFailed(stage.name, e) from e
+                logger.warning(f"Stage '{stage.name}' failed, using default: {e}")
+                outcome.failed.append(stage.name)
+                results[stage.name] = stage.default
+
+        for future, (stage, started, clock) in list(running.items()):
+            deadline = self._deadline(stage, clock)
+            if deadline and now >= deadline:
+                running.pop(future)
+                future.cancel()
+                outcome.timings[stage.name] = round((now - started) * 1000, 1)
+                if stage.critical:
+                    self._abandon(running)
+                    raise StageTimeout(stage.name, stage.deadline)
+                logger.warning(f"Stage '{stage.name}' timed out after {stage.deadline}s, using default")
+                outcome.timed_out.append(stage.name)
+                results[stage.name] = stage.default
+
+    def _start(self, stage, results, running):
+        kwargs = {dep: results[dep] for dep in stage.deps}
+        started = time.perf_counter()
+        clock = []
+        # Threads don't inherit context variables such as the request id,
+        # nor a request's profiler
+        future = self.executor.submit(contextvars.copy_context().run, _clocked(stage.func, clock), **kwargs)
+        self._track(stage, started, clock, future, running)
+
+    def _start_async(self, loop, stage, results, running):
+        kwargs = {dep: results[dep] for dep in stage.deps}
+        started = time.perf_counter()
+        if asyncio.iscoroutinefunction(stage.func):
+            clock = [started]
+            future = loop.create_task(stage.func(**kwargs))
+        else:
+            clock = []
+            future = loop.run_in_executor(
+                self.executor, functools.partial(contextvars.copy_context().run, _clocked(stage.func, clock), **kwargs)
+            )
+        self._track(stage, started, clock, future, running)
+
+    def _track(self, stage, started, clock, future, running):
+        if stage.background:
+            # The loop only keeps weak references to tasks
+            self._background.add(future)
+            future.add_done_callback(self._background.discard)
+            future.add_done_callback(lambda f: self._background_done(stage, started, f))
+            return
+
+        running[future] = (stage, started, clock)
+
+    @staticmethod
+    def _background_done(stage, started, future):
+        elapsed = (time.perf_counter() - started) * 1000
+        if future.cancelled():
+            logger.warning(f"Background stage '{stage.name}' cancelled after {elapsed:.0f}ms")
+            return
+        error = future.exception()
+        if error:
+            logger.error(f"Background stage '{stage.name}' failed after {elapsed:.0f}ms: {error}")
+        else:
+            logger.info(f"Background stage '{stage.name}' finished in {elapsed:.0f}ms")
+
+    @staticmethod
+    def _abandon(running):
+        # Threads cannot be interrupted; queued stages at least never start.
+        # Coroutine stages are cancelled outright.
+        for future in running:
+            future.cancel()
+        running.clear()
@@ -0,0 +1,248 @@
+"""
+On-demand CPU profiling of a running backend process
+
+Two tools, both disabled unless Config.DEBUG_TOKEN is set and the caller
+sends it in the X-Debug-Token header:
+
+- sample_stacks() samples the Python stack of every thread at a fixed
+  interval and returns the counts in the collapsed format that
+  flamegraph.pl, speedscope and inferno read. Served at
+  /api/debug/profile?seconds=N. Only the sampler's own thread pays for it,
+  so it is safe to run on a loaded production worker.
+- RequestProfile runs cProfile for a single request sent with
+  X-Profile: 1, on the request's thread and on every executor thread it
+  hands work to (pipeline stages, the async app's stage pool), and saves
+  the merged stats as <request id>.pstats in Config.PROFILE_DIR.
+  From Python 3.12 cProfile is built on sys.monitoring, which allows one
+  active profiler per interpreter and sees every thread; there a request
+  is profiled on its own thread only (see PER_THREAD_PROFILES).
+
+Both are per process: with several server workers, each profiles itself.
+"""
+
+import os
+import sys
+import hmac
+import time
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import contextlib
+import contextvars
+from collections import Counter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEBUG_TOKEN_HEADER = 'X-Debug-Token'
+PROFILE_HEADER = 'X-Profile'
+PROFILE_FILE_HEADER = 'X-Profile-File'
+
+# Leaf frames of threads waiting for work rather than running; left out
+# of samples unless idle stacks are asked for
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+}
+
+
+# Before 3.12 every thread can run its own cProfile. From 3.12 a second
+# enable() raises, and the one active profile records all threads, so
+# other requests' work shows up in a request's stats.
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class ProfilerBusy(Exception):
+    """Another stack sampling run is in progress"""
+
+
+def debug_authorized(token):
+    """Whether token grants access to the debug tools; always False when they are disabled"""
+    return bool(Config.DEBUG_TOKEN and token) and hmac.compare_digest(token, Config.DEBUG_TOKEN)
+
+
+def profile_requested(profile, token):
+    """Whether a request with these X-Profile and X-Debug-Token values gets a cProfile"""
+    requested = profile == '1' and debug_authorized(token)
+    if requested and not PER_THREAD_PROFILES:
+        logger.warning(
+            'Python 3.12+ allows one active cProfile per process: profiling the request thread only, '
+            'and its stats include every thread that ran meanwhile'
+        )
+    return requested
+
+
+_labels = {}
+
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename.replace('\\', '/').rsplit('/', 2)
+        name = getattr(code, 'co_qualname', code.co_name)
+        label = _labels[code] = f"{name} ({'/'.join(path[-2:])})"
+    return label
+
+
+def _is_idle(frame):
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+_sampling = threading.Lock()
+
+
+def sample_stacks(seconds, interval=0.01, idle=False):
+    """
+    Sample every thread's stack on the calling thread
+
+    Args:
+        seconds (float): How long to sample
+        interval (float): Seconds between samples
+        idle (bool): Also count threads waiting for work
+
+    Returns:
+        tuple: (collapsed stacks, "thread;outer;...;inner count" per line,
+            most frequent first; number of samples taken)
+
+    Raises:
+        ProfilerBusy: If another call is still sampling
+    """
+    if not _sampling.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        counts = Counter()
+        me = threading.get_ident()
+        samples = 0
+        next_sample = time.perf_counter()
+        deadline = next_sample + seconds
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not idle and _is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[tuple(reversed(stack))] += 1
+            samples += 1
+            next_sample += interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        _sampling.release()
+
+    collapsed = '\n'.join(f"{';'.join(stack)} {count}" for stack, count in counts.most_common())
+    return collapsed + '\n' if collapsed else '', samples
+
+
+_current = contextvars.ContextVar('request_profile', default=None)
+_thread = threading.local()
+
+
+class RequestProfile:
+    """
+    cProfile of one request across the threads it runs on
+
+    activate() makes it the current context's profile; section() profiles
+    a block on the calling thread; finish() merges and saves everything
+    profiled so far. cProfile only sees the thread it is enabled on, so
+    work handed to executors must be wrapped with profiled().
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    @contextlib.contextmanager
+    def section(self):
+        """Profile the block unless this thread is already being profiled"""
+        profile = self.enter()
+        try:
+            yield
+        finally:
+            self.leave(profile)
+
+    def enter(self):
+        if getattr(_thread, 'profiling', False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (or debugger, or on 3.12+ another request's
+            # profile) owns this interpreter
+            logger.warning('Not profiling: another profiler is active in this process')
+            return None
+        _thread.profiling = True
+        return profile
+
+    def leave(self, profile):
+        """End a block begun with enter(); must run on the same thread"""
+        if profile is None:
+            return
+        profile.disable()
+        _thread.profiling = False
+        with self._lock:
+            self._profiles.append(profile)
+
+    def finish(self, name):
+        """
+        Save the merged stats of every finished section
+
+        Args:
+            name (str): File name without extension, e.g. the request id
+
+        Returns:
+            str: Path of the .pstats file, or None if nothing was profiled
+        """
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        path = os.path.join(Config.PROFILE_DIR, f"{name}.pstats")
+        try:
+            os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+            stats.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not save request profile to {path}: {e}")
+            return None
+        logger.info(f"Saved request profile to {path}")
+        return path
+
+
+def current_profile():
+    return _current.get()
+
+
+def profiled(func):
+    """func, profiled into the current request's profile if there is one; for work sent to another thread"""
+    profile = _current.get()
+    if profile is None or not PER_THREAD_PROFILES:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile.section():
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,320 @@
+"""
+Distributed tracing with W3C trace context and an OTLP/JSON file exporter
+
+The frontend sends a `traceparent` header with every call; the backend
+continues that trace in a server span per request, a span per stage
+(decode, OCR, categorize, scrape, sheets, render, send) and a client span
+per outbound call (Gemini, crawler fetches, Sheets, SMTP). Spans are
+written to Config.TRACE_FILE as OTLP/JSON lines, the format of the
+OpenTelemetry Collector file exporter, so they can be loaded into Jaeger,
+Tempo or any OTLP backend through the collector's otlpjsonfile receiver.
+
+Sampling is decided once per trace: the caller's sampled flag is honoured
+and requests without a traceparent are sampled at TRACE_SAMPLE_RATE. In an
+unsampled request every span is a shared no-op object, so tracing costs a
+context variable lookup per stage.
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = 'traceparent'
+TRACEPARENT_PATTERN = re.compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})')
+
+# OTLP span kinds and status codes
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_ERROR = 0, 2
+
+# Spans written per OTLP line
+EXPORT_BATCH = 256
+
+current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation of a sampled trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'message')
+
+    def __init__(self, trace_id, parent_id, name, kind=INTERNAL, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.message = ''
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.message = str(error)[:500]
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': self.status, 'message': self.message} if self.status else {}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for every span of an unsampled request"""
+
+    __slots__ = ()
+    traceparent = None
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def new_trace_id():
+    return f"{random.getrandbits(128):032x}"
+
+
+def new_span_id():
+    return f"{random.getrandbits(64):016x}"
+
+
+def unsampled_traceparent():
+    """traceparent telling the callee not to sample this request either"""
+    return f"00-{new_trace_id()}-{new_span_id()}-00"
+
+
+def parse_traceparent(header):
+    """
+    Parse a W3C traceparent header
+
+    Returns:
+        tuple: (trace id, parent span id, sampled), or None if malformed
+    """
+    match = TRACEPARENT_PATTERN.fullmatch((header or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def begin_trace(name, traceparent=None, attributes=None):
+    """
+    Start the server span of a request
+
+    Args:
+        name (str): Span name, e.g. 'POST /api/extract'
+        traceparent (str): Incoming header, continues the caller's trace
+        attributes (dict): Span attributes
+
+    Returns:
+        tuple: (span, token) for end_span; span is NOOP_SPAN when unsampled
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = new_trace_id(), None
+        sampled = random.random() < Config.TRACE_SAMPLE_RATE
+    if not sampled:
+        return NOOP_SPAN, current_span.set(None)
+
+    span = Span(trace_id, parent_id, name, SERVER, attributes)
+    return span, current_span.set(span)
+
+
+def begin_span(name, kind=INTERNAL, attributes=None):
+    """
+    Start a child of the current span
+
+    Returns:
+        tuple: (span, token) for end_span; (NOOP_SPAN, None) outside a sampled trace
+    """
+    parent = current_span.get()
+    if parent is None:
+        return NOOP_SPAN, None
+    span = Span(parent.trace_id, parent.span_id, name, kind, attributes)
+    return span, current_span.set(span)
+
+
+def end_span(span, token, error=None):
+    """Finish a span from begin_span or begin_trace and export it"""
+    if token is not None:
+        current_span.reset(token)
+    if span is NOOP_SPAN:
+        return
+    if error is not None:
+        span.record_error(error)
+    span.end_ns = time.time_ns()
+    _exporter.export(span)
+
+
+class start_span:
+    """
+    Context manager for a child span of the current one
+
+    Usage:
+        with start_span('gemini.generate_content', CLIENT) as span:
+            span.set_attribute('model', name)
+    """
+
+    __slots__ = ('name', 'kind', 'attributes', 'span', 'token')
+
+    def __init__(self, name, kind=INTERNAL, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.span, self.token = begin_span(self.name, self.kind, self.attributes)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        end_span(self.span, self.token, exc)
+        return False
+
+
+def get_trace_id():
+    """Trace id of the current sampled request, for log correlation"""
+    span = current_span.get()
+    return span.trace_id if span is not None else None
+
+
+class SpanExporter:
+    """
+    Appends finished spans to a file as OTLP/JSON lines on a writer thread
+
+    Request threads only put spans on a queue; at most max_queue spans
+    wait, further ones are dropped.
+    """
+
+    def __init__(self, path=None, service_name='poster-extractor-backend', max_queue=10000):
+        self.path = path
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        spans = self._queue or self._start()
+        if spans.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        spans.put(span)
+
+    def flush(self):
+        """Write out queued spans and stop the writer thread"""
+        with self._lock:
+            thread, spans = self._thread, self._queue
+            self._thread = self._queue = None
+        if thread is not None:
+            spans.put(None)
+            thread.join()
+
+    def _start(self):
+        # Each writer thread gets its own queue, so a flush's stop marker
+        # can't be taken by the next writer
+        with self._lock:
+            if self._queue is None:
+                spans = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._run, args=(spans,), name='span-exporter', daemon=True)
+                self._thread.start()
+                self._queue = spans
+            return self._queue
+
+    def _run(self, spans):
+        path = self.path or Config.TRACE_FILE
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as out:
+            while True:
+                batch = [spans.get()]
+                while len(batch) < EXPORT_BATCH:
+                    try:
+                        batch.append(spans.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                batch = [span for span in batch if span is not None]
+                if batch:
+                    try:
+                        out.write(json.dumps(self._encode(batch), separators=(',', ':')) + '\n')
+                        out.flush()
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Could not export {len(batch)} spans: {e}")
+                if stop:
+                    return
+
+    def _encode(self, spans):
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                _otlp_attribute('service.name', self.service_name),
+                _otlp_attribute('process.pid', os.getpid())
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]}
+
+    def _after_fork(self):
+        # The writer thread does not survive a fork; the child starts its own
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        encoded = {'boolValue': value}
+    elif isinstance(value, int):
+        encoded = {'intValue': str(value)}
+    elif isinstance(value, float):
+        encoded = {'doubleValue': value}
+    else:
+        encoded = {'stringValue': str(value)}
+    return {'key': key, 'value': encoded}
+
+
+_exporter = SpanExporter()
+atexit.register(_exporter.flush)
+os.register_at_fork(after_in_child=_exporter._after_fork)
+
+
+def flush_spans():
+    """Write out every finished span, e.g. before a worker exits"""
+    _exporter.flush()
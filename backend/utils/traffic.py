@@ -0,0 +1,63 @@
+"""
+Request traffic recording for load replay
+
+With Config.TRAFFIC_LOG_FILE set, the backend appends one JSON line per
+request to that file; benchmarks/replay_traffic.py replays it. Only the
+shape of the traffic is kept, never bodies or headers:
+
+    {"ts": 1760871234.512, "method": "POST", "path": "/api/extract",
+     "request_bytes": 412733, "status": 200, "response_bytes": 5120,
+     "duration_ms": 843.2}
+
+ts is the arrival time (epoch seconds) and request_bytes the body size
+on the wire, i.e. before gzip inflation.
+"""
+
+import os
+import json
+import logging
+import secrets
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Set by the async app's recorder so the mounted Flask app doesn't record
+# the same request again. Its value is a per-process secret, so clients
+# can't keep their requests out of the log by sending the header.
+RECORDED_HEADER = 'X-Traffic-Recorded'
+RECORDED_TOKEN = secrets.token_hex(16)
+
+
+class TrafficLog:
+    """
+    Appends traffic records to a file shared by every worker process
+
+    Each record is a single O_APPEND write, so lines from concurrent
+    workers don't interleave.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def write(self, method, path, request_bytes, status, response_bytes, started_at, duration):
+        record = {
+            'ts': round(started_at, 3),
+            'method': method,
+            'path': path,
+            'request_bytes': request_bytes,
+            'status': status,
+            'response_bytes': response_bytes,
+            'duration_ms': round(duration * 1000, 1)
+        }
+        try:
+            if self._fd is None:
+                with self._lock:
+                    # Two threads opening it at once would leak a descriptor
+                    if self._fd is None:
+                        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, (json.dumps(record) + '\n').encode())
+        except OSError as e:
+            logger.warning(f"Could not record traffic to {self.path}: {e}")
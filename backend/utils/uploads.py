@@ -0,0 +1,300 @@
+"""
+Spooled handling of large upload bodies
+
+Poster uploads arrive as JSON with the image as a base64 data URL.
+Parsing that with request.json keeps the raw body, the decoded JSON
+string and the decoded image bytes in memory at the same time. Instead
+the body is streamed to a file in the upload folder, and the image field
+is base64-decoded window by window from a memory map into a second file
+that PIL can open lazily. Memory per request stays around one window no
+matter how large the upload is.
+"""
+
+import os
+import re
+import json
+import mmap
+import base64
+import logging
+import shutil
+import pathlib
+
+from .helpers import upload_path
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the memory map decoded at a time; a multiple of 4 (base64
+# quanta) and of the page size
+WINDOW = 1024 * 1024
+
+# Bytes copied from the request stream at a time
+READ_CHUNK = 64 * 1024
+
+# "data:image/png;base64," and friends are well under this
+DATA_URL_PREFIX_LIMIT = 256
+
+# One JSON token after optional whitespace: a string's opening quote
+# (group 1), punctuation (group 2) or a number, true, false or null
+_TOKEN = re.compile(rb'\s*(?:(")|([{}\[\]:,])|([^\s{}\[\]:,"]+))')
+
+# Run of string contents up to a quote or an escape cut off by the window
+_STRING_PART = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class UploadTooLarge(ValueError):
+    """The request body exceeded the configured maximum"""
+
+
+class _LimitedReader:
+    """File-like wrapper that raises UploadTooLarge past max_size bytes"""
+
+    def __init__(self, stream, max_size):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise UploadTooLarge(f"Request body exceeds {self.max_size} bytes")
+        return chunk
+
+
+class SpooledUpload:
+    """
+    A request body spooled to disk, plus the files decoded from it
+
+    Use as a context manager; every file is removed on exit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._files = [path]
+
+    @classmethod
+    def from_stream(cls, stream, upload_folder, max_size=None, filename='upload.json'):
+        """
+        Copy a readable stream into the upload folder
+
+        Args:
+            stream: File-like object with read(), e.g. Flask's request.stream
+            upload_folder (str): Folder for spooled bodies
+            max_size (int): Maximum body size in bytes
+            filename (str): Name hint for the spool file
+
+        Raises:
+            UploadTooLarge: If the body is larger than max_size
+        """
+        reader = _LimitedReader(stream, max_size)
+        # Chosen up front, so a failed upload removes exactly its own file
+        path = upload_path(filename, upload_folder)
+        try:
+            with open(path, 'wb') as spool:
+                shutil.copyfileobj(reader, spool, READ_CHUNK)
+        except BaseException:
+            os.remove(path)
+            raise
+        return cls(path)
+
+    @classmethod
+    async def from_async_stream(cls, chunks, upload_folder, max_size=None, filename='upload.json'):
+        """from_stream for an async iterable of body chunks (ASGI)"""
+        path = upload_path(filename, upload_folder)
+        size = 0
+        try:
+            with open(path, 'wb') as spool:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UploadTooLarge(f"Request body exceeds {max_size} bytes")
+                    spool.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return cls(path)
+
+    def decode_data_url(self, field='image'):
+        """
+        Base64-decode a top-level JSON string field into its own file
+
+        The field may be a data URL ("data:image/png;base64,...") or plain
+        base64.
+
+        Args:
+            field (str): JSON key holding the image
+
+        Returns:
+            pathlib.Path: Decoded file, or None if the field is missing
+
+        Raises:
+            ValueError: If the body is not a JSON object, repeats the
+                field or the field is not valid base64
+        """
+        if os.path.getsize(self.path) == 0:
+            return None
+
+        with open(self.path, 'rb') as body, \
+                mmap.mmap(body.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            start = _find_top_level_string(view, field)
+            if start is None:
+                return None
+
+            head = view[start:start + DATA_URL_PREFIX_LIMIT]
+            comma = head.find(b',')
+            if head.startswith(b'data:') and comma >= 0:
+                start += comma + 1
+
+            decoded_path = f"{self.path}.{field}"
+            self._files.append(decoded_path)
+            with open(decoded_path, 'wb') as out:
+                _decode_base64_string(view, start, out)
+
+        return pathlib.Path(decoded_path)
+
+    def close(self):
+        for path in self._files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove spooled upload {path}: {e}")
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _find_top_level_string(view, field):
+    """
+    Locate a string field of the outermost JSON object
+
+    Keys of nested objects and text inside other strings are skipped, so
+    only the field a JSON parser would return is found. The whole body is
+    scanned to reject repeats of the field, which parsers resolve
+    differently.
+
+    Args:
+        view: Memory map of the body
+        field (str): Top-level key
+
+    Returns:
+        int: Offset just past the value's opening quote, or None if the
+        field is missing or not a string
+
+    Raises:
+        ValueError: If the body is not a JSON object or repeats the field
+    """
+    position = 0
+    released = 0
+    depth = 0
+    expect_key = False
+    is_field = False
+    seen = False
+    found = None
+
+    while True:
+        token = _TOKEN.match(view, position)
+        if token is None:
+            raise ValueError('Upload body is not valid JSON')
+        string = token.start(1) if token.group(1) else None
+        punctuation = token.group(2)
+        position = token.end()
+        if string is not None:
+            position, released = _skip_string(view, position, released)
+
+        if depth == 0 and punctuation != b'{':
+            raise ValueError('Upload body is not a JSON object')
+
+        if depth == 1 and expect_key:
+            # Only short keys are decoded; a long one cannot be the field
+            if string is not None and position - string <= DATA_URL_PREFIX_LIMIT:
+                is_field = json.loads(view[string:position]) == field
+                if is_field and seen:
+                    raise ValueError(f"Upload body repeats the '{field}' field")
+                seen = seen or is_field
+            expect_key = False
+        elif depth == 1 and is_field and punctuation != b':':
+            if string is not None:
+                found = string + 1
+            is_field = False
+
+        if punctuation in (b'{', b'['):
+            depth += 1
+            expect_key = depth == 1
+        elif punctuation in (b'}', b']'):
+            depth -= 1
+            if depth == 0:
+                return found
+        elif punctuation == b',' and depth == 1:
+            expect_key = True
+        released = _release(view, released, position)
+
+
+def _skip_string(view, position, released):
+    """Offset just past the closing quote of a string starting at position"""
+    while True:
+        end = _STRING_PART.match(view, position, position + WINDOW).end()
+        if view[end:end + 1] == b'"':
+            return end + 1, released
+        if end == position:
+            raise ValueError('Unterminated string in upload body')
+        # Stopped at the window's edge, maybe just before a split escape
+        position = end
+        released = _release(view, released, position)
+
+
+# JSON escapes allowed inside base64 strings: "/" and line-wrapping whitespace
+_ESCAPES = ((b'\\/', b'/'), (b'\\n', b''), (b'\\r', b''), (b'\\t', b''))
+
+
+def _decode_base64_string(view, start, out):
+    """Decode base64 from view[start:] up to the closing quote into out"""
+    carry = b''
+    position = start
+    released = 0
+
+    while True:
+        window = view[position:position + WINDOW]
+        if not window:
+            raise ValueError('Unterminated string in upload body')
+
+        end = window.find(b'"')
+        data = carry + (window if end < 0 else window[:end])
+        position += len(window)
+
+        # JSON may escape "/" as "\/" and line-wrapped base64 carries "\n"
+        # escapes; an escape can straddle two windows
+        held = b''
+        if end < 0 and data.endswith(b'\\'):
+            data, held = data[:-1], b'\\'
+        if b'\\' in data:
+            for escape, replacement in _ESCAPES:
+                data = data.replace(escape, replacement)
+            if b'\\' in data:
+                raise ValueError('Unsupported escape sequence in base64 data')
+        data = data.translate(None, b' \t\r\n')
+
+        if end >= 0:
+            data += b'=' * (-len(data) % 4)
+            out.write(base64.b64decode(data, validate=True))
+            return
+
+        usable = len(data) - len(data) % 4
+        out.write(base64.b64decode(data[:usable], validate=True))
+        carry = data[usable:] + held
+        released = _release(view, released, position)
+
+
+def _release(view, released, position):
+    """Drop already-decoded pages from the process's resident set"""
+    upto = position - position % mmap.PAGESIZE
+    if upto > released and hasattr(mmap, 'MADV_DONTNEED'):
+        view.madvise(mmap.MADV_DONTNEED, released, upto - released)
+        return upto
+    return released
+
@@ -0,0 +1,99 @@
+"""
+Benchmark date/time normalization throughput
+
+Compares the previous strptime loop in helpers.format_date against the
+batch normalize_dates / normalize_times API on a mixed corpus of strings
+shaped like real poster data.
+
+Usage:
+    python benchmarks/bench_dates.py --items 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.datetime_normalizer import normalize_dates, normalize_times
+
+LEGACY_FORMATS = [
+    '%Y-%m-%d',
+    '%d-%m-%Y',
+    '%m-%d-%Y',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%d %B %Y',
+    '%d %b %Y'
+]
+
+
+def legacy_format_date(date_string):
+    """helpers.format_date before the normalization engine"""
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(date_string.strip(), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return date_string
+
+
+def make_dates(count, seed=7):
+    """Mostly one format per source, like a sheet or LLM output history"""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    styles = [
+        lambda d: d.strftime('%Y-%m-%d'),
+        lambda d: d.strftime('%d/%m/%Y'),
+        lambda d: d.strftime('%B %d, %Y'),
+        lambda d: d.strftime('%d %b %Y'),
+    ]
+    values = []
+    style = styles[0]
+    for i in range(count):
+        if i % 10000 == 0:
+            style = rng.choice(styles)
+        values.append(style(start + timedelta(days=rng.randrange(3650))))
+    return values
+
+
+def make_times(count, seed=7):
+    rng = random.Random(seed)
+    styles = ['{h12}pm', '{h24}:{m:02d}', '{h12}.{m:02d} p.m.', '{h12}:{m:02d} PM']
+    return [
+        rng.choice(styles).format(h12=rng.randint(1, 12), h24=rng.randint(0, 23), m=rng.choice([0, 15, 30, 45]))
+        for _ in range(count)
+    ]
+
+
+def measure(label, func, values):
+    start = time.perf_counter()
+    func(values)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(values):>9} items  {len(values) / elapsed:>12,.0f} items/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--legacy-items', type=int, default=100000,
+                        help='The strptime loop is slow, so it runs on a subset')
+    args = parser.parse_args()
+
+    dates = make_dates(args.items)
+    times = make_times(args.items)
+
+    measure('legacy format_date', lambda values: [legacy_format_date(v) for v in values],
+            dates[:args.legacy_items])
+    measure('normalize_dates', normalize_dates, dates)
+    measure('normalize_dates (warm)', normalize_dates, dates)
+    measure('normalize_times', normalize_times, times)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Memory and serialization throughput of the event data representations
+
+Builds --count synthetic events by decoding JSON, as they arrive from the
+API and the model, and measures with tracemalloc how much memory they
+hold as plain dicts, as the previous non-slotted dataclass, as slotted
+EventData objects and as one columnar EventBatch. Figures are scaled to
+1M events. Then times encoding and decoding with each codec.
+
+Venues, dates, locations and owners repeat across events as they do in
+practice; names and emails are mostly unique.
+
+Usage:
+    python benchmarks/bench_event_model.py
+    python benchmarks/bench_event_model.py --count 1000000 --codec-count 200000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import make_dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from models.data_model import EVENT_FIELDS, EventBatch, EventData
+
+# EventData as it was before it was slotted, for comparison
+DataclassEvent = make_dataclass('DataclassEvent', [(name, str, default) for name, default in EVENT_FIELDS])
+
+
+def event_lines(count, seed=0):
+    """count events as JSON lines"""
+    rng = random.Random(seed)
+    venues = [f"Venue {n}" for n in range(500)]
+    locations = [f"City {n}, Country" for n in range(50)]
+    artists = [f"Artist {n}" for n in range(5000)]
+    lines = []
+    for i in range(count):
+        artist = rng.choice(artists)
+        venue = rng.choice(venues)
+        lines.append(json.dumps({
+            'event_name': f"Show number {i}",
+            'artist_name': artist,
+            'venue_name': venue,
+            'venue_owner': f"Owner {rng.randrange(300)}" if rng.random() < 0.6 else 'Not specified',
+            'date': f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            'time': f"{rng.randrange(6, 12)}:{rng.choice(('00', '30'))} PM",
+            'location': rng.choice(locations),
+            'artist_email': f"{artist.replace(' ', '').lower()}@example.com" if rng.random() < 0.4 else '',
+            'venue_email': f"bookings@{venue.replace(' ', '').lower()}.com" if rng.random() < 0.5 else ''
+        }))
+    return lines
+
+
+BUILDERS = {
+    'dict': lambda lines: [json.loads(line) for line in lines],
+    'dataclass': lambda lines: [DataclassEvent(**json.loads(line)) for line in lines],
+    'EventData': lambda lines: [EventData.from_dict(json.loads(line)) for line in lines],
+    'EventBatch': lambda lines: EventBatch.from_dicts(json.loads(line) for line in lines),
+}
+
+
+def measure_memory(lines):
+    """
+    Bytes held per representation of the events in lines
+
+    Returns:
+        dict: Representation -> {'bytes_per_event', 'mb_per_million', 'build_s'}
+    """
+    results = {}
+    for name, build in BUILDERS.items():
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        events = build(lines)
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del events
+        per_event = held / len(lines)
+        results[name] = {
+            'bytes_per_event': per_event,
+            'mb_per_million': per_event * 1_000_000 / 2 ** 20,
+            'build_s': elapsed
+        }
+    return results
+
+
+def timed(func, repeat):
+    """Best wall time of repeat calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure_codecs(lines, repeat):
+    """
+    Encode and decode throughput of every codec
+
+    Returns:
+        dict: Codec -> {'encode_per_s', 'decode_per_s', 'bytes_per_event'}
+    """
+    dicts = [json.loads(line) for line in lines]
+    events = [EventData.from_dict(data) for data in dicts]
+    batch = EventBatch.from_events(events)
+
+    codecs = {
+        'dict json': (
+            lambda: [json.dumps(data, ensure_ascii=False) for data in dicts],
+            lambda encoded: [json.loads(text) for text in encoded]
+        ),
+        'EventData json': (
+            lambda: [event.to_json() for event in events],
+            lambda encoded: [EventData.from_json(text) for text in encoded]
+        ),
+        'EventData bytes': (
+            lambda: [event.to_bytes() for event in events],
+            lambda encoded: [EventData.from_bytes(data) for data in encoded]
+        ),
+        'EventBatch json': (batch.to_json, EventBatch.from_json),
+        'EventBatch bytes': (batch.to_bytes, EventBatch.from_bytes),
+    }
+
+    results = {}
+    for name, (encode, decode) in codecs.items():
+        encoded = encode()
+        size = len(encoded) if isinstance(encoded, (str, bytes)) else sum(map(len, encoded))
+        results[name] = {
+            'encode_per_s': len(events) / timed(encode, repeat),
+            'decode_per_s': len(events) / timed(lambda: decode(encoded), repeat),
+            'bytes_per_event': size / len(events)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=1_000_000, help='Events held for the memory comparison')
+    parser.add_argument('--codec-count', type=int, default=100_000, help='Events encoded per codec run')
+    parser.add_argument('--repeat', type=int, default=3, help='Codec runs; the fastest counts')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    lines = event_lines(max(args.count, args.codec_count))
+    results = {
+        'memory': measure_memory(lines[:args.count]),
+        'codecs': measure_codecs(lines[:args.codec_count], args.repeat)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"memory, {args.count} events")
+    for name, result in results['memory'].items():
+        print(
+            f"{name:>18}: {result['bytes_per_event']:7.0f} B/event  {result['mb_per_million']:8.1f} MB per 1M  "
+            f"built in {result['build_s']:.2f}s"
+        )
+    print(f"codecs, {args.codec_count} events")
+    for name, result in results['codecs'].items():
+        print(
+            f"{name:>18}: encode {result['encode_per_s']:10.0f}/s  decode {result['decode_per_s']:10.0f}/s  "
+            f"{result['bytes_per_event']:6.1f} B/event"
+        )
+
+
+if __name__ == '__main__':
+    main()
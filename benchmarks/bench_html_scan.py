@@ -0,0 +1,139 @@
+"""
+Benchmark streaming contact extraction against BeautifulSoup
+
+Each approach runs in its own subprocess over the same corpus of saved
+pages so peak RSS is measured independently. Without --corpus, a corpus
+of synthetic venue pages is generated in a temporary folder.
+
+Usage:
+    python benchmarks/bench_html_scan.py --corpus path/to/saved_pages
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+CHUNK_SIZE = 16 * 1024
+
+
+def generate_corpus(folder, pages, size_kb):
+    """Write synthetic venue pages with the contact block at a random depth"""
+    rng = random.Random(42)
+    filler = (
+        '<div class="event"><h3>Live night {i}</h3><p>Doors open at 8pm. '
+        'Tickets at the box office. <a href="/events/{i}">Details</a></p>'
+        '<img src="/img/poster{i}@2x.png"></div>\n'
+    )
+    for n in range(pages):
+        blocks = []
+        size = 0
+        i = 0
+        while size < size_kb * 1024:
+            block = filler.format(i=i)
+            blocks.append(block)
+            size += len(block)
+            i += 1
+        contact = (
+            f'<p>Bookings: <a href="mailto:booking@venue{n}.org">email us</a> '
+            f'or press [at] venue{n} [dot] org</p>'
+        )
+        blocks.insert(rng.randrange(len(blocks)), contact)
+        page = '<html><head><title>Venue</title></head><body>' + ''.join(blocks) + '</body></html>'
+        with open(os.path.join(folder, f"venue{n}.html"), 'w') as f:
+            f.write(page)
+
+
+def scan_beautifulsoup(path):
+    from bs4 import BeautifulSoup
+    from utils.helpers import extract_emails_from_text
+
+    with open(path, 'rb') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    emails = [a['href'][7:] for a in soup.find_all('a', href=True) if a['href'].startswith('mailto:')]
+    emails.extend(extract_emails_from_text(soup.get_text(' ')))
+    return emails
+
+
+def scan_streaming(path):
+    from services.html_scanner import ContactScanner
+
+    scanner = ContactScanner('http://venue.test/', collect_links=False)
+    with open(path, 'rb') as f:
+        while not scanner.done:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            scanner.feed(chunk)
+    return scanner.close()[0]
+
+
+def run_mode(mode, corpus):
+    scan = scan_beautifulsoup if mode == 'bs4' else scan_streaming
+    paths = sorted(glob.glob(os.path.join(corpus, '*.htm*')))
+    # Same import baseline for both modes
+    import services  # noqa: F401
+    # Warm imports so they don't count towards the scan
+    scan(paths[0])
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    total_bytes = 0
+    found = 0
+    start = time.perf_counter()
+    for path in paths:
+        total_bytes += os.path.getsize(path)
+        found += bool(scan(path))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'pages': len(paths),
+        'found': found,
+        'pages_per_second': len(paths) / elapsed,
+        'mb_per_second': total_bytes / 1024 / 1024 / elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='Folder of saved .html pages')
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--size-kb', type=int, default=1024)
+    parser.add_argument('--mode', choices=['bs4', 'stream'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.corpus)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if not corpus:
+            corpus = tmp
+            generate_corpus(corpus, args.pages, args.size_kb)
+
+        for mode in ('bs4', 'stream'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--corpus', corpus],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{result['mode']:>7}: {result['pages']} pages, {result['found']} with contacts, "
+                f"{result['pages_per_second']:.1f} pages/s, {result['mb_per_second']:.1f} MB/s, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB (+{result['rss_growth_mb']:.0f} MB while scanning)"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Peak memory per image: full decode vs the OCR decode layer
+
+Generates poster-like images (large JPEG photos, a PNG scan) and decodes
+each in a fresh interpreter, reporting the peak RSS growth of:
+
+  legacy  Image.open(BytesIO(bytes)).convert('RGB'), as OCR used to do
+  bounded utils.image_decode.load_for_ocr with the Config limits
+
+Only decoding is measured; tesseract runs in its own process. Peak RSS
+is read from /proc, so this runs on Linux only.
+
+Usage:
+    python benchmarks/bench_image_memory.py [--megapixels 12 24 50]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from PIL import Image, ImageDraw
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+
+DECODE = '''
+import io, json, sys
+from PIL import Image
+from config import Config
+from utils.image_decode import ImageTooLarge, load_for_ocr
+
+def peak_kib():
+    # VmHWM starts fresh at exec; ru_maxrss would inherit the parent's peak
+    with open('/proc/self/status') as status:
+        return int(next(line for line in status if line.startswith('VmHWM')).split()[1])
+
+with open(sys.argv[2], 'rb') as f:
+    data = f.read()
+before = peak_kib()
+try:
+    if sys.argv[1] == 'legacy':
+        image = Image.open(io.BytesIO(data))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.load()
+    else:
+        image = load_for_ocr(data, Config.OCR_MAX_PIXELS, Config.OCR_MAX_LONG_EDGE)
+    outcome = f"{image.size[0]}x{image.size[1]} {image.mode}"
+except ImageTooLarge:
+    outcome = 'rejected'
+after = peak_kib()
+print(json.dumps({'peak_kib': after - before, 'outcome': outcome}))
+'''
+
+
+def make_poster(path, megapixels, fmt):
+    """Write a noisy poster of about megapixels MP, text-like strokes on a photo"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    image = Image.effect_noise((width, height), 40).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for row in range(0, height, max(height // 30, 1)):
+        draw.rectangle([width // 10, row, width * 9 // 10, row + height // 80], fill='black')
+    image.save(path, fmt, quality=90) if fmt == 'JPEG' else image.save(path, fmt)
+    return width, height
+
+
+def peak(method, path):
+    output = subprocess.run(
+        [sys.executable, '-c', DECODE, method, path],
+        cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[12, 24, 50])
+    parser.add_argument('--png-megapixels', type=float, default=12,
+                        help='Size of the PNG scan case (PNG has no draft mode)')
+    args = parser.parse_args()
+
+    cases = [(mp, 'JPEG') for mp in args.megapixels] + [(args.png_megapixels, 'PNG')]
+    print(f"{'image':>20} {'file':>8} {'legacy peak':>12} {'bounded peak':>13}  decoded as")
+    with tempfile.TemporaryDirectory() as folder:
+        for megapixels, fmt in cases:
+            path = os.path.join(folder, f"poster_{megapixels:g}.{fmt.lower()}")
+            width, height = make_poster(path, megapixels, fmt)
+            legacy = peak('legacy', path)
+            bounded = peak('bounded', path)
+            print(
+                f"{f'{width}x{height} {fmt}':>20} {os.path.getsize(path) / 2**20:7.1f}M "
+                f"{legacy['peak_kib'] / 1024:10.1f}MB {bounded['peak_kib'] / 1024:11.1f}MB  "
+                f"{bounded['outcome']}"
+            )
+
+
+if __name__ == '__main__':
+    main()
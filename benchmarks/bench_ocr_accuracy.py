@@ -0,0 +1,273 @@
+"""
+OCR latency vs accuracy over Tesseract settings, preprocessing and resolution
+
+Runs real Tesseract over a synthetic poster corpus (benchmarks/poster_corpus.py)
+for every combination of page segmentation mode (--psm), preprocessing
+(--preprocess) and upload resolution (--long-edges, the long edge the client
+downscales to before upload), and reports for each:
+
+    latency      decode + preprocessing + OCR per poster, p50 and p95
+    char acc     1 - character edit distance / length of the drawn text
+    field recall share of the ground-truth text fields found in the OCR text
+    fast path    share of dates, times and emails the deterministic
+                 extractors (utils.datetime_normalizer, extract_emails_from_text)
+                 recover from the OCR text without the LLM
+
+Decoding goes through utils.image_decode.load_for_ocr with the backend's
+Config limits, as in services/ocr_service.py.
+
+Usage:
+    python benchmarks/bench_ocr_accuracy.py --count 30 --difficulty 0.5
+    python benchmarks/bench_ocr_accuracy.py --corpus corpus/ --psm 6 11 --preprocess none binarize
+"""
+
+import argparse
+import io
+import json
+import re
+import sys
+import time
+
+from PIL import Image, ImageFilter, ImageOps
+
+import poster_corpus
+
+from config import Config
+from utils.datetime_normalizer import normalize_date, normalize_time
+from utils.helpers import extract_emails_from_text
+from utils.image_decode import load_for_ocr
+
+TEXT_FIELDS = ('event_name', 'artist_name', 'venue_name', 'venue_owner', 'location', 'artist_email', 'venue_email')
+
+# Separators between the date and time on one poster line
+_SEGMENT = re.compile(r'\s+(?:\||-|at|@)\s+|\n')
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_TIME = re.compile(r'^\d{1,2}:\d{2} [AP]M$')
+_SPACES = re.compile(r'\s+')
+
+
+def _gray(image):
+    return image.convert('L')
+
+
+def _autocontrast(image):
+    return ImageOps.autocontrast(image.convert('L'), cutoff=1)
+
+
+def _binarize(image):
+    """Otsu threshold on the autocontrasted grayscale image"""
+    image = _autocontrast(image)
+    histogram = image.histogram()
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    best, threshold = 0, 128
+    background = weighted = 0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0 or background == total:
+            continue
+        weighted += level * count
+        mean_back = weighted / background
+        mean_fore = (weighted_total - weighted) / (total - background)
+        variance = background * (total - background) * (mean_back - mean_fore) ** 2
+        if variance > best:
+            best, threshold = variance, level
+    return image.point(lambda value: 255 if value > threshold else 0)
+
+
+def _sharpen(image):
+    return image.convert('L').filter(ImageFilter.UnsharpMask(radius=2, percent=150, threshold=3))
+
+
+def _upscale(image):
+    """Double small images; Tesseract prefers ~30 px capital letters"""
+    image = image.convert('L')
+    if max(image.size) < 2000:
+        image = image.resize((image.width * 2, image.height * 2), Image.LANCZOS)
+    return image
+
+
+PREPROCESSORS = {
+    'none': lambda image: image,
+    'gray': _gray,
+    'autocontrast': _autocontrast,
+    'binarize': _binarize,
+    'sharpen': _sharpen,
+    'upscale': _upscale
+}
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def _normalize_text(text):
+    return _SPACES.sub(' ', text).strip().lower()
+
+
+def char_accuracy(ocr_text, truth_text):
+    """1 - edit distance / truth length, case and whitespace insensitive; may go below 0"""
+    truth = _normalize_text(truth_text)
+    return 1 - edit_distance(_normalize_text(ocr_text), truth) / max(len(truth), 1)
+
+
+def field_recall(ocr_text, event):
+    """
+    Share of the event's non-empty text fields that appear in the OCR text
+
+    Returns:
+        tuple: (fields found, fields present on the poster)
+    """
+    text = _normalize_text(ocr_text)
+    expected = [
+        getattr(event, field) for field in TEXT_FIELDS
+        if getattr(event, field) and getattr(event, field) != 'Not specified'
+    ]
+    return sum(1 for value in expected if _normalize_text(value) in text), len(expected)
+
+
+def fast_path(ocr_text):
+    """
+    Date, time and emails the deterministic extractors find in OCR text
+
+    Returns:
+        dict: date (YYYY-MM-DD or ''), time ("7:30 PM" or ''), emails (set)
+    """
+    found = {'date': '', 'time': '', 'emails': {email.lower() for email in extract_emails_from_text(ocr_text)}}
+    for segment in _SEGMENT.split(ocr_text):
+        segment = segment.strip()
+        if not segment:
+            continue
+        if not found['date'] and _ISO_DATE.match(normalize_date(segment)):
+            found['date'] = normalize_date(segment)
+        elif not found['time'] and _TIME.match(normalize_time(segment)):
+            found['time'] = normalize_time(segment)
+    return found
+
+
+def fast_path_hits(ocr_text, event):
+    """
+    Returns:
+        tuple: (values recovered correctly, values on the poster)
+    """
+    found = fast_path(ocr_text)
+    expected_emails = {email for email in (event.artist_email, event.venue_email) if email}
+    hits = (found['date'] == event.date) + (found['time'] == event.time) + len(expected_emails & found['emails'])
+    return hits, 2 + len(expected_emails)
+
+
+def downscale(image_bytes, long_edge):
+    """The upload the client sends for this poster at long_edge px, as in its image optimizer"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if max(image.size) <= long_edge:
+        return image_bytes
+    fmt = image.format
+    image.thumbnail((long_edge, long_edge), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def evaluate(corpus, psm, preprocess, long_edge, ocr):
+    """
+    OCR every poster with one configuration
+
+    Args:
+        corpus (list): (image bytes, EventData, lines drawn) tuples
+        psm (int): Tesseract page segmentation mode
+        preprocess (str): Key of PREPROCESSORS
+        long_edge (int): Upload long edge in px
+        ocr (callable): image, config -> text, i.e. pytesseract.image_to_string
+
+    Returns:
+        dict: Latency percentiles and accuracy metrics
+    """
+    latencies = []
+    accuracy = 0.0
+    fields = [0, 0]
+    fast = [0, 0]
+    config = f"--oem 3 --psm {psm}"
+    for image_bytes, event, lines in corpus:
+        upload = downscale(image_bytes, long_edge)
+        started = time.perf_counter()
+        image = load_for_ocr(upload, Config.OCR_MAX_PIXELS, Config.OCR_MAX_LONG_EDGE)
+        text = ocr(PREPROCESSORS[preprocess](image), config=config)
+        latencies.append(time.perf_counter() - started)
+
+        accuracy += char_accuracy(text, '\n'.join(lines))
+        for totals, (hits, expected) in ((fields, field_recall(text, event)), (fast, fast_path_hits(text, event))):
+            totals[0] += hits
+            totals[1] += expected
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        'psm': psm,
+        'preprocess': preprocess,
+        'long_edge': long_edge,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'char_accuracy': accuracy / len(corpus),
+        'field_recall': fields[0] / max(fields[1], 1),
+        'fast_path': fast[0] / max(fast[1], 1)
+    }
+
+
+def load_corpus(args):
+    if args.corpus:
+        return [(data, event, lines) for data, event, lines, _ in poster_corpus.read_corpus(args.corpus)]
+    posters = poster_corpus.generate(args.count, args.seed, args.difficulty, args.fonts)
+    return [(poster.encode(), poster.event, poster.lines) for poster in posters]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='Directory written by poster_corpus.py; default: generate one')
+    parser.add_argument('--count', type=int, default=20, help='Posters to generate without --corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--difficulty', type=float, default=0.5)
+    parser.add_argument('--fonts', action='append', default=[], help='Extra font directory, repeatable')
+    parser.add_argument('--psm', type=int, nargs='+', default=[3, 4, 6, 11])
+    parser.add_argument('--preprocess', nargs='+', choices=sorted(PREPROCESSORS), default=['none', 'autocontrast', 'binarize'])
+    parser.add_argument('--long-edges', type=int, nargs='+', default=[1200, 2000, 3000])
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        sys.exit(f"Tesseract is not available ({e}); install it to run this benchmark")
+
+    corpus = load_corpus(args)
+    results = [
+        evaluate(corpus, psm, preprocess, long_edge, pytesseract.image_to_string)
+        for psm in args.psm for preprocess in args.preprocess for long_edge in args.long_edges
+    ]
+    results.sort(key=lambda result: (-result['char_accuracy'], result['p50_ms']))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(corpus)} posters, best character accuracy first")
+    print(f"{'psm':>4} {'preprocess':>12} {'edge':>5} {'p50 ms':>8} {'p95 ms':>8} {'char acc':>9} {'fields':>7} {'fast':>6}")
+    for result in results:
+        print(
+            f"{result['psm']:>4} {result['preprocess']:>12} {result['long_edge']:>5} "
+            f"{result['p50_ms']:8.0f} {result['p95_ms']:8.0f} {result['char_accuracy']:9.1%} "
+            f"{result['field_recall']:7.1%} {result['fast_path']:6.1%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Offline latency and throughput benchmark with regression baselines
+
+Runs /api/extract, /api/generate-email and /api/send-email against the
+Flask app with Gemini, Tesseract, contact discovery, Google Sheets and
+SMTP replaced by the local fakes in benchmarks/fakes.py, each with a
+fixed latency. Reports end-to-end latency percentiles and throughput per
+endpoint plus the mean time of every backend stage, taken from the
+in-process stage metrics.
+
+Results are compared with a stored baseline; any latency more than
+--tolerance above it, or throughput that much below it, fails the run
+with exit status 1. Baselines depend on the machine: record one with
+--update-baseline before relying on the comparison.
+
+Usage:
+    python benchmarks/bench_offline.py
+    python benchmarks/bench_offline.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from fakes import add_latency_arguments, canned_corpus, latencies, offline_backend
+
+from utils.metrics import FIRST_BUCKET, STAGES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'offline.json')
+
+# Differences below this are timer noise, whatever the tolerance
+SLACK_MS = 1.0
+
+
+def scenarios(corpus):
+    """Endpoint name -> function building the JSON body of request i"""
+    def extract(i):
+        return {'image': corpus[i % len(corpus)].data_url}
+
+    def generate_email(i):
+        return {'template_type': 'good_artist', 'event_data': corpus[i % len(corpus)].event}
+
+    def send_email(i):
+        event = corpus[i % len(corpus)].event
+        return {'to': event['artist_email'], 'subject': f"Re: {event['event_name']}", 'body': 'See you there'}
+
+    return {'extract': extract, 'generate-email': generate_email, 'send-email': send_email}
+
+
+def drive(app, path, make_body, requests, concurrency, min_time=0):
+    """
+    Send requests from concurrency threads, each with its own test client
+
+    Keeps going past requests until min_time seconds have passed, so fast
+    endpoints are measured over more than a few milliseconds.
+
+    Returns:
+        tuple: (sorted latencies in seconds, wall time, error count)
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    sent = [0]
+    deadline = time.perf_counter() + min_time
+
+    def next_index():
+        with lock:
+            if sent[0] < requests or time.perf_counter() < deadline:
+                sent[0] += 1
+                return sent[0] - 1
+        return None
+
+    def client():
+        test_client = app.test_client()
+        local = []
+        for i in iter(next_index, None):
+            started = time.perf_counter()
+            response = test_client.post(path, json=make_body(i))
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                local.append(elapsed)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), time.perf_counter() - started, errors[0]
+
+
+def summarize(latencies, wall, errors):
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / wall,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0
+    }
+
+
+def stage_means(before, after):
+    """Mean milliseconds per stage call between two STAGES.totals() snapshots"""
+    means = {}
+    for stage, cells in after.items():
+        previous = before.get(stage, [0] * len(cells))
+        calls = sum(cells[FIRST_BUCKET:-1]) - sum(previous[FIRST_BUCKET:-1])
+        if calls:
+            means[stage] = {'calls': calls, 'mean_ms': (cells[-1] - previous[-1]) / calls * 1000}
+    return means
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def run(args):
+    corpus = canned_corpus(args.corpus)
+    results = {'endpoints': {}, 'stages': {}}
+    with offline_backend(corpus, **latencies(args)) as (app, fakes):
+        for name, make_body in scenarios(corpus).items():
+            drive(app.app, f"/api/{name}", make_body, args.concurrency, args.concurrency)  # warm up
+        wait_for(lambda: len(fakes['sheet'].rows) >= args.concurrency)
+
+        # Best of several rounds: on a busy machine the slowest round
+        # mostly measures the neighbours
+        for _ in range(args.repeat):
+            before, rows = STAGES.totals(), len(fakes['sheet'].rows)
+            extracted = 0
+            for name, make_body in scenarios(corpus).items():
+                result = summarize(*drive(
+                    app.app, f"/api/{name}", make_body, args.requests, args.concurrency, args.min_time
+                ))
+                results['endpoints'][name] = best(results['endpoints'].get(name), result)
+                extracted += result['requests'] if name == 'extract' else 0
+            # The Sheets write runs after the response has been sent
+            wait_for(lambda: len(fakes['sheet'].rows) >= rows + extracted)
+            for stage, result in stage_means(before, STAGES.totals()).items():
+                results['stages'][stage] = best(results['stages'].get(stage), result)
+    return results
+
+
+def best(previous, current):
+    """Merge two rounds' results, keeping the best value of every metric"""
+    if previous is None:
+        return current
+    merged = dict(current)
+    for key, value in previous.items():
+        if key == 'rps':
+            merged[key] = max(value, current[key])
+        elif key.endswith('_ms'):
+            merged[key] = min(value, current[key])
+        elif key == 'errors':
+            merged[key] = value + current[key]
+        else:
+            merged[key] = max(value, current[key])
+    return merged
+
+
+def rounded(value):
+    if isinstance(value, float):
+        return round(value, 3)
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    return value
+
+
+def settings(args):
+    """Everything a baseline is only valid for"""
+    return dict(
+        {key: getattr(args, key) for key in ('requests', 'concurrency', 'min_time', 'repeat', 'corpus')},
+        **latencies(args)
+    )
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Compare results with a baseline
+
+    Returns:
+        list: One message per metric that got worse by more than tolerance
+    """
+    found = []
+
+    def check_latency(label, current, base):
+        if current > base * (1 + tolerance) + SLACK_MS:
+            found.append(f"{label}: {current:.1f} ms, baseline {base:.1f} ms")
+
+    for name, base in baseline['endpoints'].items():
+        current = results['endpoints'].get(name)
+        if current is None:
+            found.append(f"{name}: not measured")
+            continue
+        if current['errors']:
+            found.append(f"{name}: {current['errors']} failed requests")
+        for key in ('p50_ms', 'p95_ms'):
+            check_latency(f"{name} {key[:3]}", current[key], base[key])
+        if current['rps'] < base['rps'] / (1 + tolerance):
+            found.append(f"{name} throughput: {current['rps']:.1f} req/s, baseline {base['rps']:.1f} req/s")
+
+    for stage, base in baseline['stages'].items():
+        current = results['stages'].get(stage)
+        if current is None:
+            found.append(f"stage {stage}: not measured")
+        else:
+            check_latency(f"stage {stage} mean", current['mean_ms'], base['mean_ms'])
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=40, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--min-time', type=float, default=0.5, help='Minimum seconds per endpoint and round')
+    parser.add_argument('--repeat', type=int, default=3, help='Rounds; the best value of each metric counts')
+    parser.add_argument('--corpus', type=int, default=8, help='Distinct canned posters')
+    add_latency_arguments(parser)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results['endpoints'].items():
+            print(
+                f"{name:>15}: {result['rps']:7.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+                f"p95 {result['p95_ms']:7.1f} ms  errors {result['errors']}"
+            )
+        for stage, result in sorted(results['stages'].items()):
+            print(f"{'stage ' + stage:>15}: {result['mean_ms']:7.2f} ms mean over {result['calls']} calls")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(rounded(dict(results, settings=settings(args))), f, indent=2)
+            f.write('\n')
+        print(f"baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --update-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings(args):
+        sys.exit(f"baseline was recorded with {baseline.get('settings')}; rerun with the same settings")
+
+    found = regressions(results, baseline, args.tolerance)
+    for message in found:
+        print(f"REGRESSION {message}")
+    if found:
+        sys.exit(1)
+    print(f"no regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark bulk mail-merge rendering
+
+Renders N events against every template and reports renders per second
+and the peak traced memory, which should stay flat as N grows.
+
+Usage:
+    python benchmarks/bench_render.py --events 25000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import COMPILED_TEMPLATES, EMAIL_TEMPLATES
+from services.render_service import render_batch, to_ndjson
+
+
+def make_events(count):
+    """Generate synthetic events lazily"""
+    for i in range(count):
+        yield {
+            'event_name': f"Summer Fest {i}",
+            'artist_name': f"Artist {i}",
+            'venue_name': f"Venue {i % 500}",
+            'venue_owner': f"Owner {i % 500}",
+            'date': '2024-07-15',
+            'time': '7:00 PM',
+            'location': 'Chennai, India',
+            'artist_email': f"artist{i}@example.com",
+            'venue_email': f"venue{i % 500}@example.com"
+        }
+
+
+def run(event_count):
+    # The templates the endpoints serve, not the older set in templates/
+    template_ids = list(EMAIL_TEMPLATES.keys())
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    renders = 0
+    output_bytes = 0
+    for line in to_ndjson(render_batch(make_events(event_count), template_ids, COMPILED_TEMPLATES)):
+        renders += 1
+        output_bytes += len(line)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'renders': renders,
+        'seconds': elapsed,
+        'renders_per_second': renders / elapsed,
+        'output_mb': output_bytes / 1024 / 1024,
+        'peak_kb': peak / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=25000)
+    args = parser.parse_args()
+
+    # Peak memory at two sizes shows whether it grows with the batch
+    for count in (args.events // 10, args.events):
+        result = run(count)
+        print(
+            f"{result['renders']:>8} renders  "
+            f"{result['renders_per_second']:>10.0f} renders/s  "
+            f"{result['output_mb']:>8.1f} MB streamed  "
+            f"peak {result['peak_kb']:.0f} KB"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare backend throughput under the dev server and the production server
+
+Starts each server in a subprocess on a free port, drives it with
+concurrent keep-alive clients for a fixed duration and reports requests
+per second and latency percentiles. The default workload renders a batch
+of email templates (CPU-bound, no external services), which is where a
+single GIL-bound process hurts most.
+
+Usage:
+    python benchmarks/bench_server.py --clients 32 --duration 10
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+
+DEV_SERVER = (
+    'import sys; from app import app; '
+    'app.run(host="127.0.0.1", port=int(sys.argv[1]), threaded=True)'
+)
+
+EVENT = {
+    'event_name': 'Summer Jam', 'artist_name': 'The Midnight Owls',
+    'venue_name': 'Blue Room', 'venue_owner': 'Sam Lee', 'date': '2025-07-15',
+    'time': '8:00 PM', 'location': 'Austin, TX', 'artist_email': 'owls@band.test',
+    'venue_email': 'bookings@blueroom.test'
+}
+
+
+def workload(name, batch_size):
+    """Returns (method, path, json body) for a workload"""
+    if name == 'health':
+        return 'GET', '/api/health', None
+    if name == 'email':
+        return 'POST', '/api/generate-email', {'template_type': 'good_artist', 'event_data': EVENT}
+    return 'POST', '/api/generate-email/batch', {
+        'template_ids': ['good_artist', 'good_venue'],
+        'events': [dict(EVENT, event_name=f"Show {i}") for i in range(batch_size)]
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, workers, threads):
+    if mode == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER, str(port)]
+    else:
+        command = [
+            sys.executable, 'server.py', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--threads', str(threads)
+        ]
+    process = subprocess.Popen(command, cwd=BACKEND, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1)
+            return process
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def drive(port, request, clients, duration):
+    method, path, body = request
+    url = f"http://127.0.0.1:{port}{path}"
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, json=body, timeout=30)
+                response.content
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workload', choices=['health', 'email', 'batch'], default='batch')
+    parser.add_argument('--batch-size', type=int, default=200, help='Events per batch request')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per server')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    request = workload(args.workload, args.batch_size)
+    results = {}
+    for mode in ('dev', 'production'):
+        port = free_port()
+        process = start_server(mode, port, args.workers, args.threads)
+        try:
+            drive(port, request, args.clients, min(2, args.duration))  # warm up
+            results[mode] = drive(port, request, args.clients, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=120)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"workload={args.workload} clients={args.clients} workers={args.workers} threads={args.threads}")
+    for mode, result in results.items():
+        print(
+            f"{mode:>10}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+            f"p95 {result['p95_ms']:7.1f} ms  errors {result['errors']}"
+        )
+    print(f"speedup: {results['production']['rps'] / max(results['dev']['rps'], 1e-9):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Measure backend cold start and fail if it exceeds a budget
+
+Imports the app in fresh interpreters and reports the median import time.
+Exits with status 1 when the median is over --budget-ms or when a heavy
+client library (Gemini, OpenAI, Tesseract, gspread, ...) is imported at
+startup instead of on first use, so it can gate CI.
+
+With --report, also prints an import-time profile from `python -X
+importtime`: the slowest modules by cumulative time and the total
+self time per top-level package.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 800 --report
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+
+# Must only be imported by the code paths that use them
+LAZY_MODULES = [
+    'google.generativeai', 'openai', 'pytesseract', 'gspread', 'oauth2client',
+    'bs4', 'pandas', 'aiohttp', 'PIL.Image'
+]
+
+MEASURE = '''
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'import_ms': elapsed * 1000,
+    'loaded': [name for name in {lazy!r} if name in sys.modules]
+}}))
+'''
+
+
+def cold_start(module):
+    """Import module in a fresh interpreter, returns (import ms, wall ms, eager heavy modules)"""
+    code = MEASURE.format(module=module, lazy=LAZY_MODULES)
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout
+    wall = (time.perf_counter() - started) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['import_ms'], wall, result['loaded']
+
+
+def import_profile(module):
+    """
+    Parse `python -X importtime` for one cold import
+
+    Returns:
+        list: (module name, self us, cumulative us) in import order
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_report(module, top):
+    rows = import_profile(module)
+
+    print(f"Slowest imports for '{module}' (cumulative, includes dependencies):")
+    for name, _, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    packages = {}
+    for name, self_us, _ in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    print("\nSelf time per top-level package:")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='app', help="Entry module to import ('app' or 'asgi')")
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, default=800,
+                        help='Fail if the median import time exceeds this')
+    parser.add_argument('--report', action='store_true', help='Print the import-time profile')
+    parser.add_argument('--top', type=int, default=20, help='Rows per report table')
+    args = parser.parse_args()
+
+    if args.report:
+        print_report(args.module, args.top)
+
+    cold_start(args.module)  # warm the OS file cache and .pyc files
+    imports, walls, eager = [], [], set()
+    for _ in range(args.runs):
+        import_ms, wall_ms, loaded = cold_start(args.module)
+        imports.append(import_ms)
+        walls.append(wall_ms)
+        eager.update(loaded)
+
+    median = statistics.median(imports)
+    print(
+        f"import {args.module}: median {median:.0f} ms (min {min(imports):.0f}, max {max(imports):.0f}), "
+        f"process wall median {statistics.median(walls):.0f} ms over {args.runs} runs"
+    )
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: cold start {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported at startup instead of on first use: {', '.join(sorted(eager))}")
+        failed = True
+    if not failed:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
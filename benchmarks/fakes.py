@@ -0,0 +1,417 @@
+"""
+Deterministic local stand-ins for every external dependency of the backend
+
+  FakeModel          Gemini model: reads the fields back out of the OCR text
+  FakeWorksheet      in-memory gspread worksheet
+  SmtpSink           local SMTP server with STARTTLS and AUTH that keeps messages
+  FakeOCR            pytesseract.image_to_string returning the corpus text
+  FakeContactLookup  contact discovery returning the corpus emails
+
+Each fake takes a fixed latency in seconds, so benchmark numbers measure
+the backend rather than the network. offline_backend() installs all of
+them into the Flask app and restores the real clients afterwards.
+"""
+
+import asyncio
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import socketserver
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.image_decode import load_for_ocr
+
+FIELDS = ('event_name', 'artist_name', 'venue_name', 'venue_owner', 'date', 'time', 'location')
+
+LABELS = {
+    'event_name': 'Event', 'artist_name': 'Artist', 'venue_name': 'Venue',
+    'venue_owner': 'Host', 'date': 'Date', 'time': 'Time', 'location': 'Location'
+}
+
+
+def poster_event(i):
+    """Ground truth for poster i of the canned corpus"""
+    return {
+        'event_name': f"Summer Jam {i}",
+        'artist_name': f"The Midnight Owls {i}",
+        'venue_name': f"Blue Room {i % 7}",
+        'venue_owner': f"Sam Lee {i % 7}",
+        'date': f"2025-07-{i % 28 + 1:02d}",
+        'time': '8:00 PM',
+        'location': 'Austin, TX',
+        'artist_email': f"owls{i}@band.test",
+        'venue_email': f"bookings{i % 7}@blueroom.test"
+    }
+
+
+def poster_text(event):
+    return '\n'.join(f"{LABELS[field]}: {event[field]}" for field in FIELDS)
+
+
+class Poster:
+    """One canned poster: encoded image, its data URL and the expected extraction"""
+
+    def __init__(self, event, image_bytes, mime_type):
+        self.event = event
+        self.text = poster_text(event)
+        self.image_bytes = image_bytes
+        self.data_url = f"data:{mime_type};base64,{base64.b64encode(image_bytes).decode()}"
+
+
+def canned_corpus(count=8, size=(1200, 1600)):
+    """
+    Poster images with their text drawn on, alternating PNG and JPEG
+
+    Returns:
+        list: Poster objects, one per index
+    """
+    posters = []
+    for i in range(count):
+        event = poster_event(i)
+        image = Image.new('RGB', size, (250, 245, 235))
+        draw = ImageDraw.Draw(image)
+        for line_number, line in enumerate(poster_text(event).splitlines()):
+            draw.text((60, 80 + line_number * 60), line, fill=(20, 20, 20))
+        buffer = io.BytesIO()
+        fmt, mime_type = ('PNG', 'image/png') if i % 2 == 0 else ('JPEG', 'image/jpeg')
+        image.save(buffer, fmt, quality=90)
+        posters.append(Poster(event, buffer.getvalue(), mime_type))
+    return posters
+
+
+def sized_poster(i, image_bytes, width=1200):
+    """
+    Poster i as a PNG of roughly image_bytes, padded with a band of noise
+
+    Used to replay recorded uploads at their original size.
+    """
+    event = poster_event(i)
+    noise_rows = max(0, image_bytes // (3 * width) - 8)
+    image = Image.new('RGB', (width, 600 + noise_rows), (250, 245, 235))
+    draw = ImageDraw.Draw(image)
+    for line_number, line in enumerate(poster_text(event).splitlines()):
+        draw.text((60, 80 + line_number * 60), line, fill=(20, 20, 20))
+    if noise_rows:
+        size = 3 * width * noise_rows
+        # Same bytes as Random.randbytes, which needs Python 3.9
+        noise = random.Random(i).getrandbits(8 * size).to_bytes(size, 'little')
+        image.paste(Image.frombytes('RGB', (width, noise_rows), noise), (0, 600))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=1)
+    return Poster(event, buffer.getvalue(), 'image/png')
+
+
+def _image_key(image):
+    # A box-filtered thumbnail still differs per poster and hashes in
+    # microseconds rather than the milliseconds of the full bitmap
+    return hashlib.blake2b(image.reduce(8).tobytes(), digest_size=16).digest()
+
+
+class FakeOCR:
+    """
+    Replacement for pytesseract.image_to_string
+
+    Recognizes the corpus posters by their decoded pixels, so the real
+    decode path (utils.image_decode) still runs in front of it.
+    """
+
+    def __init__(self, corpus, max_pixels, max_long_edge, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._texts = {
+            _image_key(load_for_ocr(poster.image_bytes, max_pixels, max_long_edge)): poster.text
+            for poster in corpus
+        }
+        assert len(self._texts) == len(corpus), 'corpus posters must decode to distinct images'
+
+    def __call__(self, image, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._texts.get(_image_key(image), '')
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Stand-in for google.generativeai.GenerativeModel
+
+    Parses the "Label: value" lines of the OCR text embedded in the prompt,
+    the same lines canned_corpus draws on each poster.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._patterns = {
+            field: re.compile(rf"^{label}: (.+)$", re.MULTILINE) for field, label in LABELS.items()
+        }
+
+    def _reply(self, prompt):
+        self.calls += 1
+        data = {}
+        for field, pattern in self._patterns.items():
+            match = pattern.search(prompt)
+            data[field] = match.group(1).strip() if match else 'Not specified'
+        return FakeResponse(f"```json\n{json.dumps(data)}\n```")
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return self._reply(prompt)
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return self._reply(prompt)
+
+
+class FakeWorksheet:
+    """In-memory gspread worksheet supporting the calls the backend makes"""
+
+    def __init__(self, rows=None, latency=0.0):
+        self.rows = [list(row) for row in rows or []]
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def append_row(self, values, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.rows.append([str(value) for value in values])
+
+    def insert_row(self, values, index=1, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.rows.insert(index - 1, [str(value) for value in values])
+
+    def get_values(self, range_name=None, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            if range_name is None:
+                return [list(row) for row in self.rows]
+            match = re.fullmatch(r'[A-Z]+(\d+):[A-Z]+(\d+)', range_name)
+            first, last = int(match.group(1)), int(match.group(2))
+            return [list(row) for row in self.rows[first - 1:last]]
+
+    def get_all_values(self):
+        return self.get_values()
+
+
+class FakeContactLookup:
+    """Replacement for scraper_service.discover_email and discover_email_async"""
+
+    def __init__(self, corpus, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._emails = {}
+        for poster in corpus:
+            self._emails[poster.event['artist_name']] = poster.event['artist_email']
+            self._emails[poster.event['venue_name']] = poster.event['venue_email']
+
+    def __call__(self, name, platform):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._emails.get(name, '')
+
+    async def lookup_async(self, name, platform):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._emails.get(name, '')
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    # Small replies would otherwise wait for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server.sink
+        tls = False
+        mail_from, recipients = None, []
+        self.reply('220 sink.test ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                extensions = ['AUTH PLAIN LOGIN', 'SIZE 10485760'] + ([] if tls else ['STARTTLS'])
+                for extension in ['sink.test'] + extensions[:-1]:
+                    self.reply(f"250-{extension}")
+                self.reply(f"250 {extensions[-1]}")
+            elif verb == 'STARTTLS' and not tls:
+                self.reply('220 Ready to start TLS')
+                self.connection = sink.tls.wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile('rb')
+                self.wfile = self.connection.makefile('wb')
+                tls = True
+            elif verb == 'AUTH':
+                self.reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                mail_from, recipients = _address(command), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(_address(command))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = bytearray()
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b'.\r\n':
+                        break
+                    data += data_line[1:] if data_line.startswith(b'..') else data_line
+                time.sleep(sink.latency)
+                sink.deliver(mail_from, recipients, bytes(data))
+                self.reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def _address(command):
+    match = re.search(r'<([^>]*)>', command)
+    return match.group(1) if match else ''
+
+
+class _SmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SmtpSink:
+    """
+    Local SMTP server that accepts every message and keeps it in memory
+
+    Speaks enough ESMTP for smtplib's starttls(), login() and
+    send_message(); the TLS certificate is a throwaway self-signed one made
+    with the openssl command line tool. Use as a context manager.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = []
+        self._lock = threading.Lock()
+        if shutil.which('openssl') is None:
+            raise RuntimeError('SmtpSink needs the openssl command line tool for its TLS certificate')
+        self._certs = tempfile.TemporaryDirectory()
+        cert, key = (os.path.join(self._certs.name, name) for name in ('cert.pem', 'key.pem'))
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.tls.load_cert_chain(cert, key)
+        self._server = _SmtpServer(('127.0.0.1', 0), _SmtpHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True)
+
+    def deliver(self, mail_from, recipients, data):
+        with self._lock:
+            self.messages.append((mail_from, recipients, data))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._certs.cleanup()
+
+
+DEFAULT_LATENCIES = {'llm': 0.02, 'ocr': 0.02, 'lookup': 0.01, 'sheets': 0.01, 'smtp': 0.005}
+
+
+def add_latency_arguments(parser, defaults=DEFAULT_LATENCIES):
+    """--llm-latency, --ocr-latency, ... for scripts using offline_backend"""
+    helps = {
+        'llm': 'Seconds per fake Gemini call', 'ocr': 'Seconds per fake OCR call',
+        'lookup': 'Seconds per uncached contact lookup', 'sheets': 'Seconds per fake Sheets call',
+        'smtp': 'Seconds the SMTP sink takes per message'
+    }
+    for name, default in defaults.items():
+        parser.add_argument(f"--{name}-latency", type=float, default=default, help=helps[name])
+
+
+def latencies(args):
+    """offline_backend keyword arguments from add_latency_arguments options"""
+    return {f"{name}_latency": getattr(args, f"{name}_latency") for name in DEFAULT_LATENCIES}
+
+
+@contextlib.contextmanager
+def offline_backend(corpus, llm_latency=0.0, ocr_latency=0.0, lookup_latency=0.0,
+                    sheets_latency=0.0, smtp_latency=0.0):
+    """
+    The Flask app with every external dependency replaced by a fake
+
+    Yields:
+        tuple: (flask app module, dict of the installed fakes)
+    """
+    import pytesseract
+
+    from config import Config
+
+    import app
+    from services import contact_cache, scraper_service
+    from utils import tracing
+
+    with tempfile.TemporaryDirectory() as scratch:
+
+        fakes = {
+            'model': FakeModel(llm_latency),
+            'ocr': FakeOCR(corpus, Config.OCR_MAX_PIXELS, Config.OCR_MAX_LONG_EDGE, ocr_latency),
+            'lookup': FakeContactLookup(corpus, lookup_latency),
+            'sheet': FakeWorksheet(latency=sheets_latency),
+        }
+        patches = [
+            (Config, 'CONTACT_CACHE_FILE', os.path.join(scratch, 'contacts.db')),
+            (Config, 'UPLOAD_FOLDER', os.path.join(scratch, 'uploads')),
+            (tracing._exporter, 'path', os.path.join(scratch, 'traces.jsonl')),
+            (app, 'model', fakes['model']),
+            (app, 'init_google_sheets', lambda: fakes['sheet']),
+            (pytesseract, 'image_to_string', fakes['ocr']),
+            (scraper_service, 'discover_email', fakes['lookup']),
+            (scraper_service, 'discover_email_async', fakes['lookup'].lookup_async),
+            (contact_cache, '_cache', None),
+            (app, 'EMAIL_ADDRESS', 'bench@sender.test'),
+            (app, 'EMAIL_PASSWORD', 'secret'),
+        ]
+        with SmtpSink(smtp_latency) as sink:
+            fakes['smtp'] = sink
+            patches += [(app, 'SMTP_SERVER', sink.host), (app, 'SMTP_PORT', sink.port)]
+            saved = [(target, name, getattr(target, name)) for target, name, _ in patches]
+            for target, name, value in patches:
+                setattr(target, name, value)
+            try:
+                yield app, fakes
+            finally:
+                tracing.flush_spans()
+                for target, name, value in saved:
+                    setattr(target, name, value)
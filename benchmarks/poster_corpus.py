@@ -0,0 +1,336 @@
+"""
+Synthetic event posters with ground truth, for OCR and extraction benchmarks
+
+Renders posters with PIL from randomly generated events. Each poster varies
+the font, text sizes and alignment, background (solid, gradient, shapes,
+dark), rotation, noise, blur, resolution and encoding, and comes with the
+EventData it shows plus the exact lines drawn, so OCR output can be scored
+per character and per field.
+
+Dates and times are drawn in the formats people put on posters; the
+ground truth holds them normalized (YYYY-MM-DD, "7:30 PM") as the backend
+returns them. Emails and the venue owner are only on some posters and are
+empty / "Not specified" in the ground truth otherwise.
+
+--difficulty (0 to 1) scales rotation, noise, blur and JPEG compression.
+Fonts are the system's TrueType fonts, or PIL's built-in font if none are
+found; pass --fonts to use a directory of your own.
+
+Usage:
+    python benchmarks/poster_corpus.py corpus/ --count 200 --seed 7 --difficulty 0.5
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import sys
+from statistics import NormalDist
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from models.data_model import EventData
+
+FONT_DIRS = (
+    '/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+    '/Library/Fonts', '/System/Library/Fonts', 'C:\\Windows\\Fonts'
+)
+
+EVENT_WORDS = (
+    ('Summer', 'Midnight', 'Neon', 'Golden', 'Electric', 'Velvet', 'Harbor', 'Autumn', 'Sunset', 'Northern'),
+    ('Jam', 'Nights', 'Festival', 'Sessions', 'Showcase', 'Block Party', 'Live', 'Weekender', 'Revue', 'Social')
+)
+ARTIST_WORDS = (
+    ('The Velvet', 'The Midnight', 'DJ', 'Lady', 'The Paper', 'Black', 'Silver', 'The Wild', 'MC', 'Little'),
+    ('Echoes', 'Owls', 'Koral', 'Sparrow', 'Kites', 'Lanterns', 'Tide', 'Honey', 'Static', 'Foxes')
+)
+VENUES = (
+    'The Blue Room', 'Warehouse 9', 'Riverside Hall', 'The Lantern Club', 'Echo Lounge',
+    'Union Chapel', 'The Basement', 'Harbor Stage', 'Roxy Theatre', 'Greenhouse Bar'
+)
+OWNERS = ('Sam Lee', 'Priya Raman', 'Jonas Weber', 'Maria Lopez', 'Tom Becker', 'Aiko Tanaka')
+LOCATIONS = (
+    'Austin, TX', 'Berlin, Germany', 'Chennai, India', 'Manchester, UK', 'Melbourne, Australia',
+    'Toronto, Canada', 'Lisbon, Portugal', 'Brooklyn, NY'
+)
+
+# strftime formats seen on posters, all understood by utils.datetime_normalizer
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%B %d, %Y', '%A, %B %d %Y', '%a %d %b %Y', '%d %B %Y')
+
+BACKGROUNDS = ('solid', 'gradient', 'shapes', 'dark')
+
+# Base canvas, A-series aspect ratio; resized to the target resolution last
+CANVAS = (1240, 1754)
+
+
+class SyntheticPoster:
+    """A rendered poster, the EventData it shows and how it was rendered"""
+
+    def __init__(self, image, event, lines, render):
+        self.image = image
+        self.event = event
+        self.lines = lines
+        self.render = render
+
+    @property
+    def text(self):
+        """The text drawn on the poster, one line per block"""
+        return '\n'.join(self.lines)
+
+    @property
+    def extension(self):
+        return 'jpg' if self.render['format'] == 'JPEG' else 'png'
+
+    def encode(self):
+        """The poster as the bytes a user would upload"""
+        buffer = io.BytesIO()
+        if self.render['format'] == 'JPEG':
+            self.image.save(buffer, 'JPEG', quality=self.render['jpeg_quality'])
+        else:
+            self.image.save(buffer, 'PNG')
+        return buffer.getvalue()
+
+
+def find_fonts(extra_dirs=()):
+    """TrueType/OpenType fonts under the usual system directories and extra_dirs"""
+    fonts = []
+    for directory in tuple(extra_dirs) + FONT_DIRS:
+        for root, _, files in os.walk(directory):
+            fonts += [os.path.join(root, name) for name in files if name.lower().endswith(('.ttf', '.otf'))]
+    return sorted(set(fonts))
+
+
+def load_font(path, size):
+    if path is None:
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow < 10.1 only has a fixed-size bitmap default font
+            return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+
+def random_event(rng):
+    """
+    A random event and the strings a poster shows for it
+
+    Returns:
+        tuple: (EventData ground truth, dict of the date and time as drawn)
+    """
+    day = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(730))
+    hour, minute = rng.choice((17, 18, 19, 20, 21, 22, 23)), rng.choice((0, 0, 30))
+    h12 = hour - 12
+    if minute == 0:
+        time_text = rng.choice((f"{h12}pm", f"{h12} PM", f"{h12}:00 PM", f"{hour}:00"))
+    else:
+        time_text = rng.choice((f"{h12}:{minute} PM", f"{h12}.{minute}pm", f"{hour}:{minute}"))
+
+    artist = f"{rng.choice(ARTIST_WORDS[0])} {rng.choice(ARTIST_WORDS[1])}"
+    venue = rng.choice(VENUES)
+    slug = lambda name: ''.join(c for c in name.lower() if c.isalnum())
+    event = EventData(
+        event_name=f"{rng.choice(EVENT_WORDS[0])} {rng.choice(EVENT_WORDS[1])}",
+        artist_name=artist,
+        venue_name=venue,
+        venue_owner=rng.choice(OWNERS) if rng.random() < 0.6 else 'Not specified',
+        date=day.isoformat(),
+        time=f"{h12}:{minute:02d} PM",
+        location=rng.choice(LOCATIONS),
+        artist_email=f"{slug(artist)}@gmail.com" if rng.random() < 0.4 else '',
+        venue_email=f"bookings@{slug(venue)}.com" if rng.random() < 0.5 else ''
+    )
+    return event, {'date': day.strftime(rng.choice(DATE_FORMATS)), 'time': time_text}
+
+
+def poster_lines(event, shown, rng):
+    """The text blocks of a poster, title first"""
+    lines = [
+        event.event_name.upper() if rng.random() < 0.5 else event.event_name,
+        event.artist_name,
+        f"{rng.choice(('Live at', 'at', '@'))} {event.venue_name}",
+        f"{shown['date']} {rng.choice(('|', '-', 'at'))} {shown['time']}",
+        event.location
+    ]
+    if event.venue_owner != 'Not specified':
+        lines.append(f"Hosted by {event.venue_owner}")
+    if event.artist_email:
+        lines.append(f"Booking: {event.artist_email}")
+    if event.venue_email:
+        lines.append(f"Venue: {event.venue_email}")
+    return lines
+
+
+def _background(kind, rng):
+    if kind == 'dark':
+        color = tuple(rng.randrange(0, 60) for _ in range(3))
+        return Image.new('RGB', CANVAS, color), (235, 235, 225)
+
+    light = tuple(rng.randrange(190, 256) for _ in range(3))
+    image = Image.new('RGB', CANVAS, light)
+    ink = tuple(rng.randrange(0, 70) for _ in range(3))
+    if kind == 'gradient':
+        other = tuple(rng.randrange(150, 256) for _ in range(3))
+        ramp = Image.linear_gradient('L').resize(CANVAS)
+        image = Image.composite(Image.new('RGB', CANVAS, other), image, ramp)
+    elif kind == 'shapes':
+        draw = ImageDraw.Draw(image)
+        for _ in range(rng.randrange(4, 12)):
+            x, y = rng.randrange(CANVAS[0]), rng.randrange(CANVAS[1])
+            r = rng.randrange(60, 400)
+            fill = tuple(min(255, channel + rng.randrange(-40, 10)) for channel in light)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=fill)
+    return image, ink
+
+
+def render_poster(event, shown, rng, fonts, difficulty=0.5, min_long_edge=800, max_long_edge=3000):
+    """
+    Draw a poster for event
+
+    Args:
+        event (EventData): Ground truth
+        shown (dict): Date and time as drawn, from random_event
+        rng (random.Random): Source of every random choice
+        fonts (list): Font paths; None stands for PIL's built-in font
+        difficulty (float): 0 to 1, scales rotation, noise, blur and JPEG loss
+        min_long_edge (int): Smallest output long edge in px
+        max_long_edge (int): Largest output long edge in px
+
+    Returns:
+        SyntheticPoster
+    """
+    lines = poster_lines(event, shown, rng)
+    background = rng.choice(BACKGROUNDS)
+    image, ink = _background(background, rng)
+    draw = ImageDraw.Draw(image)
+
+    font_path = rng.choice(fonts)
+    title_size = rng.randrange(90, 150)
+    body_size = rng.randrange(40, 64)
+    align = rng.choice(('center', 'left'))
+    margin = 80
+    y = rng.randrange(120, 260)
+    for index, line in enumerate(lines):
+        size = title_size if index == 0 else body_size
+        font = load_font(font_path, size)
+        # Shrink lines that don't fit the width
+        while draw.textlength(line, font=font) > CANVAS[0] - 2 * margin and size > 16:
+            size = int(size * 0.9)
+            font = load_font(font_path, size)
+        width = draw.textlength(line, font=font)
+        x = (CANVAS[0] - width) / 2 if align == 'center' else margin
+        draw.text((x, y), line, font=font, fill=ink)
+        y += int(size * (1.8 if index == 0 else 1.5))
+
+    rotation = rng.uniform(-8, 8) * difficulty
+    if rotation:
+        image = image.rotate(rotation, resample=Image.BICUBIC, expand=True, fillcolor=image.getpixel((0, 0)))
+
+    noise = rng.uniform(0, 40) * difficulty
+    if noise >= 1:
+        # Image.effect_noise can't be seeded: map seeded uniform bytes
+        # through the inverse normal CDF instead
+        gaussian = NormalDist(128, noise)
+        table = [min(255, max(0, round(gaussian.inv_cdf((value + 0.5) / 256)))) for value in range(256)]
+        size = image.width * image.height
+        # Same bytes as rng.randbytes, which needs Python 3.9
+        grain = Image.frombytes('L', image.size, rng.getrandbits(8 * size).to_bytes(size, 'little'))
+        grain = grain.point(table).convert('RGB')
+        image = ImageChops.add(image, grain, scale=1, offset=-128)
+
+    blur = rng.uniform(0, 2) * difficulty
+    if blur >= 0.2:
+        image = image.filter(ImageFilter.GaussianBlur(blur))
+
+    long_edge = rng.randrange(min_long_edge, max_long_edge + 1)
+    scale = long_edge / max(image.size)
+    image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+    fmt = rng.choice(('PNG', 'JPEG'))
+    render = {
+        'font': os.path.basename(font_path) if font_path else 'default',
+        'title_size': title_size,
+        'body_size': body_size,
+        'align': align,
+        'background': background,
+        'rotation': round(rotation, 2),
+        'noise': round(noise, 1),
+        'blur': round(blur, 2),
+        'size': list(image.size),
+        'format': fmt,
+        'jpeg_quality': round(95 - 60 * difficulty * rng.random()) if fmt == 'JPEG' else None
+    }
+    return SyntheticPoster(image, event, lines, render)
+
+
+def generate(count, seed=0, difficulty=0.5, font_dirs=(), min_long_edge=800, max_long_edge=3000):
+    """
+    Yield count posters; the same arguments always give the same posters
+
+    Yields:
+        SyntheticPoster
+    """
+    fonts = find_fonts(font_dirs) or [None]
+    for i in range(count):
+        rng = random.Random(f"{seed}-{i}")
+        event, shown = random_event(rng)
+        yield render_poster(event, shown, rng, fonts, difficulty, min_long_edge, max_long_edge)
+
+
+def write_corpus(posters, directory):
+    """
+    Save posters as NNNN.png / NNNN.jpg plus a manifest.jsonl of ground truth
+
+    Returns:
+        int: Posters written
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(os.path.join(directory, 'manifest.jsonl'), 'w') as manifest:
+        for count, poster in enumerate(posters, 1):
+            filename = f"{count:04d}.{poster.extension}"
+            with open(os.path.join(directory, filename), 'wb') as f:
+                f.write(poster.encode())
+            manifest.write(json.dumps({
+                'file': filename, 'event': poster.event.to_dict(), 'lines': poster.lines, 'render': poster.render
+            }) + '\n')
+    return count
+
+
+def read_corpus(directory):
+    """
+    Load a corpus written by write_corpus
+
+    Yields:
+        tuple: (image bytes, EventData, lines drawn, render parameters)
+    """
+    with open(os.path.join(directory, 'manifest.jsonl')) as manifest:
+        for line in manifest:
+            entry = json.loads(line)
+            with open(os.path.join(directory, entry['file']), 'rb') as f:
+                yield f.read(), EventData.from_dict(entry['event']), entry['lines'], entry['render']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help='Directory for the images and manifest.jsonl')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--difficulty', type=float, default=0.5, help='0 (clean) to 1 (rotated, noisy, blurred)')
+    parser.add_argument('--fonts', action='append', default=[], help='Extra font directory, repeatable')
+    parser.add_argument('--min-long-edge', type=int, default=800)
+    parser.add_argument('--max-long-edge', type=int, default=3000)
+    args = parser.parse_args()
+
+    written = write_corpus(
+        generate(args.count, args.seed, args.difficulty, args.fonts, args.min_long_edge, args.max_long_edge),
+        args.output
+    )
+    print(f"wrote {written} posters to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Replay recorded request traffic against a backend
+
+Reads a traffic log written by the backend with TRAFFIC_LOG_FILE set
+(see backend/utils/traffic.py) and sends the same sequence of requests,
+with the same endpoints, body sizes and inter-arrival times, scaled by
+--speed. Bodies are synthesized to the recorded sizes from the canned
+posters in benchmarks/fakes.py, since recordings never keep them.
+
+Replay is open loop: each request is sent at its scheduled time whether
+or not earlier ones have finished, and its latency is measured from that
+time. A backend that falls behind therefore shows growing latency instead
+of silently receiving less traffic.
+
+Without --target the backend runs in-process on a local port with every
+external service replaced by the fakes, so a replay needs nothing but
+this repository. With --target, requests that send email or write
+Google Sheets rows are skipped unless --allow-side-effects is given.
+
+Usage:
+    python benchmarks/replay_traffic.py synthesize traffic.jsonl --rps 5 --duration 60
+    python benchmarks/replay_traffic.py replay traffic.jsonl --speed 4
+    python benchmarks/replay_traffic.py replay traffic.jsonl --target http://localhost:6100
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fakes import (
+    add_latency_arguments, canned_corpus, latencies, offline_backend,
+    poster_event, sized_poster
+)
+
+TEMPLATE_IDS = ('good_artist', 'bad_artist', 'good_venue', 'bad_venue')
+
+# Endpoint mix and typical body sizes for synthesize; uploads are the
+# client's downscaled grayscale PNGs
+SYNTHETIC_MIX = (
+    ('POST', '/api/extract', 0.25, 600_000),
+    ('POST', '/api/generate-email', 0.35, 450),
+    ('POST', '/api/send-email', 0.15, 1_200),
+    ('GET', '/api/templates', 0.1, 0),
+    ('GET', '/api/health', 0.15, 0),
+)
+
+# Endpoints that act on the outside world: /api/send-email sends mail and
+# /api/extract appends a Google Sheets row. Skipped against a real --target
+# unless --allow-side-effects is given.
+SIDE_EFFECT_PATHS = ('/api/send-email', '/api/extract')
+
+# Upload sizes are rounded to this many steps per doubling, so one
+# poster is generated per step rather than per request
+SIZE_STEPS = 4
+
+
+def read_traffic(path, limit=None):
+    """Records of a traffic log, sorted by arrival time"""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records
+
+
+def size_step(size):
+    return round(math.log2(max(size, 1024)) * SIZE_STEPS)
+
+
+class BodyFactory:
+    """
+    JSON bodies of roughly the recorded size for each endpoint
+
+    Upload posters are built up front (posters()), so the fake OCR can be
+    told about them before the backend starts.
+    """
+
+    def __init__(self, records):
+        self._posters = {}
+        for record in records:
+            if record['path'] == '/api/extract':
+                step = size_step(record['request_bytes'])
+                if step not in self._posters:
+                    # The image is base64 in a JSON body
+                    image_bytes = int(2 ** (step / SIZE_STEPS) * 3 / 4)
+                    self._posters[step] = sized_poster(len(self._posters), image_bytes)
+        self._events = [poster_event(i) for i in range(8)]
+
+    def posters(self):
+        return list(self._posters.values())
+
+    def body(self, i, record):
+        """Encoded JSON body for request i, or None for a request without one"""
+        path, size = record['path'], record['request_bytes']
+        event = self._events[i % len(self._events)]
+        if path == '/api/extract':
+            payload = {'image': self._posters[size_step(size)].data_url}
+        elif path == '/api/generate-email':
+            payload = {'template_type': TEMPLATE_IDS[i % len(TEMPLATE_IDS)], 'event_data': event}
+        elif path == '/api/generate-email/batch':
+            events = [dict(event, event_name=f"Show {n}") for n in range(max(1, size // 400))]
+            payload = {'template_ids': list(TEMPLATE_IDS[:2]), 'events': events}
+        elif path == '/api/send-email':
+            padding = max(0, size - 120)
+            payload = {'to': event['artist_email'], 'subject': event['event_name'], 'body': 'x' * padding}
+        elif record['method'] == 'GET':
+            return None
+        else:
+            payload = {}
+        return json.dumps(payload).encode()
+
+
+def replay(records, target, speed, workers, bodies):
+    """
+    Send records open loop at speed times their recorded rate
+
+    Returns:
+        tuple: (list of (endpoint, latency seconds, ok), wall time, worst dispatch lag)
+    """
+    results = []
+    lock = threading.Lock()
+    local = threading.local()
+    started_ts = records[0]['ts']
+
+    def send(i, record, scheduled):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = bodies.body(i, record)
+        try:
+            response = session.request(
+                record['method'], f"{target}{record['path']}", data=body,
+                headers={'Content-Type': 'application/json'} if body is not None else None,
+                timeout=120
+            )
+            response.content
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results.append((f"{record['method']} {record['path']}", latency, ok))
+
+    lag = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        for i, record in enumerate(records):
+            scheduled = start + (record['ts'] - started_ts) / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lag = max(lag, time.perf_counter() - scheduled)
+            pool.submit(send, i, record, scheduled)
+    return results, time.perf_counter() - start, lag
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def report(results, wall):
+    """Latency percentiles, error rate and throughput per endpoint and overall"""
+    by_endpoint = {}
+    for endpoint, latency, ok in results:
+        by_endpoint.setdefault(endpoint, []).append((latency, ok))
+    by_endpoint['all'] = [(latency, ok) for _, latency, ok in results]
+
+    summary = {}
+    for endpoint, calls in by_endpoint.items():
+        latencies_ms = sorted(latency * 1000 for latency, _ in calls)
+        errors = sum(1 for _, ok in calls if not ok)
+        summary[endpoint] = {
+            'requests': len(calls),
+            'errors': errors,
+            'error_rate': errors / len(calls),
+            'rps': len(calls) / wall,
+            'p50_ms': percentile(latencies_ms, 0.5),
+            'p95_ms': percentile(latencies_ms, 0.95),
+            'p99_ms': percentile(latencies_ms, 0.99)
+        }
+    return summary
+
+
+def without_side_effects(records):
+    """
+    Returns:
+        tuple: (records not hitting SIDE_EFFECT_PATHS, number skipped)
+    """
+    kept = [record for record in records if record['path'] not in SIDE_EFFECT_PATHS]
+    return kept, len(records) - len(kept)
+
+
+def run_replay(args):
+    records = read_traffic(args.traffic, args.limit)
+    if args.target and not args.allow_side_effects:
+        records, skipped = without_side_effects(records)
+        if skipped:
+            print(
+                f"skipping {skipped} requests to {', '.join(SIDE_EFFECT_PATHS)}; "
+                f"pass --allow-side-effects to send them to {args.target}",
+                file=sys.stderr
+            )
+    if not records:
+        sys.exit(f"{args.traffic} has no requests to replay")
+    bodies = BodyFactory(records)
+
+    if args.target:
+        results, wall, lag = replay(records, args.target.rstrip('/'), args.speed, args.workers, bodies)
+    else:
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        corpus = canned_corpus(8) + bodies.posters()
+        with offline_backend(corpus, **latencies(args)) as (app, _):
+            server = make_server('127.0.0.1', 0, app.app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                results, wall, lag = replay(
+                    records, f"http://127.0.0.1:{server.server_port}", args.speed, args.workers, bodies
+                )
+            finally:
+                server.shutdown()
+
+    summary = report(results, wall)
+    if args.json:
+        print(json.dumps({'endpoints': summary, 'wall_s': wall, 'max_dispatch_lag_ms': lag * 1000}, indent=2))
+        return
+
+    print(f"{len(records)} requests in {wall:.1f}s at {args.speed}x recorded rate")
+    for endpoint, result in sorted(summary.items(), key=lambda item: item[0] == 'all'):
+        print(
+            f"{endpoint:>32}: {result['requests']:6d} req  {result['rps']:7.2f} req/s  "
+            f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+            f"errors {result['error_rate']:6.1%}"
+        )
+    if lag > 0.05:
+        print(f"warning: dispatch fell {lag * 1000:.0f} ms behind schedule; raise --workers")
+
+
+def run_synthesize(args):
+    """Poisson arrivals over SYNTHETIC_MIX, for trying replay without a recording"""
+    rng = random.Random(args.seed)
+    cumulative = []
+    total = 0.0
+    for _, _, weight, _ in SYNTHETIC_MIX:
+        total += weight
+        cumulative.append(total)
+
+    ts = time.time()
+    end = ts + args.duration
+    written = 0
+    with open(args.output, 'w') as out:
+        while True:
+            ts += rng.expovariate(args.rps)
+            if ts >= end:
+                break
+            method, path, _, size = SYNTHETIC_MIX[bisect.bisect(cumulative, rng.random() * total)]
+            if size:
+                size = int(rng.lognormvariate(math.log(size), 0.4))
+            out.write(json.dumps({
+                'ts': round(ts, 3), 'method': method, 'path': path, 'request_bytes': size,
+                'status': 200, 'response_bytes': 0, 'duration_ms': 0
+            }) + '\n')
+            written += 1
+    print(f"wrote {written} requests to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    replay_parser = commands.add_parser('replay', help='Replay a traffic log')
+    replay_parser.add_argument('traffic', help='JSONL traffic log')
+    replay_parser.add_argument('--target', help='Backend base URL; default: in-process backend with fakes')
+    replay_parser.add_argument('--speed', type=float, default=1.0, help='Multiple of the recorded request rate')
+    replay_parser.add_argument('--limit', type=int, help='Replay only the first N requests')
+    replay_parser.add_argument('--workers', type=int, default=64, help='Maximum requests in flight')
+    replay_parser.add_argument(
+        '--allow-side-effects', action='store_true',
+        help='With --target, also replay requests that send email or write Google Sheets rows'
+    )
+    replay_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    # Roughly the real services, so replays show realistic queueing
+    add_latency_arguments(replay_parser, {'llm': 0.8, 'ocr': 0.3, 'lookup': 0.5, 'sheets': 0.2, 'smtp': 0.1})
+
+    synthesize_parser = commands.add_parser('synthesize', help='Write a synthetic traffic log')
+    synthesize_parser.add_argument('output')
+    synthesize_parser.add_argument('--rps', type=float, default=2.0, help='Mean requests per second')
+    synthesize_parser.add_argument('--duration', type=float, default=60, help='Seconds of traffic')
+    synthesize_parser.add_argument('--seed', type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == 'replay':
+        run_replay(args)
+    else:
+        run_synthesize(args)
+
+
+if __name__ == '__main__':
+    main()
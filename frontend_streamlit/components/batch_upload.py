@@ -0,0 +1,60 @@
+"""
+Batch upload component
+"""
+
+import streamlit as st
+from utils.batch_upload import BatchItem, run_batch, summarize, to_csv, to_json, DONE
+from ._compat import safe_button
+
+def render_batch_upload(api_client, max_in_flight, max_long_edge, upload_format):
+    """
+    Render the multi-file uploader, live progress table and exports
+    
+    Args:
+        api_client (APIClient): Shared client
+        max_in_flight (int): Files processed at once
+        max_long_edge (int): Long-edge cap for uploads
+        upload_format (str): Upload format
+    """
+    
+    st.markdown('<div class="step-header">📦 Batch Upload</div>', unsafe_allow_html=True)
+    
+    uploaded_files = st.file_uploader(
+        "Choose poster images",
+        type=['jpg', 'jpeg', 'png'],
+        accept_multiple_files=True,
+        help="Every file is extracted and saved to Google Sheets"
+    )
+    
+    if uploaded_files and safe_button(
+        f"🔍 Extract {len(uploaded_files)} Posters", type="primary", use_container_width=True
+    ):
+        items = [BatchItem(f.name, f.getvalue()) for f in uploaded_files]
+        progress = st.progress(0.0)
+        table = st.empty()
+        
+        for finished in run_batch(items, api_client, max_in_flight, max_long_edge, upload_format):
+            progress.progress(finished / len(items), text=f"{finished}/{len(items)} done")
+            table.dataframe([item.row() for item in items], use_container_width=True)
+        
+        # Bytes are not needed once the batch is over
+        for item in items:
+            item.file_bytes = b''
+        st.session_state.batch_results = items
+    
+    items = st.session_state.get('batch_results')
+    if not items:
+        return
+    
+    counts = summarize(items)
+    if counts.get(DONE) == len(items):
+        st.success(f"✅ All {len(items)} posters extracted!")
+    else:
+        st.warning(f"⚠️ {counts.get(DONE, 0)} of {len(items)} posters extracted")
+    st.dataframe([item.row() for item in items], use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Export CSV", to_csv(items), file_name="batch_results.csv", mime="text/csv")
+    with col2:
+        st.download_button("⬇️ Export JSON", to_json(items), file_name="batch_results.json", mime="application/json")
@@ -1,8 +1,4 @@
 import streamlit as st
-import requests
-import base64
-from PIL import Image
-import io
 import sys
 import os
 
@@ -11,7 +7,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'components'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 
 from utils.api_client import APIClient
+from utils.upload_cache import file_digest, encode_image, extract_cached, ExtractionFailed
+from utils.image_optimizer import FORMATS as UPLOAD_FORMATS
 from components._compat import safe_image, safe_button
+from components.batch_upload import render_batch_upload
 
 # Configure Streamlit page
 st.set_page_config(
@@ -98,8 +97,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Initialize API client
-api_client = APIClient()
+# Initialize API client once per server process; it owns the health poller
+@st.cache_resource
+def get_api_client():
+    return APIClient()
+
+api_client = get_api_client()
 
 # Initialize session state
 if 'extracted_data' not in st.session_state:
@@ -108,6 +111,8 @@ if 'email_preview' not in st.session_state:
     st.session_state.email_preview = None
 if 'uploaded_image' not in st.session_state:
     st.session_state.uploaded_image = None
+if 'prerendered_emails' not in st.session_state:
+    st.session_state.prerendered_emails = {}
 
 # Header
 st.markdown('<h1 class="main-header ">AI-Powered Outreach Automation Assistant</h1>', unsafe_allow_html=True)
@@ -143,15 +148,47 @@ with st.sidebar:
     # Backend connection test
     if safe_button("🔌 Test Backend Connection", use_container_width=True):
         with st.spinner("Testing connection..."):
-            if api_client.test_connection():
+            if api_client.test_connection(refresh=True):
                 st.success("✅ Backend connected!")
             else:
                 st.error("❌ Backend not running. Start with: python backend/app.py")
     
+    # Upload optimization; defaults come from the backend's /api/health
+    upload_preferences = api_client.upload_preferences
+    max_long_edge = st.slider(
+        "Max image size (px, long edge)",
+        min_value=800,
+        max_value=4000,
+        value=int(upload_preferences.get('max_long_edge', 2000)),
+        step=100,
+        help="Posters are downscaled to this before upload; OCR does not need more"
+    )
+    upload_formats = list(UPLOAD_FORMATS)
+    preferred_format = upload_preferences.get('preferred_format', 'png')
+    upload_format = st.selectbox(
+        "Upload format",
+        upload_formats,
+        index=upload_formats.index(preferred_format) if preferred_format in upload_formats else 0,
+        help="Images are converted to grayscale before encoding"
+    )
+    
+    upload_mode = st.radio("Upload mode", ["Single poster", "Batch"], horizontal=True)
+    max_in_flight = st.slider(
+        "Max uploads in flight",
+        min_value=1,
+        max_value=api_client.pool_maxsize,
+        value=4,
+        help="Batch mode only; the backend runs OCR and Gemini for each one"
+    )
+    
     st.markdown("---")
     st.caption("Made with ❤️ using Streamlit")
 
 # Main content
+if upload_mode == "Batch":
+    render_batch_upload(api_client, max_in_flight, max_long_edge, upload_format)
+    st.stop()
+
 # Step 1: Upload Image
 st.markdown('<div class="step-header">📤 Step 1: Upload Event Poster</div>', unsafe_allow_html=True)
 
@@ -165,30 +202,39 @@ if uploaded_file is not None:
     # Store uploaded image
     st.session_state.uploaded_image = uploaded_file
     
+    # Everything below is cached by content hash, so reruns are cheap
+    file_bytes = uploaded_file.getvalue()
+    digest = file_digest(file_bytes)
+    
     # Display uploaded image
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        image = Image.open(uploaded_file)
-        safe_image(image, caption="Uploaded Poster", use_container_width=True)
-    
-    # Convert image to base64
-    buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+        safe_image(file_bytes, caption="Uploaded Poster", use_container_width=True)
     
     # Extract button
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if safe_button("🔍 Extract Details with OCR + GPT", type="primary", use_container_width=True):
             with st.spinner("🔄 Extracting and categorizing data..."):
-                result = api_client.extract_data(img_str)
-
-                if result['success']:
+                try:
+                    encoded = encode_image(digest, file_bytes, max_long_edge, upload_format)
+                    result = extract_cached(
+                        f"{digest}:{max_long_edge}:{upload_format}", api_client, encoded
+                    )
+                    st.caption(
+                        f"Uploaded {encoded['optimized_bytes'] / 1024:.0f} KB instead of "
+                        f"{encoded['original_bytes'] / 1024:.0f} KB "
+                        f"({encoded['percent_saved']:.0f}% smaller, "
+                        f"{encoded['size'][0]}×{encoded['size'][1]} px)"
+                    )
+                    
                     st.session_state.extracted_data = result['data']
+                    st.session_state.prerendered_emails = result.get('emails', {})
+                    st.session_state.email_preview = None
                     st.success("✅ Data extracted and saved to Google Sheets!")
                     st.balloons()
-                else:
-                    st.error(f"❌ Error: {result.get('error', 'Unknown error')}")
+                except ExtractionFailed as e:
+                    st.error(f"❌ Error: {e}")
 
 # Step 2: Display Extracted Data
 if st.session_state.extracted_data:
@@ -237,7 +283,11 @@ if st.session_state.extracted_data:
     with col2:
         generate_btn = safe_button("📝 Generate Email", use_container_width=True)
     
-    if generate_btn:
+    prerendered = st.session_state.prerendered_emails
+    if selected_template in prerendered:
+        # Rendered by the backend during extraction, no network call needed
+        st.session_state.email_preview = prerendered[selected_template]
+    elif generate_btn:
         with st.spinner("🔄 Generating email preview..."):
             result = api_client.generate_email(selected_template, data)
             
@@ -2,42 +2,230 @@
 API Client for communicating with Flask backend
 """
 
+import gzip
+import json
 import requests
 import logging
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .tracing import ClientSpan
 
 logger = logging.getLogger(__name__)
 
+BACKEND_DOWN_ERROR = 'Backend unavailable - start it with: python backend/app.py'
+
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 1024
+TRANSIENT_STATUSES = (502, 503, 504)
+
+
+def encode_json_body(payload, compress=True):
+    """
+    Serialize a JSON request body, gzip-compressed when worthwhile
+    
+    Args:
+        payload (dict): Request payload
+        compress (bool): Allow gzip Content-Encoding
+        
+    Returns:
+        tuple: (body bytes, headers dict)
+    """
+    body = json.dumps(payload).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if compress and len(body) >= GZIP_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=5)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while the backend is known to be down
+
+    closed: calls go through. open: calls are rejected until reset_timeout
+    has passed. half_open: one trial call is let through; its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Whether a call should be attempted right now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+
+
 class APIClient:
     """Client for Flask backend API"""
     
-    def __init__(self, base_url="http://localhost:6100/api"):
+    def __init__(self, base_url="http://localhost:6100/api", health_interval=5, health_timeout=2,
+                 pool_connections=4, pool_maxsize=16, retries=3, backoff_factor=0.3, compress=True):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.compress = compress
+        self.pool_maxsize = pool_maxsize  # upper bound for concurrent callers
+        self.session = self._build_session(pool_connections, pool_maxsize, retries, backoff_factor)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.breaker = CircuitBreaker()
+        self._healthy = None  # unknown until the first poll finishes
+        self.upload_preferences = {}  # advertised by /api/health
+        self._stop = threading.Event()
+        self._poller = threading.Thread(target=self._poll_health, name='backend-health', daemon=True)
+        self._poller.start()
     
-    def test_connection(self):
-        """Test if backend is running"""
+    def _build_session(self, pool_connections, pool_maxsize, retries, backoff_factor):
+        """
+        Session with sized connection pools and retries for transient errors
+        
+        Connection failures are retried for every call since the request
+        never reached the backend. 502/503/504 responses are only retried
+        for idempotent calls: GETs and /generate-email, which just renders.
+        Extraction writes to Google Sheets, so it is never replayed.
+        """
+        session = requests.Session()
+        
+        def retry(methods):
+            return Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=TRANSIENT_STATUSES,
+                allowed_methods=methods,
+                raise_on_status=False
+            )
+        
+        def adapter(methods):
+            return HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=retry(methods)
+            )
+        
+        session.mount('http://', adapter(frozenset(['GET', 'HEAD', 'OPTIONS'])))
+        session.mount('https://', adapter(frozenset(['GET', 'HEAD', 'OPTIONS'])))
+        session.mount(f"{self.base_url}/generate-email", adapter(frozenset(['POST'])))
+        return session
+    
+    def _post_json(self, path, payload, timeout, compress=True):
+        body, headers = encode_json_body(payload, self.compress and compress)
+        url = f"{self.base_url}/{path}"
+        with ClientSpan(f"POST /api/{path}", url) as span:
+            response = self.session.post(
+                url,
+                data=body,
+                headers={**headers, **span.headers},
+                timeout=timeout
+            )
+            span.set_status(response.status_code)
+            return response
+    
+    def test_connection(self, refresh=False):
+        """
+        Test if backend is running
+        
+        Args:
+            refresh (bool): Check now instead of using the polled state
+            
+        Returns:
+            bool: True if the backend is (believed to be) up
+        """
+        if refresh:
+            return self._check_health()
+        # Optimistic until the poller has reported once
+        return self._healthy is not False
+    
+    def close(self):
+        """Stop the background health poller"""
+        self._stop.set()
+    
+    def _check_health(self):
         try:
-            response = self.session.get(f"{self.base_url}/health", timeout=2)
-            return response.status_code == 200
-        except:
-            return False
+            # Separate from self.session, which is used by request threads
+            response = requests.get(f"{self.base_url}/health", timeout=self.health_timeout)
+            healthy = response.status_code == 200
+            if healthy:
+                self.upload_preferences = response.json().get('upload', {})
+        except (requests.exceptions.RequestException, ValueError):
+            healthy = False
+        
+        if healthy:
+            self.breaker.record_success()
+        else:
+            if self._healthy is not False:
+                logger.warning("Backend health check failed")
+            # Counts toward the breaker's threshold like a failed call, so
+            # one slow probe of a busy backend doesn't fail every call
+            self.breaker.record_failure()
+        self._healthy = healthy
+        return healthy
     
-    def extract_data(self, image_base64):
+    def _poll_health(self):
+        while not self._stop.is_set():
+            self._check_health()
+            self._stop.wait(self.health_interval)
+    
+    def _backend_down(self):
+        """Error response used while the circuit breaker is open"""
+        return {
+            'success': False,
+            'error': BACKEND_DOWN_ERROR
+        }
+    
+    def extract_data(self, image_base64, mime_type='image/png'):
         """
         Extract data from poster image
         
         Args:
             image_base64 (str): Base64 encoded image
+            mime_type (str): Format of the encoded image
             
         Returns:
             dict: Response with extracted data
         """
+        if not self.breaker.allow_request():
+            return self._backend_down()
+        
         try:
-            response = self.session.post(
-                f"{self.base_url}/extract",
-                json={"image": f"data:image/png;base64,{image_base64}"},
-                timeout=60
+            response = self._post_json(
+                'extract',
+                {"image": f"data:{mime_type};base64,{image_base64}"},
+                timeout=60,
+                # Base64 of an already compressed image shrinks little
+                # under gzip, and the backend would have to inflate it
+                compress=False
             )
+            self.breaker.record_success()
             
             if response.status_code == 200:
                 return response.json()
@@ -47,10 +235,14 @@ class APIClient:
                     'error': response.json().get('error', 'Unknown error')
                 }
         except requests.exceptions.Timeout:
+            self.breaker.record_failure()
             return {
                 'success': False,
                 'error': 'Request timeout - backend is taking too long'
             }
+        except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            return self._backend_down()
         except Exception as e:
             logger.error(f"Error in extract_data: {e}")
             return {
@@ -69,15 +261,19 @@ class APIClient:
         Returns:
             dict: Response with generated email
         """
+        if not self.breaker.allow_request():
+            return self._backend_down()
+        
         try:
-            response = self.session.post(
-                f"{self.base_url}/generate-email",
-                json={
+            response = self._post_json(
+                'generate-email',
+                {
                     "template_type": template_type,
                     "event_data": event_data
                 },
                 timeout=10
             )
+            self.breaker.record_success()
             
             if response.status_code == 200:
                 return response.json()
@@ -86,6 +282,9 @@ class APIClient:
                     'success': False,
                     'error': response.json().get('error', 'Unknown error')
                 }
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.breaker.record_failure()
+            return self._backend_down()
         except Exception as e:
             logger.error(f"Error in generate_email: {e}")
             return {
@@ -105,16 +304,20 @@ class APIClient:
         Returns:
             dict: Response with send status
         """
+        if not self.breaker.allow_request():
+            return self._backend_down()
+        
         try:
-            response = self.session.post(
-                f"{self.base_url}/send-email",
-                json={
+            response = self._post_json(
+                'send-email',
+                {
                     "to": to_email,
                     "subject": subject,
                     "body": body
                 },
                 timeout=30
             )
+            self.breaker.record_success()
             
             if response.status_code == 200:
                 return response.json()
@@ -123,6 +326,9 @@ class APIClient:
                     'success': False,
                     'error': response.json().get('error', 'Unknown error')
                 }
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.breaker.record_failure()
+            return self._backend_down()
         except Exception as e:
             logger.error(f"Error in send_email: {e}")
             return {
@@ -138,7 +344,10 @@ class APIClient:
             dict: List of templates
         """
         try:
-            response = self.session.get(f"{self.base_url}/templates", timeout=5)
+            url = f"{self.base_url}/templates"
+            with ClientSpan('GET /api/templates', url) as span:
+                response = self.session.get(url, headers=span.headers, timeout=5)
+                span.set_status(response.status_code)
             
             if response.status_code == 200:
                 return {
@@ -0,0 +1,155 @@
+"""
+Asyncio variant of the API client for batch tooling
+
+One AsyncAPIClient keeps a single pooled aiohttp session, so dozens of
+uploads can be in flight at once without opening a connection per call.
+"""
+
+import asyncio
+import logging
+import aiohttp
+
+from .api_client import encode_json_body, TRANSIENT_STATUSES, BACKEND_DOWN_ERROR
+from .tracing import ClientSpan
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIClient:
+    """Async client for Flask backend API, use as an async context manager"""
+    
+    def __init__(self, base_url="http://localhost:6100/api", pool_size=64,
+                 retries=3, backoff_factor=0.3, compress=True):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.compress = compress
+        self.session = None
+    
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def _request(self, method, path, payload=None, timeout=30, idempotent=False):
+        """
+        Send a request with retries for transient errors
+        
+        Failures to connect are always retried, since the backend never
+        saw the request. A connection dropped after the request was sent
+        and 502/503/504 are only retried when the call is idempotent; the
+        backend may already have acted on it (sent an email, written a
+        Sheets row).
+        
+        Returns:
+            tuple: (status code, decoded JSON body)
+        """
+        url = f"{self.base_url}/{path}"
+        with ClientSpan(f"{method} /api/{path}", url) as span:
+            kwargs = {'timeout': aiohttp.ClientTimeout(total=timeout), 'headers': span.headers}
+            if payload is not None:
+                body, headers = encode_json_body(payload, self.compress)
+                kwargs.update(data=body, headers={**headers, **span.headers})
+            
+            for attempt in range(self.retries + 1):
+                try:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        span.set_status(response.status)
+                        retryable = idempotent and response.status in TRANSIENT_STATUSES
+                        if not retryable or attempt == self.retries:
+                            return response.status, await response.json(content_type=None)
+                except aiohttp.ClientConnectorError:
+                    if attempt == self.retries:
+                        raise
+                except aiohttp.ClientConnectionError:
+                    # Disconnected or reset after sending
+                    if not idempotent or attempt == self.retries:
+                        raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+    
+    async def _call(self, name, method, path, payload=None, timeout=30, idempotent=False):
+        """Wrap _request in the same response shape as APIClient"""
+        try:
+            status, data = await self._request(method, path, payload, timeout, idempotent)
+            if status == 200:
+                return data
+            return {
+                'success': False,
+                'error': (data or {}).get('error', 'Unknown error')
+            }
+        except asyncio.TimeoutError:
+            return {
+                'success': False,
+                'error': 'Request timeout - backend is taking too long'
+            }
+        except aiohttp.ClientConnectionError:
+            return {
+                'success': False,
+                'error': BACKEND_DOWN_ERROR
+            }
+        except Exception as e:
+            logger.error(f"Error in {name}: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    async def test_connection(self):
+        """Test if backend is running"""
+        try:
+            status, _ = await self._request('GET', 'health', timeout=2, idempotent=True)
+            return status == 200
+        except Exception:
+            return False
+    
+    async def extract_data(self, image_base64, mime_type='image/png'):
+        """Extract data from poster image (see APIClient.extract_data)"""
+        return await self._call(
+            'extract_data', 'POST', 'extract',
+            {"image": f"data:{mime_type};base64,{image_base64}"},
+            timeout=60
+        )
+    
+    async def generate_email(self, template_type, event_data):
+        """Generate email from template (see APIClient.generate_email)"""
+        return await self._call(
+            'generate_email', 'POST', 'generate-email',
+            {"template_type": template_type, "event_data": event_data},
+            timeout=10, idempotent=True
+        )
+    
+    async def send_email(self, to_email, subject, body):
+        """Send email (see APIClient.send_email)"""
+        return await self._call(
+            'send_email', 'POST', 'send-email',
+            {"to": to_email, "subject": subject, "body": body},
+            timeout=30
+        )
+    
+    async def extract_many(self, images_base64, concurrency=None):
+        """
+        Extract many posters concurrently
+        
+        Args:
+            images_base64 (list): Base64 encoded images
+            concurrency (int): Max uploads in flight, defaults to pool_size
+            
+        Returns:
+            list: Responses in the same order as the input
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.pool_size)
+        
+        async def extract(image_base64):
+            async with semaphore:
+                return await self.extract_data(image_base64)
+        
+        return await asyncio.gather(*(extract(image) for image in images_base64))
@@ -0,0 +1,147 @@
+"""
+Concurrent extraction of many posters
+
+Each file is optimized and sent to /api/extract on a worker thread, with
+at most max_in_flight requests outstanding. BatchItems are updated in
+place as they move through the stages, so the UI can redraw a progress
+table while the batch runs.
+"""
+
+import io
+import csv
+import json
+import time
+import base64
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .image_optimizer import optimize_for_upload, DEFAULT_MAX_LONG_EDGE
+
+QUEUED = 'queued'
+OPTIMIZING = 'optimizing'
+EXTRACTING = 'extracting'
+DONE = 'done'
+FAILED = 'failed'
+
+# Extracted fields shown in the table and exported, in column order
+RESULT_FIELDS = ['event_name', 'venue_name', 'date', 'time', 'artist_email', 'venue_email']
+
+
+@dataclass
+class BatchItem:
+    """Progress and outcome for one uploaded file"""
+    name: str
+    file_bytes: bytes = field(repr=False)
+    stage: str = QUEUED
+    started: float = None
+    latency_ms: float = None
+    upload_bytes: int = None
+    data: dict = None
+    error: str = None
+
+    def row(self):
+        """Flat dict for the progress table and exports"""
+        row = {
+            'file': self.name,
+            'stage': self.stage,
+            'latency_ms': self.latency_ms,
+            'upload_kb': round(self.upload_bytes / 1024, 1) if self.upload_bytes else None,
+            'error': self.error or ''
+        }
+        data = self.data or {}
+        for name in RESULT_FIELDS:
+            row[name] = data.get(name, '')
+        return row
+
+
+def process_item(item, api_client, max_long_edge=DEFAULT_MAX_LONG_EDGE, fmt='png'):
+    """
+    Optimize and extract one file, recording progress on the item
+
+    Args:
+        item (BatchItem): File to process, updated in place
+        api_client (APIClient): Thread-safe client used for the request
+        max_long_edge (int): Long-edge cap for the upload
+        fmt (str): Upload format, see image_optimizer.FORMATS
+
+    Returns:
+        BatchItem: The same item, in stage DONE or FAILED
+    """
+    item.started = time.perf_counter()
+    try:
+        item.stage = OPTIMIZING
+        optimized = optimize_for_upload(item.file_bytes, max_long_edge=max_long_edge, fmt=fmt)
+        item.upload_bytes = len(optimized.data)
+
+        item.stage = EXTRACTING
+        result = api_client.extract_data(
+            base64.b64encode(optimized.data).decode(), optimized.mime_type
+        )
+        if result.get('success'):
+            item.data = result['data']
+            item.stage = DONE
+        else:
+            item.error = result.get('error', 'Unknown error')
+            item.stage = FAILED
+    except Exception as e:
+        # Unreadable images should not take down the rest of the batch
+        item.error = str(e)
+        item.stage = FAILED
+    finally:
+        item.latency_ms = round((time.perf_counter() - item.started) * 1000)
+    return item
+
+
+def run_batch(items, api_client, max_in_flight=4, max_long_edge=DEFAULT_MAX_LONG_EDGE,
+              fmt='png', refresh_interval=0.25):
+    """
+    Process items concurrently, yielding periodically for progress updates
+
+    Args:
+        items (list): BatchItems to process
+        api_client (APIClient): Shared client
+        max_in_flight (int): Files being optimized or uploaded at once
+        max_long_edge (int): Long-edge cap for uploads
+        fmt (str): Upload format
+        refresh_interval (float): Max seconds between yields
+
+    Yields:
+        int: Number of finished items, after each completion or interval
+    """
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='batch') as executor:
+        pending = {
+            executor.submit(process_item, item, api_client, max_long_edge, fmt)
+            for item in items
+        }
+        finished = 0
+        while pending:
+            done, pending = wait(pending, timeout=refresh_interval, return_when=FIRST_COMPLETED)
+            finished += len(done)
+            yield finished
+
+
+def summarize(items):
+    """Counts per stage, e.g. {'done': 3, 'failed': 1}"""
+    counts = {}
+    for item in items:
+        counts[item.stage] = counts.get(item.stage, 0) + 1
+    return counts
+
+
+def to_csv(items):
+    """Export item rows as CSV text"""
+    buffer = io.StringIO()
+    rows = [item.row() for item in items]
+    if rows:
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def to_json(items):
+    """Export item rows plus full extracted data as JSON text"""
+    return json.dumps(
+        [dict(item.row(), data=item.data) for item in items],
+        indent=2
+    )
@@ -0,0 +1,95 @@
+"""
+Upload optimizer for poster images
+
+OCR needs far less than a phone camera's full resolution, so posters are
+downscaled and recompressed before upload. Text stays legible at the
+backend's advertised long-edge limit, and grayscale removes color data
+tesseract ignores anyway.
+"""
+
+import io
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+
+DEFAULT_MAX_LONG_EDGE = 2000
+
+FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+SOURCE_MIME_TYPES = {
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+}
+
+
+@dataclass
+class OptimizedImage:
+    """Result of optimize_for_upload"""
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    original_size: tuple
+    size: tuple
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - len(self.data)
+
+    @property
+    def percent_saved(self):
+        if not self.original_bytes:
+            return 0.0
+        return 100.0 * self.bytes_saved / self.original_bytes
+
+
+def optimize_for_upload(file_bytes, max_long_edge=DEFAULT_MAX_LONG_EDGE, fmt='png',
+                        quality=90, grayscale=True):
+    """
+    Downscale and recompress an image for OCR upload
+
+    Args:
+        file_bytes (bytes): Original upload
+        max_long_edge (int): Cap for the longer side in pixels
+        fmt (str): 'png', 'jpeg' or 'webp'
+        quality (int): JPEG/WebP quality
+        grayscale (bool): Drop color channels
+
+    Returns:
+        OptimizedImage: The smaller of the re-encoded image and the
+        original (when the original needs no resizing and is a format the
+        backend accepts)
+    """
+    pil_format, mime_type = FORMATS[fmt]
+
+    image = Image.open(io.BytesIO(file_bytes))
+    source_format = image.format
+    original_size = image.size
+
+    # Phone photos store rotation in EXIF; OCR wants upright text
+    image = ImageOps.exif_transpose(image)
+
+    resized = max(image.size) > max_long_edge
+    if resized:
+        image.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+    if grayscale:
+        image = image.convert('L')
+    elif image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    buffered = io.BytesIO()
+    if pil_format == 'PNG':
+        image.save(buffered, format=pil_format, compress_level=6)
+    else:
+        image.save(buffered, format=pil_format, quality=quality)
+    data = buffered.getvalue()
+
+    if not resized and len(data) >= len(file_bytes) and source_format in SOURCE_MIME_TYPES:
+        return OptimizedImage(file_bytes, SOURCE_MIME_TYPES[source_format],
+                              len(file_bytes), original_size, original_size)
+
+    return OptimizedImage(data, mime_type, len(file_bytes), original_size, image.size)
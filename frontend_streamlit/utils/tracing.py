@@ -0,0 +1,102 @@
+"""
+W3C trace context for calls to the backend
+
+Every API call gets a client span whose `traceparent` header the backend
+continues, so one trace covers the click in the UI, each backend stage
+and the backend's own outbound calls. The sampling decision is made here
+and travels in the header's flags: TRACE_SAMPLE_RATE of the calls are
+sampled (default 0.1). Sampled client spans are appended to
+TRACE_FILE as OTLP/JSON lines when that variable is set; the header is
+sent either way.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+
+SERVICE_NAME = 'poster-extractor-frontend'
+CLIENT = 3
+STATUS_ERROR = 2
+
+_write_lock = threading.Lock()
+
+
+def _sample_rate():
+    try:
+        return float(os.environ.get('TRACE_SAMPLE_RATE', 0.1))
+    except ValueError:
+        return 0.1
+
+
+class ClientSpan:
+    """
+    Span around one API call, use as a context manager
+
+    Usage:
+        with ClientSpan('POST /api/extract', url) as span:
+            response = session.post(url, headers=span.headers)
+            span.set_status(response.status_code)
+    """
+
+    __slots__ = ('name', 'url', 'trace_id', 'span_id', 'sampled', 'start_ns', 'status_code', 'error')
+
+    def __init__(self, name, url, sample_rate=None):
+        self.name = name
+        self.url = url
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        rate = _sample_rate() if sample_rate is None else sample_rate
+        self.sampled = random.random() < rate
+        self.status_code = None
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def headers(self):
+        return {'traceparent': self.traceparent}
+
+    def set_status(self, status_code):
+        self.status_code = status_code
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.error = str(exc)[:500]
+        elif self.status_code is not None and self.status_code >= 500:
+            self.error = f"HTTP {self.status_code}"
+        path = os.environ.get('TRACE_FILE')
+        if self.sampled and path:
+            self._export(path, time.time_ns())
+        return False
+
+    def _export(self, path, end_ns):
+        attributes = [{'key': 'url.full', 'value': {'stringValue': self.url}}]
+        if self.status_code is not None:
+            attributes.append({'key': 'http.response.status_code', 'value': {'intValue': str(self.status_code)}})
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': CLIENT,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(end_ns),
+            'attributes': attributes,
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error else {}
+        }
+        line = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span]}]
+        }]}, separators=(',', ':'))
+        try:
+            with _write_lock, open(path, 'a', encoding='utf-8') as out:
+                out.write(line + '\n')
+        except OSError:
+            pass  # tracing must never break a call
@@ -0,0 +1,71 @@
+"""
+Cached processing of uploaded posters
+
+Streamlit reruns the whole script on every widget interaction. These
+helpers key the expensive work by the upload's content hash, so encoding
+and extraction only happen again when the file itself changes.
+"""
+
+import base64
+import hashlib
+import streamlit as st
+
+from .image_optimizer import optimize_for_upload, DEFAULT_MAX_LONG_EDGE
+
+
+class ExtractionFailed(Exception):
+    """Raised so failed extractions are not cached"""
+
+
+def file_digest(file_bytes):
+    """Content hash used as the cache key for an upload"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def encode_image(digest, _file_bytes, max_long_edge=DEFAULT_MAX_LONG_EDGE, fmt='png'):
+    """
+    Downscale, recompress and base64 an uploaded image
+
+    Args:
+        digest (str): file_digest of the upload (the cache key)
+        _file_bytes (bytes): Raw upload, not hashed by Streamlit
+        max_long_edge (int): Long-edge cap in pixels
+        fmt (str): Upload format, see image_optimizer.FORMATS
+
+    Returns:
+        dict: 'base64', 'mime_type', byte counts before and after, and
+        the uploaded pixel 'size'
+    """
+    optimized = optimize_for_upload(_file_bytes, max_long_edge=max_long_edge, fmt=fmt)
+    return {
+        'base64': base64.b64encode(optimized.data).decode(),
+        'mime_type': optimized.mime_type,
+        'original_bytes': optimized.original_bytes,
+        'optimized_bytes': len(optimized.data),
+        'percent_saved': optimized.percent_saved,
+        'size': optimized.size
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def extract_cached(digest, _api_client, _encoded):
+    """
+    Run backend extraction once per distinct upload
+
+    Args:
+        digest (str): Cache key; must change with anything that changes
+            the uploaded bytes (file hash plus optimizer settings)
+        _api_client (APIClient): Client used for the request
+        _encoded (dict): Result of encode_image
+
+    Returns:
+        dict: Successful extraction response
+
+    Raises:
+        ExtractionFailed: With the backend's error message
+    """
+    result = _api_client.extract_data(_encoded['base64'], _encoded['mime_type'])
+    if not result.get('success'):
+        raise ExtractionFailed(result.get('error', 'Unknown error'))
+    return result
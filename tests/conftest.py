@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Backend modules import each other as top-level packages (config, services, utils)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+# Local fakes of Gemini, Tesseract, Sheets and SMTP shared with the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+# The frontend's utils package clashes with the backend's, so it is
+# imported as frontend_streamlit.utils from the repository root
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,49 @@
+import requests
+
+from frontend_streamlit.utils.api_client import APIClient, CircuitBreaker
+
+
+def timeout(*args, **kwargs):
+    raise requests.exceptions.Timeout('busy')
+
+
+def test_failed_health_probes_open_the_breaker_only_at_its_threshold(monkeypatch):
+    monkeypatch.setattr(requests, 'get', timeout)
+    client = APIClient('http://127.0.0.1:9/api', health_interval=3600)
+    client.close()
+    client._poller.join()
+    client.breaker = CircuitBreaker(failure_threshold=3)
+
+    for _ in range(2):
+        client._check_health()
+    assert client.breaker.allow_request()
+
+    client._check_health()
+    assert not client.breaker.allow_request()
+
+
+def test_image_uploads_are_sent_uncompressed(monkeypatch):
+    monkeypatch.setattr(requests, 'get', timeout)
+    client = APIClient('http://127.0.0.1:9/api', health_interval=3600)
+    client.close()
+    client._poller.join()
+    client.breaker = CircuitBreaker()
+
+    sent = {}
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'success': True}
+
+    def post(url, data, headers, timeout):
+        sent[url.rsplit('/', 1)[1]] = headers
+        return Response()
+
+    monkeypatch.setattr(client.session, 'post', post)
+    client.extract_data('A' * 4096)
+    client.generate_email('good_artist', {'event_name': 'x' * 4096})
+
+    assert 'Content-Encoding' not in sent['extract']
+    assert sent['generate-email']['Content-Encoding'] == 'gzip'
@@ -0,0 +1,46 @@
+import asyncio
+
+from frontend_streamlit.utils.api_client import BACKEND_DOWN_ERROR
+from frontend_streamlit.utils.async_api_client import AsyncAPIClient
+
+EVENT = {'event_name': 'Summer Jam', 'artist_email': 'owls@example.com'}
+
+
+async def dropping_server():
+    """Server that reads each request, starts a response and hangs up"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(await reader.readuntil(b'\r\n\r\n'))
+        writer.write(b'HTTP/1.1 200 OK\r\n')
+        await writer.drain()
+        writer.transport.abort()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, connections
+
+
+def run_against_dropping_server(call):
+    async def main():
+        server, connections = await dropping_server()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with AsyncAPIClient(f"http://127.0.0.1:{port}/api", retries=2, backoff_factor=0) as client:
+                result = await call(client)
+        return result, len(connections)
+
+    return asyncio.run(main())
+
+
+def test_dropped_connection_is_not_replayed_for_non_idempotent_calls():
+    result, attempts = run_against_dropping_server(lambda client: client.send_email('a@b.co', 'Hi', 'Body'))
+
+    assert attempts == 1
+    assert result == {'success': False, 'error': BACKEND_DOWN_ERROR}
+
+
+def test_dropped_connection_is_retried_for_idempotent_calls():
+    result, attempts = run_against_dropping_server(lambda client: client.generate_email('good_artist', EVENT))
+
+    assert attempts == 3
+    assert result['success'] is False
@@ -0,0 +1,93 @@
+import base64
+import csv
+import io
+import json
+import threading
+import time
+
+from PIL import Image
+
+from frontend_streamlit.utils.batch_upload import (
+    DONE, FAILED, RESULT_FIELDS, BatchItem, process_item, run_batch, summarize, to_csv, to_json
+)
+
+
+def png_bytes(color=200):
+    buffered = io.BytesIO()
+    Image.new('L', (40, 30), color).save(buffered, format='PNG')
+    return buffered.getvalue()
+
+
+class StubClient:
+    """Stands in for APIClient.extract_data, tracking concurrent calls"""
+
+    def __init__(self, fail_colors=(), delay=0.02):
+        self.fail_colors = fail_colors
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def extract_data(self, image_base64, mime_type='image/png'):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            color = Image.open(io.BytesIO(base64.b64decode(image_base64))).getpixel((0, 0))
+            if color in self.fail_colors:
+                return {'success': False, 'error': 'No text found'}
+            return {'success': True, 'data': {'event_name': f"Show {color}", 'venue_email': 'a@b.example'}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_process_item_records_success_and_failure():
+    item = process_item(BatchItem('ok.png', png_bytes(10)), StubClient())
+    assert item.stage == DONE
+    assert item.data['event_name'] == 'Show 10'
+    assert item.upload_bytes and item.latency_ms is not None
+
+    item = process_item(BatchItem('blank.png', png_bytes(20)), StubClient(fail_colors=(20,)))
+    assert item.stage == FAILED and item.error == 'No text found'
+
+    item = process_item(BatchItem('notes.txt', b'not an image'), StubClient())
+    assert item.stage == FAILED and item.error
+    assert item.latency_ms is not None
+
+
+def test_run_batch_caps_concurrency_and_continues_past_failures():
+    items = [BatchItem(f"{n}.png", png_bytes(n)) for n in range(12)]
+    items.insert(3, BatchItem('broken.png', b'\x89PNG broken'))
+    client = StubClient(fail_colors=(5,))
+
+    progress = list(run_batch(items, client, max_in_flight=3, refresh_interval=0.01))
+
+    assert 1 < client.peak <= 3
+    assert client.calls == 12
+    assert progress[-1] == len(items)
+    assert progress == sorted(progress)
+    assert summarize(items) == {DONE: 11, FAILED: 2}
+    assert items[3].stage == FAILED
+    assert next(item for item in items if item.name == '5.png').error == 'No text found'
+
+
+def test_exports_have_one_row_per_item_with_result_columns():
+    items = [BatchItem('ok.png', png_bytes(10)), BatchItem('blank.png', png_bytes(20))]
+    list(run_batch(items, StubClient(fail_colors=(20,)), max_in_flight=2))
+
+    rows = list(csv.DictReader(io.StringIO(to_csv(items))))
+    assert list(rows[0]) == ['file', 'stage', 'latency_ms', 'upload_kb', 'error'] + RESULT_FIELDS
+    assert [(row['file'], row['stage'], row['event_name']) for row in rows] == [
+        ('ok.png', DONE, 'Show 10'), ('blank.png', FAILED, '')
+    ]
+    assert rows[1]['error'] == 'No text found'
+
+    exported = json.loads(to_json(items))
+    assert exported[0]['data'] == {'event_name': 'Show 10', 'venue_email': 'a@b.example'}
+    assert exported[0]['venue_email'] == 'a@b.example'
+    assert exported[1]['data'] is None and exported[1]['error'] == 'No text found'
+    assert to_csv([]) == ''
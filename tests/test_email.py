@@ -0,0 +1,45 @@
+import email
+import shutil
+import socket
+
+import pytest
+from fakes import SmtpSink
+
+import app
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    if shutil.which('openssl') is None:
+        pytest.skip('SmtpSink needs the openssl command line tool')
+    with SmtpSink() as sink:
+        monkeypatch.setattr(app, 'SMTP_SERVER', sink.host)
+        monkeypatch.setattr(app, 'SMTP_PORT', sink.port)
+        monkeypatch.setattr(app, 'EMAIL_ADDRESS', 'events@sender.test')
+        monkeypatch.setattr(app, 'EMAIL_PASSWORD', 'secret')
+        yield sink
+
+
+def test_send_email_delivers_over_starttls(smtp):
+    response = app.app.test_client().post('/api/send-email', json={
+        'to': 'owls@band.test', 'subject': 'Summer Jam', 'body': 'Line one\n.\nLine three'
+    })
+
+    assert response.status_code == 200
+    [(sender, recipients, data)] = smtp.messages
+    assert (sender, recipients) == ('events@sender.test', ['owls@band.test'])
+    message = email.message_from_bytes(data)
+    assert message['Subject'] == 'Summer Jam'
+    assert message.get_payload(0).get_payload().splitlines() == ['Line one', '.', 'Line three']
+
+
+def test_unreachable_server_returns_an_error(smtp, monkeypatch):
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        monkeypatch.setattr(app, 'SMTP_PORT', unused.getsockname()[1])
+
+    response = app.app.test_client().post('/api/send-email', json={
+        'to': 'owls@band.test', 'subject': 'Summer Jam', 'body': 'Hi'
+    })
+
+    assert response.status_code == 500
@@ -0,0 +1,69 @@
+import pytest
+
+from models.data_model import EventBatch, EventData
+
+EVENT = EventData(
+    event_name='Summer Jam', artist_name='Björk Trio', venue_name='Blue Room', venue_owner='Sam Lee',
+    date='2025-07-15', time='8:00 PM', location='Austin, TX', artist_email='trio@example.com'
+)
+
+
+def test_event_codecs_round_trip():
+    assert not hasattr(EVENT, '__dict__')
+    assert EventData.from_dict(EVENT.to_dict()) == EVENT
+    assert EventData.from_json(EVENT.to_json()) == EVENT
+    assert EventData.from_bytes(EVENT.to_bytes()) == EVENT
+    odd = EventData(event_name='Nul\x00Show', location='')
+    assert EventData.from_bytes(odd.to_bytes()) == odd
+    assert EventData.from_dict({'event_name': 'X'}) == EventData(event_name='X')
+
+    with pytest.raises(ValueError):
+        EventData.from_bytes(b'\x00only one field')
+
+
+def test_batch_columns_codecs_and_bulk_operations():
+    events = [EVENT, EventData(event_name='Late Show'), EventData.from_dict(dict(EVENT.to_dict(), venue_name='BLUE ROOM'))]
+    batch = EventBatch.from_events(events)
+
+    assert len(batch) == 3 and list(batch) == events and batch[1] == events[1]
+    assert batch.columns['date'][0] is batch.columns['date'][2]  # stored once per column
+    assert EventBatch.from_json(batch.to_json()) == batch
+    assert EventBatch.from_bytes(batch.to_bytes()) == batch
+    odd = EventBatch.from_events(events + [EventData(artist_name='a\x00b')])
+    assert EventBatch.from_bytes(odd.to_bytes()) == odd
+    assert EventBatch.from_bytes(EventBatch().to_bytes()) == EventBatch()
+    assert list(EventBatch.from_dicts(batch.to_dicts())) == events
+
+    assert list(batch.dedupe()) == events[:2]
+    assert batch.sheet_rows('2025-01-01 10:00:00')[1] == ['2025-01-01 10:00:00', 'Late Show'] + [
+        'Not specified'] * 6 + ['', '']
+
+    with pytest.raises(ValueError):
+        EventBatch.from_bytes(batch.to_bytes() + b'x')
+
+
+def test_from_dicts_normalizes_values_for_every_codec():
+    batch = EventBatch.from_dicts([{'event_name': None, 'date': 20250715, 'venue_email': None}])
+
+    assert batch[0] == EventData(date='20250715')
+    assert EventBatch.from_json(batch.to_json()) == EventBatch.from_bytes(batch.to_bytes()) == batch
+
+
+def test_batch_endpoint_dedupes_events_on_request():
+    import json
+
+    from app import app
+
+    events = [EVENT.to_dict(), dict(EVENT.to_dict(), event_name='SUMMER JAM'), {'event_name': 'Late Show'}]
+    client = app.test_client()
+
+    def rendered(**options):
+        response = client.post('/api/generate-email/batch', json=dict(
+            template_ids=['good_artist'], events=events, **options
+        ))
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert len(rendered()) == 3
+    deduped = rendered(dedupe=True)
+    assert [entry['event_index'] for entry in deduped] == [0, 1]
+    assert 'Late Show' in deduped[1]['email']['subject']
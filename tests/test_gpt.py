@@ -0,0 +1,19 @@
+from fakes import FakeModel, canned_corpus
+
+import app
+
+
+def test_categorize_reads_fields_from_the_model_reply(monkeypatch):
+    poster = canned_corpus(1)[0]
+    monkeypatch.setattr(app, 'model', FakeModel())
+
+    data = app.categorize_with_gemini(poster.text)
+
+    assert data == {field: poster.event[field] for field in data}
+    assert set(data) == {'event_name', 'artist_name', 'venue_name', 'venue_owner', 'date', 'time', 'location'}
+
+
+def test_unparseable_reply_falls_back_to_not_specified():
+    data = app.parse_gemini_response('Sorry, I cannot read this poster.')
+
+    assert set(data.values()) == {'Not specified'}
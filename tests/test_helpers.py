@@ -0,0 +1,32 @@
+from datetime import date
+
+from utils.datetime_normalizer import normalize_dates, normalize_times
+from utils.helpers import format_date, format_time
+
+REFERENCE = date(2024, 10, 1)
+
+
+def test_format_date_keeps_original_behaviour():
+    assert format_date('2024-07-15') == '2024-07-15'
+    assert format_date('15/07/2024') == '2024-07-15'
+    assert format_date('July 15, 2024') == '2024-07-15'
+    assert format_date('15 Jul 2024') == '2024-07-15'
+    assert format_date('31/02/2024') == '31/02/2024'
+    assert format_date('Not specified') == 'Not specified'
+
+
+def test_normalize_dates_infers_format_per_batch():
+    # Day-first is implied by the second value, so the first follows suit
+    assert normalize_dates(['05/06/2024', '25/12/2024']) == ['2024-06-05', '2024-12-25']
+    assert normalize_dates(['05/06/2024', '12/25/2024']) == ['2024-05-06', '2024-12-25']
+
+
+def test_dates_without_year_use_weekday_and_reference():
+    assert normalize_dates(['Sat 12th Oct', '3rd Jan'], reference=REFERENCE) == ['2024-10-12', '2025-01-03']
+
+
+def test_normalize_times():
+    assert normalize_times(['7pm', '19:00', '7.30 p.m.', 'noon', '0:15', '25:00']) == [
+        '7:00 PM', '7:00 PM', '7:30 PM', '12:00 PM', '12:15 AM', '25:00'
+    ]
+    assert format_time('Not specified') == 'Not specified'
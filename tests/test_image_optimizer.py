@@ -0,0 +1,52 @@
+import io
+import os
+
+import pytest
+from PIL import Image, ImageChops
+
+from frontend_streamlit.utils.image_optimizer import FORMATS, optimize_for_upload
+
+
+def photo_bytes(size=(1600, 800), fmt='PNG'):
+    """Noisy color image, so the original compresses poorly like a photo"""
+    buffered = io.BytesIO()
+    Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)).save(buffered, format=fmt)
+    return buffered.getvalue()
+
+
+@pytest.mark.parametrize('fmt', sorted(FORMATS))
+def test_long_edge_is_capped_and_output_is_grayscale(fmt):
+    original = photo_bytes()
+    optimized = optimize_for_upload(original, max_long_edge=400, fmt=fmt)
+
+    assert optimized.original_size == (1600, 800)
+    assert optimized.size == (400, 200)
+    assert optimized.mime_type == FORMATS[fmt][1]
+
+    image = Image.open(io.BytesIO(optimized.data))
+    assert image.format == FORMATS[fmt][0]
+    assert image.size == (400, 200)
+    if fmt == 'webp':
+        # WebP has no grayscale mode; Pillow decodes it as RGB with equal
+        # channels, give or take YUV rounding
+        red, green, blue = image.convert('RGB').split()
+        assert ImageChops.difference(red, green).getextrema()[1] <= 2
+        assert ImageChops.difference(green, blue).getextrema()[1] <= 2
+    else:
+        assert image.mode == 'L'
+
+    assert optimized.original_bytes == len(original)
+    assert optimized.bytes_saved == len(original) - len(optimized.data) > 0
+    assert optimized.percent_saved == pytest.approx(100.0 * optimized.bytes_saved / len(original))
+
+
+def test_small_original_is_kept_when_reencoding_does_not_help():
+    buffered = io.BytesIO()
+    Image.new('L', (50, 50), 255).save(buffered, format='PNG', optimize=True)
+    original = buffered.getvalue()
+
+    optimized = optimize_for_upload(original, max_long_edge=1000, fmt='jpeg')
+
+    assert optimized.data == original
+    assert optimized.mime_type == 'image/png'
+    assert optimized.bytes_saved == 0 and optimized.percent_saved == 0.0
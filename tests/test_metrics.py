@@ -0,0 +1,106 @@
+import asyncio
+import gc
+import threading
+
+import pytest
+
+from utils.metrics import ERROR, IN_FLIGHT, OK, STAGES, StageMetrics, stage_timer, timed
+
+
+def test_counts_are_exact_under_concurrent_threads():
+    metrics = StageMetrics('test', buckets=(0.5, 1))
+
+    def record():
+        for _ in range(10000):
+            cells = metrics.cells('ocr')
+            cells[IN_FLIGHT] += 1
+            metrics.record(cells, 0, failed=False)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = metrics.render().splitlines()
+    assert '# TYPE test_duration_seconds histogram' in lines
+    # Started at perf_counter() == 0, so every call lands in +Inf
+    assert 'test_duration_seconds_bucket{stage="ocr",le="1"} 0' in lines
+    assert 'test_duration_seconds_bucket{stage="ocr",le="+Inf"} 80000' in lines
+    assert 'test_duration_seconds_count{stage="ocr"} 80000' in lines
+    assert 'test_calls_total{stage="ocr",outcome="ok"} 80000' in lines
+    assert 'test_in_flight{stage="ocr"} 0' in lines
+
+
+def test_shards_of_finished_threads_are_retired():
+    metrics = StageMetrics('test', buckets=(0.5, 1))
+
+    def record():
+        cells = metrics.cells('scrape')
+        cells[IN_FLIGHT] += 1
+        metrics.record(cells, 0, failed=False)
+
+    for _ in range(50):
+        thread = threading.Thread(target=record)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(metrics._shards) <= 1
+    assert metrics.value('scrape', OK) == 50
+    assert metrics.value('scrape', IN_FLIGHT) == 0
+
+
+def test_timed_records_outcomes_and_in_flight():
+    @timed('test_sync', ok=bool)
+    def send(success):
+        assert STAGES.value('test_sync', IN_FLIGHT) == 1
+        return success
+
+    @timed('test_async')
+    async def categorize():
+        raise ValueError('no model')
+
+    send(True)
+    send(False)
+    with pytest.raises(ValueError):
+        asyncio.run(categorize())
+    with pytest.raises(KeyError), stage_timer('test_context'):
+        raise KeyError('event_name')
+
+    assert STAGES.value('test_sync', OK) == 1
+    assert STAGES.value('test_sync', ERROR) == 1
+    assert STAGES.value('test_async', ERROR) == 1
+    assert STAGES.value('test_context', ERROR) == 1
+    assert STAGES.value('test_sync', IN_FLIGHT) == 0
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    from app import app, COMPILED_TEMPLATES
+    from services.render_service import render_event
+
+    list(render_event(0, {}, list(COMPILED_TEMPLATES), COMPILED_TEMPLATES))
+    response = app.test_client().get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert '# TYPE poster_stage_duration_seconds histogram' in body
+    assert 'poster_stage_calls_total{stage="render",outcome="error"}' in body
+
+
+def test_generate_email_is_timed_as_render():
+    from app import app
+    from models.data_model import EventData
+
+    client = app.test_client()
+    ok, error = STAGES.value('render', OK), STAGES.value('render', ERROR)
+    assert client.post('/api/generate-email', json={
+        'template_type': 'good_artist', 'event_data': EventData().to_dict()
+    }).status_code == 200
+    assert client.post('/api/generate-email', json={
+        'template_type': 'good_artist', 'event_data': {}
+    }).status_code == 500
+
+    assert STAGES.value('render', OK) == ok + 1
+    assert STAGES.value('render', ERROR) == error + 1
@@ -0,0 +1,72 @@
+import io
+
+import pytest
+from PIL import Image
+
+from utils.image_decode import ImageTooLarge, load_for_ocr
+
+
+def encode(image, fmt, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def test_large_jpeg_is_decoded_at_reduced_scale_in_grayscale():
+    poster = encode(Image.new('RGB', (8000, 6000), 'white'), 'JPEG')
+
+    image = load_for_ocr(poster, max_pixels=24_000_000, max_long_edge=2000)
+
+    # 1/4 scale is the smallest that keeps a 2000px long edge
+    assert image.size == (2000, 1500)
+    assert image.mode == 'L'
+
+
+def test_pixel_guard_rejects_before_decoding():
+    poster = encode(Image.new('L', (3000, 3000)), 'PNG')
+
+    with pytest.raises(ImageTooLarge):
+        load_for_ocr(poster, max_pixels=4_000_000, max_long_edge=2000)
+
+
+def test_pillow_decompression_bomb_is_reported_as_too_large(monkeypatch):
+    poster = encode(Image.new('L', (3000, 3000)), 'PNG')
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1_000_000)
+
+    with pytest.raises(ImageTooLarge):
+        load_for_ocr(poster, max_pixels=24_000_000, max_long_edge=2000)
+
+
+def test_native_modes_are_not_converted():
+    for mode in ('L', 'RGB', 'P'):
+        image = load_for_ocr(encode(Image.new(mode, (40, 30)), 'PNG'), 1_000_000, 2000)
+        assert image.mode == mode
+
+    cmyk = load_for_ocr(encode(Image.new('CMYK', (40, 30)), 'JPEG'), 1_000_000, 2000)
+    assert cmyk.mode == 'L'
+
+
+def test_extract_endpoint_end_to_end_with_fakes():
+    from fakes import canned_corpus, offline_backend
+
+    corpus = canned_corpus(2)
+    with offline_backend(corpus) as (backend, fakes):
+        response = backend.app.test_client().post('/api/extract', json={'image': corpus[1].data_url})
+
+    assert response.status_code == 200
+    assert response.json['data'] == corpus[1].event
+    assert fakes['ocr'].calls == 1 and fakes['model'].calls == 1
+
+
+def test_extract_endpoint_rejects_oversized_image(monkeypatch):
+    from config import Config
+    from fakes import canned_corpus, offline_backend
+
+    corpus = canned_corpus(1)
+    with offline_backend(corpus) as (backend, fakes):
+        monkeypatch.setattr(Config, 'OCR_MAX_PIXELS', 100)
+        response = backend.app.test_client().post('/api/extract', json={'image': corpus[0].data_url})
+
+    assert response.status_code == 413
+    assert 'pixel limit' in response.json['error']
+    assert fakes['ocr'].calls == 0
@@ -0,0 +1,122 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage, StageFailed, StageTimeout, shutdown_stage_executor
+
+
+def slow(value, delay):
+    time.sleep(delay)
+    return value
+
+
+def test_independent_stages_run_concurrently():
+    pipeline = Pipeline([
+        Stage('a', lambda start: slow(start + 1, 0.3), deps=('start',)),
+        Stage('b', lambda start: slow(start + 2, 0.3), deps=('start',)),
+        Stage('total', lambda a, b: a + b, deps=('a', 'b')),
+    ])
+    started = time.perf_counter()
+    result = pipeline.run(start=1)
+    assert result.results['total'] == 5
+    assert time.perf_counter() - started < 0.5
+    assert set(result.timings) == {'a', 'b', 'total'}
+
+
+def test_non_critical_timeout_returns_partial_result():
+    pipeline = Pipeline([
+        Stage('fast', lambda: 'ok'),
+        Stage('lookup', lambda: slow('late', 1), deadline=0.1, critical=False, default=''),
+    ])
+    result = pipeline.run()
+    assert result.results['fast'] == 'ok'
+    assert result.results['lookup'] == ''
+    assert result.timed_out == ['lookup']
+
+
+def test_deadline_starts_when_stage_gets_a_thread():
+    executor = ThreadPoolExecutor(max_workers=1)
+    pipeline = Pipeline([
+        Stage('stuck', lambda: slow('late', 0.5), deadline=0.1, critical=False, default=''),
+        Stage('queued', lambda: slow('ok', 0.05), deadline=0.3),
+    ], executor=executor)
+    try:
+        result = pipeline.run()
+    finally:
+        executor.shutdown()
+    # queued waited 0.5s for the thread stuck holds, then ran within its deadline
+    assert result.results == {'stuck': '', 'queued': 'ok'}
+    assert result.timed_out == ['stuck']
+    assert result.timings['queued'] >= 500
+
+
+def test_critical_stage_errors_propagate():
+    with pytest.raises(StageTimeout):
+        Pipeline([Stage('ocr', lambda: slow('x', 1), deadline=0.1)]).run()
+
+    def broken():
+        raise ValueError('Failed to extract text from image')
+
+    with pytest.raises(StageFailed) as excinfo:
+        Pipeline([Stage('ocr', broken)]).run()
+    assert str(excinfo.value.error) == 'Failed to extract text from image'
+
+
+def test_background_stage_is_not_awaited():
+    result = Pipeline([
+        Stage('data', lambda: 'row'),
+        Stage('sheets', lambda data: slow(None, 1), deps=('data',), background=True),
+    ]).run()
+    assert 'sheets' not in result.results
+    assert 'sheets' not in result.timings
+
+
+def test_shutdown_drains_background_stages():
+    finished = []
+    Pipeline([
+        Stage('data', lambda: 'row'),
+        Stage('sheets', lambda data: finished.append(slow(data, 0.3)), deps=('data',), background=True),
+    ]).run()
+    assert not finished
+    shutdown_stage_executor(wait=True)
+    assert finished == ['row']
+
+
+def test_run_async_mixes_coroutine_and_blocking_stages():
+    async def fetch(start):
+        await asyncio.sleep(0.3)
+        return start + 1
+
+    async def hang(start):
+        await asyncio.sleep(1)
+
+    pipeline = Pipeline([
+        Stage('a', fetch, deps=('start',)),
+        Stage('b', lambda start: slow(start + 2, 0.3), deps=('start',)),
+        Stage('total', lambda a, b: a + b, deps=('a', 'b')),
+        Stage('lookup', hang, deps=('start',), deadline=0.1, critical=False, default=''),
+    ])
+    started = time.perf_counter()
+    result = asyncio.run(pipeline.run_async(start=1))
+    assert result.results['total'] == 5
+    assert result.results['lookup'] == ''
+    assert result.timed_out == ['lookup']
+    assert time.perf_counter() - started < 0.5
+
+
+def test_run_async_holds_many_concurrent_runs():
+    async def llm(image):
+        await asyncio.sleep(0.2)
+        return image
+
+    pipeline = Pipeline([Stage('categorize', llm, deps=('image',))])
+
+    async def main():
+        return await asyncio.gather(*(pipeline.run_async(image=i) for i in range(300)))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    assert [r.results['categorize'] for r in results] == list(range(300))
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,32 @@
+from bench_ocr_accuracy import char_accuracy, evaluate, fast_path
+from models.data_model import EventData
+from poster_corpus import generate, read_corpus, write_corpus
+
+
+def test_posters_are_reproducible_and_carry_ground_truth():
+    first = list(generate(3, seed=5, difficulty=1, max_long_edge=900))
+    second = list(generate(3, seed=5, difficulty=1, max_long_edge=900))
+
+    assert [poster.encode() for poster in first] == [poster.encode() for poster in second]
+    for poster in first:
+        assert isinstance(poster.event, EventData)
+        assert poster.lines[0].lower() == poster.event.event_name.lower()
+        assert max(poster.image.size) <= 900
+
+
+def test_perfect_ocr_scores_full_marks(tmp_path):
+    write_corpus(generate(4, seed=2, difficulty=0, max_long_edge=900), tmp_path)
+    corpus = [(data, event, lines) for data, event, lines, _ in read_corpus(tmp_path)]
+    texts = iter('\n'.join(lines) for _, _, lines in corpus)
+
+    result = evaluate(corpus, 6, 'none', 900, lambda image, config: next(texts))
+
+    assert result['char_accuracy'] == 1
+    assert result['field_recall'] == 1
+    assert result['fast_path'] == 1
+
+
+def test_scoring_of_imperfect_ocr():
+    assert char_accuracy('Summer Jarn', 'Summer  Jam') == 1 - 2 / 10
+    found = fast_path('SUMMER JAM\nSaturday, July 18 2026 | 8.30pm\nbookings@blueroom.com')
+    assert found == {'date': '2026-07-18', 'time': '8:30 PM', 'emails': {'bookings@blueroom.com'}}
@@ -0,0 +1,82 @@
+import pstats
+import threading
+
+import pytest
+
+from config import Config
+
+TOKEN = 'let-me-in'
+
+
+@pytest.fixture
+def debug_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'DEBUG_TOKEN', TOKEN)
+    monkeypatch.setattr(Config, 'PROFILE_DIR', str(tmp_path))
+
+
+def test_profile_endpoint_is_guarded(monkeypatch, debug_token):
+    from app import app
+
+    client = app.test_client()
+    assert client.get('/api/debug/profile', headers={'X-Debug-Token': 'wrong'}).status_code == 403
+    assert client.get('/api/debug/profile?seconds=600', headers={'X-Debug-Token': TOKEN}).status_code == 400
+
+    monkeypatch.setattr(Config, 'DEBUG_TOKEN', None)
+    assert client.get('/api/debug/profile', headers={'X-Debug-Token': TOKEN}).status_code == 404
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_endpoint_returns_collapsed_stacks(debug_token):
+    from app import app
+
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name='busy')
+    worker.start()
+    try:
+        response = app.test_client().get('/api/debug/profile?seconds=0.3', headers={'X-Debug-Token': TOKEN})
+    finally:
+        stop.set()
+        worker.join()
+
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    busy = [line for line in lines if line.startswith('busy;')]
+    assert busy and all('busy_loop (tests/test_profiling.py)' in line for line in busy)
+    stack, count = busy[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert int(response.headers['X-Profile-Samples']) >= 10
+
+
+def test_request_profile_covers_pipeline_stage_threads(debug_token):
+    from fakes import canned_corpus, offline_backend
+
+    corpus = canned_corpus(1)
+    with offline_backend(corpus) as (backend, _):
+        client = backend.app.test_client()
+        plain = client.post('/api/extract', json={'image': corpus[0].data_url})
+        response = client.post(
+            '/api/extract', json={'image': corpus[0].data_url}, headers={'X-Profile': '1', 'X-Debug-Token': TOKEN}
+        )
+
+    assert 'X-Profile-File' not in plain.headers
+    assert response.status_code == 200
+    functions = {name for _, _, name in pstats.Stats(response.headers['X-Profile-File']).stats}
+    # The endpoint runs on the request thread, OCR on a stage pool thread
+    assert {'extract_poster_data', 'ocr_stage'} <= functions
+
+
+def test_single_profiler_pythons_profile_the_request_thread_only(monkeypatch):
+    from utils import profiling
+
+    profile = profiling.RequestProfile()
+    token = profile.activate()
+    try:
+        assert profiling.profiled(busy_loop) is not busy_loop
+        monkeypatch.setattr(profiling, 'PER_THREAD_PROFILES', False)
+        assert profiling.profiled(busy_loop) is busy_loop
+    finally:
+        profile.deactivate(token)
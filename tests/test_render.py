@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from services.render_service import InvalidEvent, aiter_ndjson
+
+EVENT = {
+    'event_name': 'Summer Jam', 'artist_name': 'The Midnight Owls', 'venue_name': 'Blue Room',
+    'venue_owner': 'Sam Lee', 'date': '2025-07-15', 'time': '8:00 PM', 'location': 'Austin, TX',
+    'artist_email': 'owls@example.com', 'venue_email': 'bookings@blueroom.example'
+}
+
+
+def post_batch(**kwargs):
+    from app import app
+
+    response = app.test_client().post('/api/generate-email/batch', **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_batch_endpoint_renders_json_events():
+    results = post_batch(json={
+        'template_ids': ['good_artist', 'good_venue'], 'events': [EVENT, {'event_name': 'Late Show'}, 'oops']
+    })
+
+    assert [(entry['event_index'], entry.get('template_id')) for entry in results] == [
+        (0, 'good_artist'), (0, 'good_venue'), (1, 'good_artist'), (1, 'good_venue'), (2, None)
+    ]
+    assert results[0]['email']['to'] == 'owls@example.com'
+    assert results[1]['email']['to'] == 'bookings@blueroom.example'
+    assert results[2]['error'].startswith('Missing field')
+    assert results[4]['error'] == 'Event must be a JSON object, not str'
+
+
+def test_batch_endpoint_streams_ndjson_and_reports_bad_lines():
+    body = '\n'.join([json.dumps(EVENT), '{"event_name": ', '', json.dumps(EVENT)]) + '\n'
+    results = post_batch(
+        data=body, content_type='application/x-ndjson', query_string={'template_ids': 'good_artist'}
+    )
+
+    assert [entry['event_index'] for entry in results] == [0, 1, 2]
+    assert 'email' in results[0] and 'email' in results[2]
+    assert results[1]['error'].startswith('Invalid JSON')
+
+
+def test_batch_endpoint_rejects_unknown_templates():
+    from app import app
+
+    response = app.test_client().post('/api/generate-email/batch', json={'template_ids': ['nope'], 'events': []})
+    assert response.status_code == 400
+
+
+def test_aiter_ndjson_across_chunk_boundaries():
+    async def chunks():
+        for chunk in (b'{"a": 1}\n{"b"', b': 2}\n\xff\n', b'{"c": 3}'):
+            yield chunk
+
+    async def collect():
+        return [event async for event in aiter_ndjson(chunks())]
+
+    events = asyncio.run(collect())
+    assert events[:2] == [{'a': 1}, {'b': 2}] and events[3] == {'c': 3}
+    assert isinstance(events[2], InvalidEvent)
+
+
+def test_aiter_ndjson_is_linear_and_caps_line_length():
+    async def chunks(parts):
+        for part in parts:
+            yield part
+
+    async def collect(parts, **kwargs):
+        return [event async for event in aiter_ndjson(chunks(parts), **kwargs)]
+
+    # One event trickling in byte by byte
+    line = json.dumps(EVENT).encode() + b'\n'
+    assert asyncio.run(collect([line[i:i + 1] for i in range(len(line))])) == [EVENT]
+
+    long_line = [b'{"event_name": "'] + [b'x' * 100] * 50 + [b'"}\n', line]
+    events = asyncio.run(collect(long_line, max_line=1000))
+    assert isinstance(events[0], InvalidEvent) and 'longer than 1000' in events[0].error
+    assert events[1:] == [EVENT]
+
+
+def test_extract_response_includes_rendered_emails():
+    from fakes import canned_corpus, offline_backend
+
+    corpus = canned_corpus(1)
+    with offline_backend(corpus) as (backend, _):
+        response = backend.app.test_client().post('/api/extract', json={'image': corpus[0].data_url})
+        templates = backend.EMAIL_TEMPLATES
+
+    assert response.status_code == 200
+    event, emails = corpus[0].event, response.json['emails']
+    assert set(emails) == set(templates)
+    good_artist = emails['good_artist']
+    assert good_artist['to'] == event['artist_email']
+    assert good_artist['subject'] == templates['good_artist']['subject'].format(**event)
+    assert good_artist['body'] == templates['good_artist']['body'].format(**event)
+    assert emails['good_venue']['to'] == event['venue_email']
@@ -0,0 +1,171 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.contact_cache import ContactCache, Inconclusive
+from services.contact_crawler import ContactCrawler
+from services.html_scanner import ContactScanner, scan_html
+from services.scraper_service import candidate_urls, clean_name, scrape_email_from_social
+
+PAGES = {
+    '/robots.txt': 'User-agent: *\nDisallow: /private\n',
+    '/': '<html><body><a href="/contact">Contact</a> <a href="/private/team">Team</a></body></html>',
+    '/contact': '<html><body>Booking: <a href="mailto:booking@bluenote.test?subject=Hi">mail</a>'
+                '<img src="logo@2x.png"></body></html>',
+    '/private/team': '<html><body>secret@bluenote.test</body></html>',
+    '/links': ''.join(f'<a href="/contact-{i}">c</a>' for i in range(6)),
+    '/slow': '<html><body>late@bluenote.test</body></html>',
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(2)
+        elif self.path.startswith('/contact-'):
+            cls = type(self)
+            with cls.lock:
+                cls.active += 1
+                cls.max_active = max(cls.max_active, cls.active)
+            time.sleep(0.1)
+            with cls.lock:
+                cls.active -= 1
+
+        body = PAGES.get(self.path, '<html></html>' if self.path.startswith('/contact-') else None)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # The crawler hangs up early once it has an address
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = FixtureServer(('127.0.0.1', 0), FixtureHandler)
+    FixtureHandler.max_active = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_follows_contact_page_and_extracts_mailto(server):
+    emails = ContactCrawler(time_budget=5).find_emails([f"{server}/"])
+    assert emails == ['booking@bluenote.test']
+
+
+def test_honors_robots_txt(server):
+    emails = ContactCrawler(time_budget=5).find_emails([f"{server}/private/team"])
+    assert emails == []
+
+
+def test_time_budget_returns_partial_results(server):
+    start = time.monotonic()
+    crawler = ContactCrawler(time_budget=0.5)
+    emails = crawler.find_emails([f"{server}/slow"])
+    assert emails == [] and crawler.budget_spent
+    assert time.monotonic() - start < 1.5
+
+
+def test_per_host_concurrency_cap(server):
+    ContactCrawler(time_budget=5, per_host_limit=1, max_pages=8).find_emails([f"{server}/links"])
+    assert FixtureHandler.max_active == 1
+
+
+def test_candidate_urls():
+    assert clean_name('The Blue Note Café') == 'bluenotecafe'
+    assert clean_name('Ｓｉｇｕｒ Rós') == 'sigurros'
+    assert clean_name('東京') == '' and candidate_urls('東京', 'instagram') == []
+    assert candidate_urls('The Weeknd', 'instagram')[0] == 'https://www.instagram.com/weeknd/'
+    assert candidate_urls('venue.example.org', 'facebook') == ['https://venue.example.org']
+
+
+def test_contact_cache_ttls_and_persistence(tmp_path):
+    path = str(tmp_path / 'contacts.db')
+    cache = ContactCache(path, positive_ttl=60, negative_ttl=0)
+    cache.set('instagram:weeknd', 'booking@weeknd.test')
+    cache.set('facebook:nowhere', '')
+
+    reopened = ContactCache(path, positive_ttl=60, negative_ttl=0)
+    assert reopened.get('instagram:weeknd') == (True, 'booking@weeknd.test')
+    assert reopened.get('facebook:nowhere') == (False, None)
+
+
+def test_contact_cache_single_lookup_under_concurrency(tmp_path):
+    cache = ContactCache(str(tmp_path / 'contacts.db'), positive_ttl=60, negative_ttl=60)
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        time.sleep(0.2)
+        return ''
+
+    threads = [
+        threading.Thread(target=cache.get_or_lookup, args=('instagram:weeknd', lookup))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.get('instagram:weeknd') == (True, '')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 512, 100000])
+def test_streaming_scanner_across_chunk_boundaries(chunk_size):
+    page = (
+        b'<p>' + b'x' * 1500 + b' Bookings: Hello [at] Blue-Note [dot] co [dot] uk</p>'
+        b'<img src="poster@2x.png"><a href="MAILTO:info&#64;bluenote.test">mail</a>'
+    )
+    scanner = ContactScanner('http://bluenote.test/', collect_links=False)
+    for i in range(0, len(page), chunk_size):
+        scanner.feed(page[i:i + chunk_size])
+    emails, _ = scanner.close()
+    assert 'hello@blue-note.co.uk' in emails
+    assert scanner.done
+
+
+def test_scan_html_collects_links_without_contacts():
+    emails, links = scan_html('<a class="nav" href="/Contact">Contact</a> logo@2x.png', 'http://venue.test/')
+    assert links == ['http://venue.test/Contact']
+    assert emails == ['logo@2x.png']
+
+
+def test_contact_cache_skips_inconclusive_and_rechecks_under_lock(tmp_path):
+    cache = ContactCache(str(tmp_path / 'contacts.db'), positive_ttl=60, negative_ttl=60)
+
+    result = cache.get_or_lookup('instagram:slow', lambda: Inconclusive(''))
+    assert result == '' and type(result) is str
+    assert cache.get('instagram:slow') == (False, None)
+
+    # Another caller's lookup finished between the unlocked check and the lock
+    cache.set('instagram:weeknd', 'booking@weeknd.test')
+    cache.get = lambda key: (False, None)
+    assert cache.get_or_lookup('instagram:weeknd', lambda: pytest.fail('crawled twice')) == 'booking@weeknd.test'
+
+
+def test_names_without_a_slug_are_not_looked_up(monkeypatch):
+    from services import scraper_service
+
+    monkeypatch.setattr(scraper_service, 'get_contact_cache', lambda: pytest.fail('looked up'))
+    assert scrape_email_from_social('東京') == ''
@@ -0,0 +1,33 @@
+from fakes import FakeWorksheet
+
+import app
+from services.render_service import iter_sheet_events
+from utils.metrics import ERROR, STAGES
+
+EVENT = {
+    'event_name': 'Summer Jam', 'artist_name': 'The Midnight Owls', 'venue_name': 'Blue Room',
+    'venue_owner': 'Sam Lee', 'date': '2025-07-15', 'time': '8:00 PM', 'location': 'Austin, TX',
+    'artist_email': 'owls@band.test', 'venue_email': 'bookings@blueroom.test'
+}
+
+
+def test_saved_rows_read_back_as_events():
+    sheet = FakeWorksheet([['Timestamp', 'Event Name']])
+
+    assert app.save_to_google_sheets(EVENT, sheet)
+    assert app.save_to_google_sheets(dict(EVENT, artist_name='Other Band'), sheet)
+
+    events = list(iter_sheet_events(sheet, {'artist_name': 'The Midnight Owls'}, chunk_size=1))
+    assert len(events) == 1
+    assert {key: events[0][key] for key in EVENT} == EVENT
+
+
+def test_failed_write_returns_false_and_counts_as_error():
+    class BrokenSheet(FakeWorksheet):
+        def append_row(self, values, **kwargs):
+            raise ConnectionError('quota exceeded')
+
+    errors = STAGES.value('sheets', ERROR)
+
+    assert app.save_to_google_sheets(EVENT, BrokenSheet()) is False
+    assert STAGES.value('sheets', ERROR) == errors + 1
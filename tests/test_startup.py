@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+
+HEAVY = ['google.generativeai', 'openai', 'pytesseract', 'gspread', 'oauth2client', 'bs4', 'aiohttp']
+
+
+def loaded_after(code):
+    output = subprocess.run(
+        [sys.executable, '-c', f"{code}\nimport sys\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"],
+        cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout
+    return output.split()
+
+
+def test_app_import_defers_client_libraries():
+    assert loaded_after('import app') == []
+
+
+def test_services_exports_resolve_on_first_access():
+    import services
+
+    assert services.categorize_with_gpt.__module__ == 'services.gpt_service'
+    # Resolving the export loads its module, but not the client library
+    assert loaded_after('import services; services.categorize_with_gpt') == []
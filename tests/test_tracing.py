@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from utils import tracing
+from utils.metrics import stage_timer
+from utils.tracing import NOOP_SPAN, SERVER, begin_trace, end_span, flush_spans, parse_traceparent
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    flush_spans()
+    monkeypatch.setattr(tracing._exporter, 'path', str(path))
+    return path
+
+
+def exported_spans(path):
+    flush_spans()
+    lines = path.read_text().splitlines() if path.exists() else []
+    return [
+        span
+        for line in lines
+        for resource in json.loads(line)['resourceSpans']
+        for scope in resource['scopeSpans']
+        for span in scope['spans']
+    ]
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID.upper()}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent('garbage') is None
+    assert parse_traceparent(None) is None
+
+
+def test_sampled_trace_exports_server_and_stage_spans(trace_file):
+    span, token = begin_trace('POST /api/extract', f"00-{TRACE_ID}-{PARENT_ID}-01")
+    with stage_timer('ocr'):
+        pass
+    with pytest.raises(KeyError), stage_timer('render'):
+        raise KeyError('event_name')
+    end_span(span, token)
+
+    spans = {span['name']: span for span in exported_spans(trace_file)}
+    server = spans['POST /api/extract']
+    assert server['kind'] == SERVER
+    assert server['traceId'] == TRACE_ID and server['parentSpanId'] == PARENT_ID
+    assert spans['ocr']['parentSpanId'] == server['spanId']
+    assert spans['render']['status']['code'] == tracing.STATUS_ERROR
+    assert spans['ocr']['status'] == {}
+
+
+def test_unsampled_requests_export_nothing(trace_file):
+    span, token = begin_trace('GET /api/templates', f"00-{TRACE_ID}-{PARENT_ID}-00")
+    with stage_timer('render'):
+        pass
+    end_span(span, token)
+
+    assert span is NOOP_SPAN
+    assert exported_spans(trace_file) == []
+
+
+def test_flask_continues_the_callers_trace(trace_file):
+    from app import app
+
+    response = app.test_client().get('/api/templates', headers={'traceparent': f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    assert response.status_code == 200
+    [server] = exported_spans(trace_file)
+    assert server['name'] == 'GET /api/templates'
+    assert server['traceId'] == TRACE_ID
+    assert {'key': 'http.response.status_code', 'value': {'intValue': '200'}} in server['attributes']
@@ -0,0 +1,74 @@
+import argparse
+import json
+
+import pytest
+from werkzeug.test import Client
+
+from utils.middleware import TrafficRecorder
+from utils.traffic import RECORDED_HEADER, RECORDED_TOKEN, TrafficLog
+
+EVENT = {
+    'event_name': 'Summer Jam', 'artist_name': 'The Midnight Owls', 'venue_name': 'Blue Room',
+    'venue_owner': 'Sam Lee', 'date': '2025-07-15', 'time': '8:00 PM', 'location': 'Austin, TX'
+}
+
+
+def test_recorder_writes_sizes_status_and_duration(tmp_path):
+    from app import app
+
+    path = tmp_path / 'traffic.jsonl'
+    client = Client(TrafficRecorder(app, TrafficLog(str(path))))
+    body = json.dumps({'template_type': 'good_artist', 'event_data': EVENT})
+
+    response = client.post('/api/generate-email', data=body, content_type='application/json', buffered=True)
+    client.get('/api/templates', headers={RECORDED_HEADER: RECORDED_TOKEN}, buffered=True)  # recorded upstream
+    client.get('/api/health', headers={RECORDED_HEADER: '1'}, buffered=True)  # forged by a client
+
+    record, forged = [json.loads(line) for line in path.read_text().splitlines()]
+    assert forged['path'] == '/api/health'
+    assert record['method'] == 'POST' and record['path'] == '/api/generate-email'
+    assert record['request_bytes'] == len(body)
+    assert record['status'] == 200
+    assert record['response_bytes'] == len(response.get_data())
+    assert record['duration_ms'] >= 0
+
+
+def test_replay_against_offline_backend(tmp_path, capsys):
+    import replay_traffic
+
+    traffic = tmp_path / 'traffic.jsonl'
+    traffic.write_text(''.join(json.dumps({
+        'ts': 1000 + i * 0.05, 'method': method, 'path': path, 'request_bytes': size,
+        'status': 200, 'response_bytes': 0, 'duration_ms': 0
+    }) + '\n' for i, (method, path, size) in enumerate([
+        ('POST', '/api/extract', 40_000), ('POST', '/api/generate-email', 450),
+        ('GET', '/api/templates', 0), ('POST', '/api/send-email', 900), ('POST', '/api/extract', 40_000)
+    ])))
+
+    replay_traffic.run_replay(argparse.Namespace(
+        traffic=str(traffic), target=None, speed=10, limit=None, workers=8, json=True, allow_side_effects=False,
+        llm_latency=0, ocr_latency=0, lookup_latency=0, sheets_latency=0, smtp_latency=0
+    ))
+
+    report = json.loads(capsys.readouterr().out)['endpoints']
+    assert report['all']['requests'] == 5 and report['all']['errors'] == 0
+    assert report['POST /api/extract']['requests'] == 2
+    assert report['all']['p99_ms'] >= report['all']['p50_ms'] > 0
+
+
+def test_replay_against_a_target_skips_side_effects_by_default(tmp_path, capsys):
+    import replay_traffic
+
+    traffic = tmp_path / 'traffic.jsonl'
+    traffic.write_text(''.join(json.dumps({
+        'ts': 1000, 'method': 'POST', 'path': path, 'request_bytes': 100,
+        'status': 200, 'response_bytes': 0, 'duration_ms': 0
+    }) + '\n' for path in ('/api/send-email', '/api/extract')))
+
+    args = argparse.Namespace(
+        traffic=str(traffic), target='http://127.0.0.1:9', speed=1, limit=None, workers=1, json=True,
+        allow_side_effects=False
+    )
+    with pytest.raises(SystemExit, match='no requests to replay'):
+        replay_traffic.run_replay(args)
+    assert 'skipping 2 requests' in capsys.readouterr().err
@@ -0,0 +1,93 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from frontend_streamlit.utils import upload_cache
+from frontend_streamlit.utils.upload_cache import ExtractionFailed, encode_image, extract_cached, file_digest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    encode_image.clear()
+    extract_cached.clear()
+    yield
+    encode_image.clear()
+    extract_cached.clear()
+
+
+def png_bytes(color=200):
+    buffered = io.BytesIO()
+    Image.new('L', (3000, 100), color).save(buffered, format='PNG')
+    return buffered.getvalue()
+
+
+class StubClient:
+    """Stands in for APIClient.extract_data, counting requests"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.sent = []
+
+    def extract_data(self, image_base64, mime_type='image/png'):
+        self.sent.append((image_base64, mime_type))
+        return self.results.pop(0)
+
+
+def test_encode_image_output():
+    original = png_bytes()
+    encoded = encode_image.__wrapped__(file_digest(original), original, max_long_edge=1500, fmt='jpeg')
+
+    assert encoded['mime_type'] == 'image/jpeg'
+    assert encoded['size'] == (1500, 50)
+    assert encoded['original_bytes'] == len(original)
+    assert encoded['optimized_bytes'] == len(base64.b64decode(encoded['base64']))
+
+
+def test_encode_image_is_keyed_by_digest_not_bytes(monkeypatch):
+    calls = []
+    optimize = upload_cache.optimize_for_upload
+
+    def counting_optimize(file_bytes, **kwargs):
+        calls.append(kwargs)
+        return optimize(file_bytes, **kwargs)
+
+    monkeypatch.setattr(upload_cache, 'optimize_for_upload', counting_optimize)
+    original = png_bytes()
+    digest = file_digest(original)
+
+    first = encode_image(digest, original, max_long_edge=1500)
+    # The bytes themselves are not hashed, only the digest
+    assert encode_image(digest, b'', max_long_edge=1500) == first
+    # Different settings or contents are encoded again
+    encode_image(digest, original, max_long_edge=1000)
+    other = png_bytes(10)
+    encode_image(file_digest(other), other, max_long_edge=1500)
+
+    assert len(calls) == 3
+    assert file_digest(original) == digest != file_digest(other)
+
+
+def test_extract_cached_sends_an_unchanged_file_once():
+    client = StubClient([{'success': True, 'data': {'event_name': 'Summer Jam'}}])
+    encoded = {'base64': 'aW1n', 'mime_type': 'image/png'}
+
+    first = extract_cached('digest-a', client, encoded)
+    again = extract_cached('digest-a', StubClient([]), dict(encoded))
+
+    assert first == again == {'success': True, 'data': {'event_name': 'Summer Jam'}}
+    assert client.sent == [('aW1n', 'image/png')]
+
+
+def test_extract_cached_does_not_cache_failures():
+    client = StubClient([
+        {'success': False, 'error': 'Backend busy'},
+        {'success': True, 'data': {'event_name': 'Summer Jam'}},
+    ])
+    encoded = {'base64': 'aW1n', 'mime_type': 'image/png'}
+
+    with pytest.raises(ExtractionFailed, match='Backend busy'):
+        extract_cached('digest-b', client, encoded)
+    assert extract_cached('digest-b', client, encoded)['data'] == {'event_name': 'Summer Jam'}
+    assert len(client.sent) == 2
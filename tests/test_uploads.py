@@ -0,0 +1,225 @@
+import asyncio
+import base64
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.uploads import SpooledUpload, UploadTooLarge
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+
+
+def test_decode_data_url_matches_payload(tmp_path):
+    payload = os.urandom(3 * 1024 * 1024 + 7)
+    body = json.dumps({
+        'name': 'poster',
+        'image': 'data:image/png;base64,' + base64.b64encode(payload).decode()
+    }).encode()
+
+    with SpooledUpload.from_stream(io.BytesIO(body), str(tmp_path), len(body)) as upload:
+        decoded = upload.decode_data_url('image')
+        assert decoded.read_bytes() == payload
+    assert os.listdir(tmp_path) == []
+
+
+def test_escaped_slashes_and_missing_field(tmp_path):
+    payload = b'\xff' * 3000  # encodes to lots of '/'
+    body = json.dumps({'image': base64.b64encode(payload).decode()}).replace('/', '\\/').encode()
+
+    with SpooledUpload.from_stream(io.BytesIO(body), str(tmp_path)) as upload:
+        assert upload.decode_data_url('image').read_bytes() == payload
+        assert upload.decode_data_url('logo') is None
+
+
+def test_only_the_top_level_field_is_decoded(tmp_path):
+    payload = os.urandom(3000)
+    decoy = base64.b64encode(b'decoy').decode()
+    body = json.dumps({
+        'note': f'"image": "{decoy}"',
+        'meta': {'image': decoy, 'sizes': [1, {'image': decoy}]},
+        'image': 'data:image/png;base64,' + base64.b64encode(payload).decode(),
+        'flag': None
+    }).encode()
+
+    with SpooledUpload.from_stream(io.BytesIO(body), str(tmp_path)) as upload:
+        assert upload.decode_data_url('image').read_bytes() == payload
+
+    nested = json.dumps({'meta': {'image': decoy}, 'image': None}).encode()
+    with SpooledUpload.from_stream(io.BytesIO(nested), str(tmp_path)) as upload:
+        assert upload.decode_data_url('image') is None
+
+    repeated = b'{"image": "' + decoy.encode() + b'", "\\u0069mage": "' + decoy.encode() + b'"}'
+    for bad in (repeated, b'["image"]', b'{"image": "AAAA"'):
+        with SpooledUpload.from_stream(io.BytesIO(bad), str(tmp_path)) as upload:
+            with pytest.raises(ValueError):
+                upload.decode_data_url('image')
+
+
+def test_line_wrapped_base64(tmp_path):
+    payload = os.urandom(5000)
+    wrapped = base64.encodebytes(payload).decode()  # 76 characters per line
+    body = json.dumps({'image': wrapped}).encode()
+
+    with SpooledUpload.from_stream(io.BytesIO(body), str(tmp_path)) as upload:
+        assert upload.decode_data_url('image').read_bytes() == payload
+
+
+def test_oversized_body_is_rejected_and_removed(tmp_path):
+    other = tmp_path / '20250101_000000_abcdef12_upload.json'
+    other.write_bytes(b'{}')  # another request's spool
+
+    with pytest.raises(UploadTooLarge):
+        SpooledUpload.from_stream(io.BytesIO(b'x' * 2048), str(tmp_path), max_size=1024)
+    assert os.listdir(tmp_path) == [other.name]
+
+
+def test_flask_extract_enforces_max_content_length():
+    from app import app
+    from config import Config
+
+    response = app.test_client().post(
+        '/api/extract', data=b' ' * (Config.MAX_CONTENT_LENGTH + 1),
+        content_type='application/json'
+    )
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
+
+
+
+def test_flask_extract_inflates_gzip_bodies(monkeypatch):
+    from config import Config
+    from fakes import canned_corpus, offline_backend
+
+    corpus = canned_corpus(1)
+    with offline_backend(corpus) as (backend, _):
+        client = backend.app.test_client()
+        headers = {'Content-Encoding': 'gzip'}
+        body = gzip.compress(json.dumps({'image': corpus[0].data_url}).encode())
+        response = client.post('/api/extract', data=body, content_type='application/json', headers=headers)
+        assert response.status_code == 200
+        assert response.json['data'] == corpus[0].event
+
+        corrupt = client.post('/api/extract', data=body[:-20] + b'x' * 20, content_type='application/json',
+                              headers=headers)
+        assert corrupt.status_code == 400
+
+        monkeypatch.setattr(Config, 'MAX_CONTENT_LENGTH', 64 * 1024)
+        monkeypatch.setattr(backend.app.wsgi_app.app, 'max_size', 64 * 1024)
+        bomb = gzip.compress(b'{"image": "' + b'A' * (1024 * 1024) + b'"}')
+        response = client.post('/api/extract', data=bomb, content_type='application/json', headers=headers)
+        assert response.status_code == 413
+
+
+def call_asgi(app, method, path, body, headers):
+    """Run one request through an ASGI app; returns (status, body)"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 1234), 'server': ('127.0.0.1', 80)
+    }
+    # Split into small messages, as a server delivers them
+    messages = [body[i:i + 1000] for i in range(0, len(body), 1000)] or [b'']
+    sent = []
+
+    async def receive():
+        if messages:
+            chunk = messages.pop(0)
+            return {'type': 'http.request', 'body': chunk, 'more_body': bool(messages)}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(message['status'] for message in sent if message['type'] == 'http.response.start')
+    return status, b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+
+
+def test_asgi_inflates_gzip_for_native_and_mounted_routes():
+    import asgi
+
+    event = {
+        'event_name': 'Summer Jam', 'artist_name': 'The Midnight Owls', 'venue_name': 'Blue Room',
+        'venue_owner': 'Sam Lee', 'date': '2025-07-15', 'time': '8:00 PM', 'location': 'Austin, TX'
+    }
+    body = gzip.compress(json.dumps({'template_type': 'good_artist', 'event_data': event}).encode())
+    headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'Content-Length': str(len(body))}
+
+    # Served by Flask through a2wsgi, which gets no Content-Length
+    status, response = call_asgi(asgi.app, 'POST', '/api/generate-email', body, headers)
+    assert status == 200
+    assert 'Summer Jam' in json.loads(response)['email']['subject']
+
+    bomb = gzip.compress(b'{"image": "' + b'A' * (32 * 1024 * 1024) + b'"}')
+    headers['Content-Length'] = str(len(bomb))
+    status, response = call_asgi(asgi.app, 'POST', '/api/extract', bomb, headers)
+    assert status == 413
+
+
+PEAK_RSS = '''
+import base64, gzip, io, json, os, shutil, sys, tempfile
+from utils.middleware import GzipRequestMiddleware
+from utils.uploads import SpooledUpload
+
+def peak_kib():
+    # VmHWM starts fresh at exec; ru_maxrss would inherit pytest's peak
+    with open('/proc/self/status') as status:
+        return int(next(line for line in status if line.startswith('VmHWM')).split()[1])
+
+folder = tempfile.mkdtemp()
+source = os.path.join(folder, 'body.json')
+with open(source, 'wb') as f:
+    f.write(b'{"image": "data:image/png;base64,')
+    chunk = base64.b64encode(os.urandom(3 * 1024 * 1024))
+    for _ in range(5):
+        f.write(chunk)
+    f.write(b'"}')
+size = os.path.getsize(source)
+
+if sys.argv[1] == 'gzip':
+    with open(source, 'rb') as raw, gzip.open(source + '.gz', 'wb') as packed:
+        shutil.copyfileobj(raw, packed)
+    source += '.gz'
+
+def spool(environ, start_response):
+    with SpooledUpload.from_stream(environ['wsgi.input'], folder) as upload:
+        upload.decode_data_url('image')
+    return []
+
+app = GzipRequestMiddleware(spool, max_size=2 * size)
+
+def request(path):
+    with open(path, 'rb') as stream:
+        environ = {'wsgi.input': stream, 'CONTENT_LENGTH': str(os.path.getsize(path))}
+        if path.endswith('.gz'):
+            environ['HTTP_CONTENT_ENCODING'] = 'gzip'
+        app(environ, None)
+
+# Warm up, so lazy imports don't count as per-upload memory
+warmup = os.path.join(folder, 'warmup.json.gz')
+with gzip.open(warmup, 'wb') as f:
+    f.write(b'{}')
+request(warmup)
+
+before = peak_kib()
+request(source)
+after = peak_kib()
+print((after - before) * 1024, size)
+'''
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason='reads peak RSS from /proc')
+@pytest.mark.parametrize('encoding', ['identity', 'gzip'])
+def test_peak_memory_is_bounded_by_window_not_body(encoding):
+    output = subprocess.run(
+        [sys.executable, '-c', PEAK_RSS, encoding], cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout
+    growth, body_size = map(int, output.split())
+    # A ~20MB body must not be held in memory, decoded, raw or inflated
+    assert growth < body_size / 4